@@ -107,7 +107,7 @@ class Command(BaseCommand):
         self.stdout.write(f'创建 {count} 个测试学员...')
         
         # 获取教师用户
-        teachers = User.objects.filter(roles_json__contains='"teacher"')
+        teachers = User.objects.with_role('teacher')
         if not teachers.exists():
             self.stdout.write(
                 self.style.WARNING('没有找到教师用户，将创建未分配教师的学生')
@@ -147,8 +147,8 @@ class Command(BaseCommand):
         """创建教学任务"""
         self.stdout.write('创建教学任务...')
         
-        teachers = User.objects.filter(roles_json__contains='"teacher"')
-        researchers = User.objects.filter(roles_json__contains='"researcher"')
+        teachers = User.objects.with_role('teacher')
+        researchers = User.objects.with_role('researcher')
         students = Student.objects.all()
         
         if not all([teachers.exists(), researchers.exists(), students.exists()]):
@@ -188,7 +188,7 @@ class Command(BaseCommand):
         """创建教学反馈"""
         self.stdout.write('创建教学反馈...')
         
-        teachers = User.objects.filter(roles_json__contains='"teacher"')
+        teachers = User.objects.with_role('teacher')
         students = Student.objects.all()
         
         if not all([teachers.exists(), students.exists()]):
@@ -278,7 +278,7 @@ class Command(BaseCommand):
         self.stdout.write('创建回访记录...')
         
         students = Student.objects.all()
-        teachers = User.objects.filter(roles_json__contains='"teacher"')
+        teachers = User.objects.with_role('teacher')
         
         if not all([students.exists(), teachers.exists()]):
             self.stdout.write(
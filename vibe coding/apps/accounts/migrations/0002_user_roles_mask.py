@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:53
+
+import json
+
+import apps.accounts.models
+from django.db import migrations, models
+
+# 迁移内固化角色位取值，避免随模型代码变化
+ROLE_BITS = {'teacher': 1, 'researcher': 2, 'operator': 4, 'admin': 8}
+
+
+def backfill_roles_mask(apps, schema_editor):
+    """由 roles_json 回填 roles_mask"""
+    User = apps.get_model('accounts', 'User')
+    batch = []
+    for user in User.objects.only('pk', 'roles_json').iterator(chunk_size=2000):
+        try:
+            roles = json.loads(user.roles_json or '[]')
+        except (json.JSONDecodeError, TypeError):
+            roles = []
+        mask = 0
+        for role in roles if isinstance(roles, list) else []:
+            mask |= ROLE_BITS.get(role, 0)
+        if mask:
+            user.roles_mask = mask
+            batch.append(user)
+    User.objects.bulk_update(batch, ['roles_mask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', apps.accounts.models.RoleUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='roles_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, verbose_name='角色位掩码'),
+        ),
+        migrations.RunPython(backfill_roles_mask, migrations.RunPython.noop),
+    ]
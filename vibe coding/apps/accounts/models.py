@@ -1,6 +1,39 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
-import json
+
+from apps.common import jsoncodec
+
+# 角色位：roles_mask 按位存储，便于走索引筛选
+ROLE_BITS = {
+    'teacher': 1,
+    'researcher': 2,
+    'operator': 4,
+    'admin': 8,
+}
+
+# 所有角色组合的取值上限（不含）
+_ALL_MASKS = 1 << len(ROLE_BITS)
+
+
+def roles_to_mask(roles):
+    """角色列表转位掩码（未知角色忽略）"""
+    mask = 0
+    for role in roles:
+        mask |= ROLE_BITS.get(role, 0)
+    return mask
+
+
+def masks_with_role(role):
+    """包含指定角色位的全部掩码取值（用于 roles_mask__in 索引查找）"""
+    bit = ROLE_BITS[role]
+    return [mask for mask in range(_ALL_MASKS) if mask & bit]
+
+
+class RoleUserManager(UserManager):
+    def with_role(self, role):
+        """拥有指定角色的用户（roles_mask 索引查找，替代 roles_json LIKE 扫描）"""
+        return self.filter(roles_mask__in=masks_with_role(role))
+
 
 class User(AbstractUser):
     """扩展用户模型"""
@@ -17,6 +50,12 @@ class User(AbstractUser):
         default='[]',
         verbose_name='角色JSON'
     )
+    # 由 roles_json 派生，保存时自动同步
+    roles_mask = models.PositiveSmallIntegerField(
+        default=0,
+        db_index=True,
+        verbose_name='角色位掩码'
+    )
     
     real_name = models.CharField(max_length=50, verbose_name='真实姓名')
     phone = models.CharField(max_length=20, blank=True, verbose_name='电话')
@@ -24,39 +63,70 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     
+    objects = RoleUserManager()
+    
     class Meta:
         verbose_name = '用户'
         verbose_name_plural = '用户'
         db_table = 'auth_user_extended'
     
+    def _role_state(self):
+        """解析后的角色缓存在实例上，roles_json 变化时才重新解析"""
+        cached = self.__dict__.get('_roles_cache')
+        if cached is not None and cached[0] is self.roles_json:
+            return cached
+        roles = [role for role in jsoncodec.loads_or_default(self.roles_json) if isinstance(role, str)]
+        cached = (self.roles_json, roles, frozenset(roles), roles_to_mask(roles))
+        self.__dict__['_roles_cache'] = cached
+        return cached
+    
     @property
     def roles(self):
         """获取角色列表"""
-        try:
-            return json.loads(self.roles_json)
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return self._role_state()[1]
     
     @roles.setter
     def roles(self, value):
         """设置角色列表"""
-        self.roles_json = json.dumps(value if value else [])
+        self.roles_json = jsoncodec.dumps(value if value else [])
+        self.roles_mask = roles_to_mask(value or [])
+    
+    @property
+    def role_mask(self):
+        """当前角色位掩码（以 roles_json 为准，未保存的修改同样生效）"""
+        return self._role_state()[3]
     
     def has_role(self, role):
         """检查用户是否拥有指定角色"""
-        return role in self.roles
+        bit = ROLE_BITS.get(role)
+        if bit is not None:
+            return bool(self._role_state()[3] & bit)
+        return role in self._role_state()[2]
+    
+    def has_any_role(self, mask, names=frozenset()):
+        """检查是否拥有任一角色：mask 为已知角色位，names 为额外的自定义角色名"""
+        state = self._role_state()
+        return bool(state[3] & mask) or not names.isdisjoint(state[2])
     
     def is_teacher(self):
         """检查是否为教师"""
-        return 'teacher' in self.roles
+        return self.has_role('teacher')
     
     def is_researcher(self):
         """检查是否为教研"""
-        return 'researcher' in self.roles
+        return self.has_role('researcher')
     
     def is_operator(self):
         """检查是否为运营"""
-        return 'operator' in self.roles
+        return self.has_role('operator')
+    
+    def save(self, *args, **kwargs):
+        """保存时由 roles_json 同步 roles_mask"""
+        self.roles_mask = self.role_mask
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'roles_json' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'roles_mask'}
+        super().save(*args, **kwargs)
     
     def get_roles_display(self):
         """获取角色显示名称"""
@@ -0,0 +1,55 @@
+"""异步视图支持（ASGI 部署）
+
+读多写少的 JSON 接口另有异步实现（视图名加 _async 后缀），ASGI 部署（config/asgi.py 设置
+ASYNC_VIEWS=1）时 URL 指向异步实现，WSGI 部署仍用同步实现。异步实现使用 Django 异步 ORM，
+同一接口内互不依赖的查询（如学员详情的学员行、最近点评、最近回访，列表的总数与当前页）
+用 asyncio.gather 一起发出。Django 5.0 的异步 ORM 仍在每个请求各自的线程中依次执行 SQL，
+收益主要在于并发请求数不再受 WSGI 工作线程数限制；ORM 支持原生异步驱动后无需改动即可并行。
+对比见 perf_bench asgi。
+
+- view_for：URL 按 settings.ASYNC_VIEWS 选择实现
+- alist：异步求值查询集
+- aiterate：同步迭代器转异步迭代器（ASGI 下的流式响应）
+- 装饰器 login_required / role_required（apps.common.decorators）与 cached_view /
+  conditional_view（apps.common.viewcache）同时支持同步与异步视图
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def view_for(sync_view, async_view):
+    """ASYNC_VIEWS 为真时使用异步实现"""
+    return async_view if getattr(settings, 'ASYNC_VIEWS', False) else sync_view
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def aiterate(iterable, batch_size=500):
+    """把同步迭代器（如读数据库的生成器）转为异步迭代器，每次线程切换取出 batch_size 项
+
+    ASGI 下 StreamingHttpResponse 遇到同步迭代器会先 sync_to_async(list) 整体读入内存再发送，
+    流式导出须传入异步迭代器。迭代器在请求的同一线程中推进与关闭（客户端中途断开时也会关闭，
+    其中打开的事务/游标随之结束）。
+    """
+    iterator = iter(iterable)
+
+    def take():
+        return list(islice(iterator, batch_size))
+
+    def close():
+        if hasattr(iterator, 'close'):
+            iterator.close()
+
+    try:
+        while True:
+            batch = await sync_to_async(take)()
+            if not batch:
+                return
+            for item in batch:
+                yield item
+    finally:
+        await sync_to_async(close)()
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.common'
-    verbose_name = '通用模块'
\ No newline at end of file
+    verbose_name = '通用模块'
+
+    def ready(self):
+        # 注册信号：写入后使列表总数缓存与接口响应缓存失效
+        from . import signals  # noqa: F401
@@ -0,0 +1,137 @@
+"""SQLite 高并发配置（数据库后端，ENGINE = 'apps.common.backends.sqlite3'）
+
+小规模部署直接使用 db.sqlite3。Django 自带后端使用回滚日志模式，读与写互相阻塞，多个
+工作进程/线程同时提交点评时频繁报 database is locked。本后端在自带 sqlite3 后端基础上：
+
+- 新建连接时设置 PRAGMA：busy_timeout（等锁而不是立即报错）、journal_mode=WAL（读不阻塞写、
+  写不阻塞读）、synchronous=NORMAL（WAL 下仍保证一致性，只在断电时可能丢失最近提交的事务）、
+  mmap_size、cache_size、temp_store=MEMORY；取值见 settings.SQLITE_*
+- 写事务（apps.common.db.write_transaction）以 BEGIN IMMEDIATE 开始：默认的 BEGIN（DEFERRED）
+  在事务中先读后写时需要把读锁升级为写锁，若期间其他连接已提交写入会立即返回 SQLITE_BUSY，
+  busy_timeout 对此无效；IMMEDIATE 在事务开始时即取得写锁，等待时长受 busy_timeout 控制。
+  普通的 transaction.atomic() 仍为 DEFERRED，只读事务不占写锁
+- 可选的进程内单写者队列（OPTIONS['write_queue']，由 SQLITE_WRITE_QUEUE=1 开启）：同一进程
+  内的写事务按到达顺序排队依次执行，不再在 SQLite 的忙等待中轮询争抢写锁；排队超过
+  busy_timeout 仍报 database is locked
+
+自动提交模式下的单条写入、以写入开始的 DEFERRED 事务由 busy_timeout 兜底。对比见 perf_bench sqlite。
+"""
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+MMAP_SIZE = getattr(settings, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+CACHE_SIZE_KB = getattr(settings, 'SQLITE_CACHE_SIZE_KB', 64 * 1024)
+BUSY_TIMEOUT_MS = getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000)
+
+
+class WriteQueue:
+    """先到先得的写锁：释放时直接移交给最早等待的线程"""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._waiters = deque()
+        self._held = False
+
+    def acquire(self, timeout):
+        with self._mutex:
+            if not self._held:
+                self._held = True
+                return True
+            waiter = threading.Lock()
+            waiter.acquire()
+            self._waiters.append(waiter)
+        if waiter.acquire(timeout=timeout):
+            return True
+        with self._mutex:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                # 超时的同时已被移交写锁
+                return True
+            return False
+
+    def release(self):
+        with self._mutex:
+            if self._waiters:
+                self._waiters.popleft().release()
+            else:
+                self._held = False
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def write_queue(name):
+    """某个数据库文件的进程内写队列"""
+    with _queues_lock:
+        return _queues.setdefault(str(name), WriteQueue())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_queue = None
+        if self.settings_dict['OPTIONS'].get('write_queue'):
+            self.write_queue = write_queue(self.settings_dict['NAME'])
+        self._holds_write_queue = False
+        # 由 write_transaction 设置：下一个事务以 BEGIN IMMEDIATE 开始并进入写队列
+        self.begin_immediate = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('write_queue', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        # busy_timeout 须在切换 WAL 之前设置：首次切换需要独占锁
+        conn.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT_MS)}')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA mmap_size = {int(MMAP_SIZE)}')
+        # 负数表示以 KB 为单位
+        conn.execute(f'PRAGMA cache_size = -{int(CACHE_SIZE_KB)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        immediate, self.begin_immediate = self.begin_immediate, False
+        if not immediate:
+            return super()._start_transaction_under_autocommit()
+        if self.write_queue is not None:
+            if not self.write_queue.acquire(timeout=BUSY_TIMEOUT_MS / 1000):
+                raise OperationalError('database is locked（进程内写队列等待超时）')
+            self._holds_write_queue = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_queue()
+            raise
+
+    def _release_write_queue(self):
+        if self._holds_write_queue:
+            self._holds_write_queue = False
+            self.write_queue.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_queue()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_queue()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_queue()
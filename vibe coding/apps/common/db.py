@@ -0,0 +1,43 @@
+"""数据库连接相关工具
+
+stream：逐块读取大查询集（导出、索引重建等整表读取）。PostgreSQL 上 QuerySet.iterator()
+使用服务端游标（named cursor），结果按 chunk_size 分批从服务端取回，不会整表载入内存；
+SQLite 上为同一游标分批 fetchmany。
+
+游标放在事务内打开：自动提交模式下 Django 创建的是 WITH HOLD 游标，经 pgbouncer 事务池
+连接时后续 FETCH 可能落到另一条服务端连接上；事务内的游标随事务结束关闭，直连与经
+pgbouncer 连接都可用。读取过程中的写入也在同一事务内，读完统一提交。SQLite 上不开事务。
+
+write_transaction：写事务。先读后写的事务须使用它，SQLite（apps.common.backends.sqlite3）上以
+BEGIN IMMEDIATE 开始并进入进程内写队列；其他数据库等同 transaction.atomic。
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def stream(queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """逐行产出 queryset 的结果（服务端游标，分块读取）；支持 prefetch_related（按块预取）"""
+    if connections[queryset.db].vendor != 'postgresql':
+        # SQLite 无服务端游标；事务以 BEGIN IMMEDIATE 开始会占用写锁，只读时不开事务
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
+
+
+@contextmanager
+def write_transaction(using=None):
+    """写事务（transaction.atomic，SQLite 上事务开始即取得写锁）；已在事务内时为普通的嵌套 atomic"""
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    immediate = hasattr(connection, 'begin_immediate') and not connection.in_atomic_block
+    if immediate:
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        if immediate:
+            connection.begin_immediate = False
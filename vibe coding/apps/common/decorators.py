@@ -1,30 +1,74 @@
 from functools import wraps
-from django.http import JsonResponse
-from django.contrib.auth.decorators import login_required
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import decorators as auth_decorators
+from django.contrib.auth.views import redirect_to_login
+
+from apps.accounts.models import ROLE_BITS
+from apps.common.http import JsonResponse
+
+# 中文角色名称到英文代码的映射
+ROLE_MAPPING = {
+    '运营': 'operator',
+    '教学': 'teacher',
+    '教研': 'researcher',
+    '管理员': 'admin'
+}
+
+
+def compile_roles(allowed_roles):
+    """将允许的角色编译为 (位掩码, 自定义角色名集合)，在装饰时完成一次"""
+    mask = 0
+    names = set()
+    for role in allowed_roles:
+        code = ROLE_MAPPING.get(role, role)
+        bit = ROLE_BITS.get(code)
+        if bit is None:
+            names.add(code)
+        else:
+            mask |= bit
+    return mask, frozenset(names)
+
+
+def login_required(view_func):
+    """login_required，同时支持异步视图（Django 5.0 内置版本只支持同步视图）
+
+    异步视图先 await request.auser() 并回填 request.user，之后的权限判断、缓存键等
+    同步代码读取 request.user 不会再触发数据库查询。
+    """
+    if not iscoroutinefunction(view_func):
+        return auth_decorators.login_required(view_func)
+
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
+
 
 def role_required(allowed_roles):
+    required_mask, required_names = compile_roles(allowed_roles)
+
+    def denied(user):
+        if not user.is_authenticated:
+            return JsonResponse({'error': '请先登录'}, status=401)
+        # 检查用户是否拥有任一允许的角色（位运算，无需解析或映射）
+        if not user.has_any_role(required_mask, required_names):
+            return JsonResponse({'error': '权限不足'}, status=403)
+        return None
+
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _async_wrapped_view(request, *args, **kwargs):
+                request.user = await request.auser()
+                return denied(request.user) or await view_func(request, *args, **kwargs)
+            return _async_wrapped_view
+
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            if not request.user.is_authenticated:
-                return JsonResponse({'error': '请先登录'}, status=401)
-            
-            # 中文角色名称到英文代码的映射
-            role_mapping = {
-                '运营': 'operator',
-                '教学': 'teacher', 
-                '教研': 'researcher',
-                '管理员': 'admin'
-            }
-            
-            # 将中文角色名称转换为英文代码
-            mapped_roles = [role_mapping.get(role, role) for role in allowed_roles]
-            
-            # 检查用户是否拥有任一允许的角色
-            user_roles = request.user.roles  # 使用复数形式
-            if not any(role in user_roles for role in mapped_roles):
-                return JsonResponse({'error': '权限不足'}, status=403)
-            
-            return view_func(request, *args, **kwargs)
+            return denied(request.user) or view_func(request, *args, **kwargs)
         return _wrapped_view
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,148 @@
+"""变更事件总线（服务端推送事件流）
+
+教师/运营原先在每次操作后重新拉取整个今日任务 / 运营待办列表才能看到新分配的任务。
+写入方在事务提交后向频道发布一条事件（只含变更的行），客户端通过事件流
+（GET /common/events/，text/event-stream，需在 ASGI 下运行：uvicorn config.asgi:application）
+接收增量并合并到已渲染的列表，不再整表重新拉取。
+
+事件写入 change_events 表（发件箱），事件流按 (频道, id) 索引轮询，因此 WSGI 工作进程中的
+写入同样能推送给 ASGI 进程中的连接。事件 id 即 SSE 的 id，断线重连时浏览器带上
+Last-Event-ID，从断点继续推送；连接保持 EVENT_STREAM_MAX_AGE 秒后由服务端关闭，
+客户端自动重连。过期事件由 prune_change_events 命令清理。
+
+提交顺序：事件 id 在插入时分配，PostgreSQL 上并发写入按提交先后可见，较小的 id 可能晚于较大
+的 id 出现。事件流只把创建已超过 SETTLE_SECONDS 的事件视为已定序，游标停在已定序的位置，
+其后的事件每次轮询都重读、按 id 去重；SSE 的 id 发送的也是已定序位置，断线重连从这里重读，
+重复推送的行由客户端按行 id 去重。
+
+数据库连接：每个事件流在 ASGI 进程中占用一个线程，每次轮询后关闭该线程的数据库连接，
+连接只在查询期间占用，不会在 EVENT_STREAM_MAX_AGE 内一直挂着（轮询时新建连接，PostgreSQL
+部署建议经 pgbouncer 连接）。
+
+频道：
+- user:<pk>  某用户（教师的新分配任务）
+- ops        运营收件箱（所有运营用户共享）
+"""
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import jsoncodec
+from .models import ChangeEvent
+
+OPS_CHANNEL = 'ops'
+
+POLL_INTERVAL = getattr(settings, 'EVENT_STREAM_POLL_INTERVAL', 2.0)
+MAX_AGE = getattr(settings, 'EVENT_STREAM_MAX_AGE', 300)
+SETTLE_SECONDS = getattr(settings, 'EVENT_STREAM_SETTLE_SECONDS', 5)
+HEARTBEAT_INTERVAL = 15
+RETRY_MS = 3000
+READ_LIMIT = 100
+
+TEACHING_TASK_ASSIGNED = 'teaching_task.assigned'
+OPS_TASK_CREATED = 'ops_task.created'
+
+
+def user_channel(pk):
+    return f'user:{pk}'
+
+
+def channels_for(user):
+    """用户订阅的频道"""
+    channels = [user_channel(user.pk)]
+    if user.has_role('operator'):
+        channels.append(OPS_CHANNEL)
+    return channels
+
+
+def publish(channel, kind, items):
+    """事务提交后发布事件；items 为行列表，或返回行列表的函数（提交后调用，读到已提交的数据）"""
+    def write():
+        rows = items() if callable(items) else items
+        if rows:
+            ChangeEvent.objects.create(channel=channel, kind=kind, payload=rows)
+
+    transaction.on_commit(write)
+
+
+def prune(hours=None):
+    """删除超过保留时长的事件，返回删除条数"""
+    hours = hours if hours is not None else getattr(settings, 'EVENT_RETENTION_HOURS', 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def _settled_before():
+    return timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+
+
+async def alatest_id(channels):
+    """频道最新的已定序事件 id（新连接从此处开始，只推送之后的事件）"""
+    latest = await (
+        ChangeEvent.objects.filter(channel__in=channels, created_at__lt=_settled_before())
+        .order_by('-id').values_list('id', flat=True).afirst()
+    )
+    return latest or 0
+
+
+@sync_to_async
+def aread(channels, after, limit=READ_LIMIT):
+    try:
+        return list(ChangeEvent.objects.filter(channel__in=channels, id__gt=after).order_by('id')[:limit])
+    finally:
+        # 两次轮询之间不占用数据库连接
+        connection.close()
+
+
+def format_event(event, last_id):
+    data = jsoncodec.dumps({'kind': event.kind, 'items': event.payload})
+    return f'id: {last_id}\nevent: {event.kind}\ndata: {data}\n\n'
+
+
+async def stream(channels, after):
+    """SSE 正文：轮询新事件并输出，空闲时发送心跳注释，到达 MAX_AGE 后结束
+
+    after 为已定序位置：其后的事件每次轮询都重读，已推送的按 id 跳过。
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MAX_AGE
+    yield f'retry: {RETRY_MS}\n\n'
+    sent = set()
+    announced = after
+    idle = 0.0
+    while loop.time() < deadline:
+        settled_before = _settled_before()
+        settled, low, fresh = True, after, 0
+        while True:
+            batch = await aread(channels, low)
+            for event in batch:
+                # 已定序位置只沿连续的已定序事件前进，遇到未定序的事件即停止
+                if settled and event.created_at < settled_before:
+                    after = event.id
+                else:
+                    settled = False
+                if event.id not in sent:
+                    sent.add(event.id)
+                    fresh += 1
+                    yield format_event(event, after)
+            if len(batch) < READ_LIMIT:
+                break
+            low = batch[-1].id
+        sent = {pk for pk in sent if pk > after}
+        if fresh:
+            idle = 0.0
+            announced = after
+        elif after != announced:
+            # 只含 id 的消息不触发事件，但会更新浏览器的 Last-Event-ID
+            announced = after
+            yield f'id: {after}\n\n'
+        await asyncio.sleep(POLL_INTERVAL)
+        idle += POLL_INTERVAL
+        if idle >= HEARTBEAT_INTERVAL:
+            idle = 0.0
+            yield ': ping\n\n'
@@ -0,0 +1,278 @@
+"""点评与回访记录全文检索
+
+教研点评监控、运营回访记录的关键词搜索原先是对长文本列做 LIKE 全表扫描。
+这里维护一张 search_entries 检索表，按适合中文的字符 bigram 预先切词：
+
+- SQLite：FTS5 外部内容虚表 search_entries_fts（触发器同步），bm25 排序
+- PostgreSQL：tokens 上的 to_tsvector('simple', ...) GIN 索引，ts_rank 排序
+- 其他后端或 FTS5 不可用：match_q 返回 None，调用方回退原 icontains 查询
+
+写入由 Feedback / VisitRecord 的 save/delete 信号同步；批量 update() 之后需调用 reindex。
+"""
+import html
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from . import db
+
+# 检索来源：来源 -> (模型, 参与检索的文本字段)
+SOURCES = {
+    'feedback': ('teaching.Feedback', ('teacher_comment', 'push_research', 'push_ops')),
+    'visit': ('operations.VisitRecord', ('visit_note',)),
+}
+
+FTS_TABLE = 'search_entries_fts'
+
+# 连续的 CJK 字符、或连续的其他字母数字
+_RUN_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿]+)|([^\W_]+)')
+
+SearchHit = namedtuple('SearchHit', ['object_id', 'score', 'snippet'])
+
+_fts5_available = None
+
+
+def tokenize(text):
+    """切词：CJK 连续片段切为字符 bigram（单字片段保留单字），其余按单词小写"""
+    tokens = []
+    for cjk, word in _RUN_RE.findall(text or ''):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def _query_terms(query):
+    """查询切词；返回 [(token, is_prefix)]，单个汉字的查询无法用 bigram 索引，返回 []"""
+    terms = []
+    for cjk, word in _RUN_RE.findall(query or ''):
+        if cjk:
+            if len(cjk) == 1:
+                return []
+            terms.extend((cjk[i:i + 2], False) for i in range(len(cjk) - 1))
+        else:
+            terms.append((word.lower(), True))
+    return terms
+
+
+def _has_fts5():
+    global _fts5_available
+    if _fts5_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            _fts5_available = cursor.fetchone() is not None
+    return _fts5_available
+
+
+def _backend():
+    if connection.vendor == 'sqlite' and _has_fts5():
+        return 'sqlite'
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    return None
+
+
+def _match_expression(backend, terms):
+    if backend == 'sqlite':
+        return ' AND '.join(f'"{token}"*' if prefix else f'"{token}"' for token, prefix in terms)
+    return ' & '.join(f'{token}:*' if prefix else token for token, prefix in terms)
+
+
+def _match_sql(source, query):
+    terms = _query_terms(query)
+    backend = _backend()
+    if not terms or backend is None:
+        return None, None
+    expression = _match_expression(backend, terms)
+    if backend == 'sqlite':
+        sql = (
+            f"SELECT object_id FROM search_entries WHERE source = %s AND id IN "
+            f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)"
+        )
+    else:
+        sql = (
+            "SELECT object_id FROM search_entries WHERE source = %s "
+            "AND to_tsvector('simple', tokens) @@ to_tsquery('simple', %s)"
+        )
+    return sql, [source, expression]
+
+
+def match_q(source, query, field='pk'):
+    """全文匹配条件（子查询，无参数个数限制）；无法走全文索引时返回 None"""
+    sql, params = _match_sql(source, query)
+    if sql is None:
+        return None
+    return Q(**{f'{field}__in': RawSQL(sql, params)})
+
+
+def rank(source, query, limit=200):
+    """按相关度返回 [(object_id, score)]，score 越大越相关"""
+    terms = _query_terms(query)
+    backend = _backend()
+    if not terms or backend is None:
+        return []
+    expression = _match_expression(backend, terms)
+    with connection.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute(
+                f"SELECT e.object_id, -bm25({FTS_TABLE}) AS score "
+                f"FROM {FTS_TABLE} JOIN search_entries e ON e.id = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s AND e.source = %s "
+                f"ORDER BY score DESC LIMIT %s",
+                [expression, source, limit],
+            )
+        else:
+            cursor.execute(
+                "SELECT object_id, ts_rank(to_tsvector('simple', tokens), to_tsquery('simple', %s)) AS score "
+                "FROM search_entries WHERE source = %s "
+                "AND to_tsvector('simple', tokens) @@ to_tsquery('simple', %s) "
+                "ORDER BY score DESC LIMIT %s",
+                [expression, source, expression, limit],
+            )
+        return [(object_id, float(score)) for object_id, score in cursor.fetchall()]
+
+
+def score_expression(source, query, model):
+    """相关度注解（关联子查询，按行取该对象检索条目的得分），未命中全文的行为 0
+
+    用于在已过滤的查询集内按相关度排序，不截断结果集；无法走全文索引时返回 None。
+    """
+    terms = _query_terms(query)
+    backend = _backend()
+    if not terms or backend is None:
+        return None
+    expression = _match_expression(backend, terms)
+    qn = connection.ops.quote_name
+    outer = f'{qn(model._meta.db_table)}.{qn(model._meta.pk.column)}'
+    if backend == 'sqlite':
+        sql = (
+            f"COALESCE((SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"JOIN search_entries e ON e.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND e.source = %s AND e.object_id = {outer}), 0)"
+        )
+        params = [expression, source]
+    else:
+        sql = (
+            "COALESCE((SELECT ts_rank(to_tsvector('simple', e.tokens), to_tsquery('simple', %s)) "
+            "FROM search_entries e WHERE e.source = %s AND e.object_id = " + outer + " "
+            "AND to_tsvector('simple', e.tokens) @@ to_tsquery('simple', %s)), 0)"
+        )
+        params = [expression, source, expression]
+    return RawSQL(sql, params, output_field=FloatField())
+
+
+def _needles(query):
+    needles = {query.strip()} if query and query.strip() else set()
+    needles.update(token for token, _ in _query_terms(query))
+    return sorted((n for n in needles if n), key=len, reverse=True)
+
+
+def highlight(text, query, width=80):
+    """生成高亮摘要：命中片段用 <mark> 标出，其余内容做 HTML 转义"""
+    text = text or ''
+    needles = _needles(query)
+    pattern = re.compile('|'.join(re.escape(n) for n in needles), re.IGNORECASE) if needles else None
+    match = pattern.search(text) if pattern else None
+    start = max(0, match.start() - width // 3) if match and len(text) > width else 0
+    snippet = text[start:start + width]
+
+    # 在原文上定位命中后分段转义，避免实体被截断或误匹配
+    parts, last = [], 0
+    if pattern:
+        for m in pattern.finditer(snippet):
+            parts.append(html.escape(snippet[last:m.start()]))
+            parts.append(f'<mark>{html.escape(m.group(0))}</mark>')
+            last = m.end()
+    parts.append(html.escape(snippet[last:]))
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if start + width < len(text) else ''
+    return prefix + ''.join(parts) + suffix
+
+
+def snippet_for(source, obj, query, width=80):
+    """取对象中首个命中的检索字段生成摘要"""
+    _, fields = SOURCES[source]
+    terms = [token for token, _ in _query_terms(query)] or [query]
+    for field in fields:
+        value = getattr(obj, field, '') or ''
+        lowered = value.lower()
+        if any(term.lower() in lowered for term in terms if term):
+            return highlight(value, query, width)
+    return highlight(getattr(obj, fields[0], '') or '', query, width)
+
+
+def search(source, query, limit=50):
+    """排序后的检索结果（含高亮摘要）"""
+    ranked = rank(source, query, limit)
+    if not ranked:
+        return []
+    model = apps.get_model(SOURCES[source][0])
+    objects = model.objects.in_bulk([object_id for object_id, _ in ranked])
+    return [
+        SearchHit(object_id, score, snippet_for(source, objects[object_id], query))
+        for object_id, score in ranked
+        if object_id in objects
+    ]
+
+
+# ---------- 索引维护 ----------
+
+def index_objects(source, objects):
+    """写入/更新检索条目（upsert），文本为空的对象删除其条目"""
+    from .models import SearchEntry
+
+    _, fields = SOURCES[source]
+    entries, empty_ids = [], []
+    for obj in objects:
+        tokens = ' '.join(tokenize(' '.join(getattr(obj, f, '') or '' for f in fields)))
+        if tokens:
+            entries.append(SearchEntry(source=source, object_id=obj.pk, tokens=tokens))
+        else:
+            empty_ids.append(obj.pk)
+    if entries:
+        SearchEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['source', 'object_id'],
+            update_fields=['tokens', 'updated_at'],
+            batch_size=500,
+        )
+    if empty_ids:
+        remove_objects(source, empty_ids)
+
+
+def remove_objects(source, object_ids):
+    from .models import SearchEntry
+
+    SearchEntry.objects.filter(source=source, object_id__in=list(object_ids)).delete()
+
+
+def reindex(source, object_ids):
+    """按主键重建检索条目（用于 QuerySet.update 等不触发信号的批量写入之后）"""
+    model_label, fields = SOURCES[source]
+    model = apps.get_model(model_label)
+    object_ids = list(object_ids)
+    for i in range(0, len(object_ids), 500):
+        index_objects(source, model.objects.filter(pk__in=object_ids[i:i + 500]).only('pk', *fields))
+
+
+def rebuild(source):
+    """全量重建某个来源的检索条目"""
+    model_label, fields = SOURCES[source]
+    model = apps.get_model(model_label)
+    batch = []
+    for obj in db.stream(model.objects.only('pk', *fields)):
+        batch.append(obj)
+        if len(batch) >= 2000:
+            index_objects(source, batch)
+            batch = []
+    if batch:
+        index_objects(source, batch)
@@ -0,0 +1,24 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.http import JsonResponse as DjangoJsonResponse
+
+from . import jsoncodec
+
+
+class JsonResponse(DjangoJsonResponse):
+    """与 django.http.JsonResponse 用法一致，默认编码走 jsoncodec 加速编码器
+
+    指定了自定义 encoder 或 json_dumps_params 时沿用 Django 原实现。
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if encoder is not DjangoJSONEncoder or json_dumps_params or not jsoncodec.FAST:
+            super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+            return
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        HttpResponse.__init__(self, content=jsoncodec.dumps_bytes(data), **kwargs)
@@ -0,0 +1,183 @@
+"""业务 ID 生成（Snowflake 风格）
+
+原先任务/回访记录 ID 由毫秒时间戳或 uuid 片段拼成，并发时撞唯一约束，或需 exists() 重试。
+这里在进程内生成 64 位整数 ID，无需访问数据库：
+
+    | 41 位毫秒时间戳（自 EPOCH 起） | 10 位 worker id | 12 位序列号 |
+
+- 同一进程内严格单调递增；不同进程以 worker id 区分，整体按时间大致有序（k-sortable）
+- worker id = settings.ID_WORKER_BASE + 本机槽位。进程首次生成 ID 时在 ID_WORKER_LOCK_DIR 下
+  依次尝试对 worker-<id>.lock 加文件锁，占到的即为本进程的 worker id；锁随进程退出由系统释放，
+  同一台机器上的进程（含 gunicorn/uvicorn fork 出的各 worker）不会取到相同的 id。fork 后子进程
+  重新占用槽位。多台机器部署时各机器的 ID_WORKER_BASE 区间（BASE ~ BASE+ID_WORKER_SLOTS-1）须互不重叠
+- 单毫秒序列用尽时等待下一毫秒；时钟小幅回拨时等待追上，回拨超过 MAX_CLOCK_BACKWARD_MS
+  则拒绝生成。时间戳不会超前于系统时钟，进程重启后以同一 worker id 生成的 ID 不会与之前重复
+- next_ids(n) 一次加锁批量分配，供 bulk_create 使用
+"""
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 2024-01-01 00:00:00 UTC（毫秒）
+EPOCH_MS = 1704067200000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+# 可等待的最大时钟回拨（毫秒）
+MAX_CLOCK_BACKWARD_MS = 5000
+
+WORKER_BASE = getattr(settings, 'ID_WORKER_BASE', 0)
+WORKER_SLOTS = getattr(settings, 'ID_WORKER_SLOTS', 32)
+LOCK_DIR = getattr(settings, 'ID_WORKER_LOCK_DIR', None) or os.path.join(tempfile.gettempdir(), 'ruihan-idgen')
+
+
+class WorkerIdUnavailable(RuntimeError):
+    """没有空闲的 worker id，或时钟回拨过大"""
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _lease_worker_id():
+    """在本机占用一个空闲的 worker id；返回 (worker id, 持有锁的文件描述符)"""
+    last = min(WORKER_BASE + WORKER_SLOTS, MAX_WORKER_ID + 1)
+    if not 0 <= WORKER_BASE < last:
+        raise WorkerIdUnavailable(f'ID_WORKER_BASE 须在 0~{MAX_WORKER_ID} 之间')
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    for worker_id in range(WORKER_BASE, last):
+        fd = os.open(os.path.join(LOCK_DIR, f'worker-{worker_id}.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        if _try_lock(fd):
+            return worker_id, fd
+        os.close(fd)
+    raise WorkerIdUnavailable(f'worker id {WORKER_BASE}~{last - 1} 均已被本机其他进程占用，请调大 ID_WORKER_SLOTS')
+
+
+def _now_ms():
+    return int(time.time() * 1000) - EPOCH_MS
+
+
+class SnowflakeGenerator:
+    """线程安全的进程内 ID 生成器；worker_id 未指定时首次使用时占用本机槽位"""
+
+    def __init__(self, worker_id=None):
+        self._lock = threading.Lock()
+        self._fixed_worker_id = worker_id
+        self._lock_fd = None
+        self._reset()
+
+    def _reset(self):
+        if self._lock_fd is not None:
+            # fork 出的子进程：关闭继承的描述符（记录锁不随 fork 继承，父进程的锁不受影响）
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.worker_id = self._fixed_worker_id
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _allocate(self, count):
+        """在锁内分配 count 个连续 ID"""
+        if self.worker_id is None:
+            self.worker_id, self._lock_fd = _lease_worker_id()
+        prefix = self.worker_id << SEQUENCE_BITS
+        ids = []
+        while len(ids) < count:
+            now = _now_ms()
+            if now < self._last_ms:
+                behind = self._last_ms - now
+                if behind > MAX_CLOCK_BACKWARD_MS:
+                    raise WorkerIdUnavailable(f'系统时钟回拨 {behind} ms，拒绝生成 ID')
+                time.sleep(behind / 1000)
+                continue
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            elif self._sequence > SEQUENCE_MASK:
+                # 本毫秒序列用尽：等待下一毫秒，不借用未来时间戳
+                time.sleep(0.0002)
+                continue
+            take = min(count - len(ids), SEQUENCE_MASK + 1 - self._sequence)
+            head = (self._last_ms << TIMESTAMP_SHIFT) | prefix
+            ids.extend(head | sequence for sequence in range(self._sequence, self._sequence + take))
+            self._sequence += take
+        return ids
+
+    def next_id(self):
+        with self._lock:
+            return self._allocate(1)[0]
+
+    def next_ids(self, count):
+        """批量分配 count 个 ID（单次加锁）"""
+        if count <= 0:
+            return []
+        with self._lock:
+            return self._allocate(count)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def _get_generator():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = SnowflakeGenerator()
+    return _generator
+
+
+def _after_fork():
+    # fork 出的子进程继承了父进程状态，需重新占用 worker id 并清空序列
+    global _generator_lock
+    _generator_lock = threading.Lock()
+    if _generator is not None:
+        _generator._lock = threading.Lock()
+        _generator._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def next_id():
+    return _get_generator().next_id()
+
+
+def next_ids(count):
+    return _get_generator().next_ids(count)
+
+
+def make_id(prefix=''):
+    """带业务前缀的字符串 ID，例如 make_id('OPS-') -> 'OPS-1234567890123456789'"""
+    return f'{prefix}{next_id()}'
+
+
+def make_ids(prefix, count):
+    return [f'{prefix}{value}' for value in next_ids(count)]
+
+
+def id_timestamp(value):
+    """由 ID（整数或带前缀字符串）反推生成时间（秒级 UNIX 时间戳）"""
+    if isinstance(value, str):
+        value = int(''.join(ch for ch in value if ch.isdigit()))
+    return ((value >> TIMESTAMP_SHIFT) + EPOCH_MS) / 1000
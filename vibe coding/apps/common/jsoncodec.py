@@ -0,0 +1,127 @@
+"""JSON 编解码与模型 JSON 属性
+
+- 编解码器可插拔：settings.JSON_CODEC = 'auto'（默认，依次尝试 orjson、msgspec）/
+  'orjson' / 'msgspec' / 'json'；未安装的加速库自动回退标准库 json
+- JSONProperty：以 *_json 文本列为事实源的模型属性，每个实例只解码一次，
+  对属性或底层文本列赋值后自动失效
+"""
+import copy
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - 可选依赖
+    msgspec = None
+
+
+def _select_codec():
+    preferred = getattr(settings, 'JSON_CODEC', 'auto')
+    if preferred in ('auto', 'orjson') and orjson is not None:
+        return 'orjson'
+    if preferred in ('auto', 'msgspec') and msgspec is not None:
+        return 'msgspec'
+    return 'json'
+
+
+CODEC = _select_codec()
+
+# 当前编解码器是否为加速实现
+FAST = CODEC != 'json'
+
+DECODE_ERRORS = (ValueError, TypeError)
+if msgspec is not None:
+    DECODE_ERRORS += (msgspec.DecodeError,)
+
+_django_encoder = DjangoJSONEncoder()
+
+
+def django_default(obj):
+    """加速编码器不支持的类型交给 DjangoJSONEncoder（日期格式、Decimal、惰性字符串等保持一致）"""
+    return _django_encoder.default(obj)
+
+
+if CODEC == 'orjson':
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(obj, default=django_default):
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    def loads(data):
+        return orjson.loads(data)
+
+elif CODEC == 'msgspec':
+    _msgspec_decoder = msgspec.json.Decoder()
+
+    def dumps_bytes(obj, default=django_default):
+        return msgspec.json.encode(obj, enc_hook=default)
+
+    def loads(data):
+        return _msgspec_decoder.decode(data.encode() if isinstance(data, str) else data)
+
+else:
+    def dumps_bytes(obj, default=django_default):
+        return json.dumps(obj, default=default).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+
+def dumps(obj, default=django_default):
+    """编码为 str（写入 *_json 文本列）"""
+    return dumps_bytes(obj, default).decode()
+
+
+def loads_or_default(raw, default=list, expected=list):
+    """解码文本列；为空、非法或类型不符时返回 default()"""
+    if not raw:
+        return default()
+    try:
+        value = loads(raw)
+    except DECODE_ERRORS:
+        return default()
+    if expected is not None and not isinstance(value, expected):
+        return default()
+    return value
+
+
+class JSONProperty(property):
+    """以文本列为事实源的 JSON 属性（解码一次、赋值失效）
+
+    缓存以文本列当前值的身份为键：对属性赋值、直接改写文本列或 refresh_from_db
+    之后都会重新解码。读取返回缓存的浅拷贝（元素为标量），原地修改不会影响文本列与之后的读取，
+    修改后须重新赋值给属性才会写回文本列。
+    on_set 为赋值后调用的实例方法名，用于同步派生字段。
+    """
+
+    def __init__(self, field_name, default=list, expected=list, on_set=None, doc=None):
+        self.field_name = field_name
+        self.default = default
+        self.expected = expected
+        self.on_set = on_set
+        self.cache_key = f'_json_cache_{field_name}'
+        super().__init__(self._get, self._set, None, doc)
+
+    def _get(self, instance):
+        raw = getattr(instance, self.field_name)
+        cached = instance.__dict__.get(self.cache_key)
+        if cached is not None and cached[0] is raw:
+            return copy.copy(cached[1])
+        value = loads_or_default(raw, self.default, self.expected)
+        instance.__dict__[self.cache_key] = (raw, value)
+        return copy.copy(value)
+
+    def _set(self, instance, value):
+        value = copy.copy(value) if value else self.default()
+        raw = dumps(value)
+        setattr(instance, self.field_name, raw)
+        instance.__dict__[self.cache_key] = (raw, value)
+        if self.on_set:
+            getattr(instance, self.on_set)(value)
@@ -0,0 +1,502 @@
+import asyncio
+import importlib
+import inspect
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+
+from apps.accounts.models import User
+from apps.common import counting, db, jsoncodec, metrics
+from apps.common.decorators import role_required
+from apps.common.middleware import CompressionMiddleware, brotli
+from apps.students.models import Student
+from apps.teaching.models import Feedback, FeedbackProgress
+from apps.teaching.services import submit_feedback_batch
+
+
+def _per_call_us(func, iterations):
+    """循环执行并返回单次耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _use_async_views(enabled):
+    """切换 ASYNC_VIEWS 并重新加载 URL 配置（URL 在导入时按该设置选择视图实现）"""
+    settings.ASYNC_VIEWS = enabled
+    for name in ('apps.teaching.urls', 'apps.operations.urls', 'apps.research.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+def _latency_summary(latencies, elapsed):
+    """(每秒请求数, p50 毫秒, p95 毫秒)"""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return len(ordered) / elapsed, statistics.median(ordered) * 1000, p95 * 1000
+
+
+def _legacy_role_check(user, allowed_roles):
+    """旧版 role_required 的每次请求开销：重建映射 + 解析 roles_json"""
+    role_mapping = {'运营': 'operator', '教学': 'teacher', '教研': 'researcher', '管理员': 'admin'}
+    mapped_roles = [role_mapping.get(role, role) for role in allowed_roles]
+    user_roles = json.loads(user.roles_json)
+    return any(role in user_roles for role in mapped_roles)
+
+
+class Command(BaseCommand):
+    help = '热点路径微基准（只读，不修改数据）'
+
+    suites = ('roles', 'lessons', 'json', 'counts', 'payload', 'asgi', 'sqlite')
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=self.suites, help='基准项目')
+        parser.add_argument('--iterations', type=int, default=100000, help='每项循环次数（默认100000）')
+        parser.add_argument('--concurrency', type=int, default=200, help='并发客户端数（asgi，默认200）')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI 工作线程数（asgi，默认8）')
+        parser.add_argument('--db-latency', type=float, default=0.0,
+                            help='每条 SQL 附加的模拟网络往返毫秒数（asgi，默认0；模拟独立数据库服务器）')
+        parser.add_argument('--writers', type=int, default=8, help='并发写线程总数（sqlite，默认8）')
+        parser.add_argument('--processes', type=int, default=2, help='工作进程数，读写线程平均分布（sqlite，默认2）')
+        parser.add_argument('--duration', type=float, default=3.0, help='每轮持续秒数（sqlite，默认3）')
+
+    def handle(self, *args, **options):
+        self.options = options
+        getattr(self, f"bench_{options['suite']}")(options['iterations'])
+
+    def report(self, label, value, unit='us/次'):
+        self.stdout.write(f'{label:<36}{value:>12.3f} {unit}')
+
+    def bench_roles(self, iterations):
+        """鉴权开销：role_required 每次请求的角色判断 + 教师列表查询"""
+        user = User.objects.exclude(roles_mask=0).first()
+        if user is None:
+            raise CommandError('没有带角色的用户，请先运行 create_test_data')
+
+        request = RequestFactory().get('/')
+        request.user = user
+        allowed = ['教学', '教研', '运营', '管理员']
+        response = HttpResponse()
+        bare_view = lambda request: response  # noqa: E731
+        view = role_required(allowed)(bare_view)
+
+        self.report('旧版角色判断（解析 JSON）', _per_call_us(lambda: _legacy_role_check(user, allowed), iterations))
+        bare = _per_call_us(lambda: bare_view(request), iterations)
+        decorated = _per_call_us(lambda: view(request), iterations)
+        self.report('role_required 附加开销', max(decorated - bare, 0.0))
+        self.report('User.has_role', _per_call_us(lambda: user.has_role('teacher'), iterations))
+
+        rounds = max(1, iterations // 1000)
+        like_qs = User.objects.filter(roles_json__contains='"teacher"')
+        mask_qs = User.objects.with_role('teacher')
+        self.report('教师列表 LIKE 扫描', _per_call_us(lambda: list(like_qs.values_list('pk')), rounds))
+        self.report('教师列表 roles_mask 索引', _per_call_us(lambda: list(mask_qs.values_list('pk')), rounds))
+        with CaptureQueriesContext(connection) as ctx:
+            list(mask_qs.values_list('pk'))
+        self.stdout.write(f"SQL: {ctx.captured_queries[-1]['sql']}")
+
+    def bench_lessons(self, iterations):
+        """课次范围查询：第 5–7 课涉及的点评（计数 + 首页）"""
+        rounds = max(1, iterations // 1000)
+        feedbacks = Feedback.objects.filter(
+            pk__in=FeedbackProgress.objects.in_range(5, 7).values('feedback_id')
+        )
+        self.stdout.write(f'点评 {Feedback.objects.count()} 条，课次条目 {FeedbackProgress.objects.count()} 条')
+        self.report('第5-7课点评计数', _per_call_us(feedbacks.count, rounds) / 1000, 'ms/次')
+        first_page = feedbacks.order_by('-reply_time')
+        self.report('第5-7课点评首页（20条）', _per_call_us(lambda: list(first_page[:20]), rounds) / 1000, 'ms/次')
+        self.stdout.write(f'EXPLAIN: {feedbacks.only("pk").explain()}')
+
+    def bench_json(self, iterations):
+        """JSON 属性与响应编码：列表接口每行的解码/编码开销"""
+        students = list(Student.objects.all()[:200])
+        if not students:
+            raise CommandError('没有学员数据，请先运行 create_test_data')
+        rounds = max(1, iterations // len(students))
+        self.stdout.write(f'编解码器：{jsoncodec.CODEC}，{len(students)} 行 x {rounds} 轮')
+
+        def legacy_rows():
+            # 旧版：progress / current_progress 每次访问都重新 json.loads
+            for s in students:
+                json.loads(s.progress_json)
+                progress = json.loads(s.progress_json)
+                progress[-1] if progress else 0
+
+        cache_key = Student.progress.cache_key
+
+        def cached_rows():
+            # 新版：每行（模拟新查询出的实例）只解码一次，其余访问命中缓存
+            for s in students:
+                s.__dict__.pop(cache_key, None)
+                s.progress
+                s.current_progress
+
+        per_row = len(students)
+        self.report('旧版 JSON 属性（每行）', _per_call_us(legacy_rows, rounds) / per_row)
+        self.report('JSONProperty（每行）', _per_call_us(cached_rows, rounds) / per_row)
+
+        rows = [
+            {
+                'id': s.id,
+                'student_name': s.student_name,
+                'groups': json.loads(s.groups_json),
+                'progress': s.progress,
+                'status': s.status,
+                'created_at': s.created_at,
+            }
+            for s in students
+        ]
+        payload = {'success': True, 'data': rows}
+        self.report('响应编码 json + DjangoJSONEncoder（每行）',
+                    _per_call_us(lambda: json.dumps(payload, cls=DjangoJSONEncoder).encode(), rounds) / per_row)
+        self.report(f'响应编码 jsoncodec/{jsoncodec.CODEC}（每行）',
+                    _per_call_us(lambda: jsoncodec.dumps_bytes(payload), rounds) / per_row)
+
+    def bench_counts(self, iterations):
+        """列表总数：运营学员列表的 COUNT(*)（旧版带注解计数 vs 计数服务冷/热缓存）"""
+        rounds = max(1, iterations // 1000)
+        legacy = Student.objects.select_related('assigned_teacher').annotate(
+            featured_count=Count('feedback', filter=Q(feedback__is_featured=True))
+        )
+        filtered = Student.objects.all()
+        scope = (Student, Feedback)
+        self.stdout.write(f'学员 {Student.objects.count()} 条，估算阈值 {counting.ESTIMATE_THRESHOLD}')
+
+        def cold():
+            cache.clear()
+            counting.count_total(filtered, scope=scope, label='bench')
+
+        metrics.reset()
+        self.report('旧版注解查询 COUNT(*)', _per_call_us(legacy.count, rounds) / 1000, 'ms/次')
+        self.report('计数服务（未命中缓存）', _per_call_us(cold, rounds) / 1000, 'ms/次')
+        self.report('计数服务（命中缓存）',
+                    _per_call_us(lambda: counting.count_total(filtered, scope=scope, label='bench'), rounds) / 1000,
+                    'ms/次')
+        with CaptureQueriesContext(connection) as ctx:
+            counting.count_total(filtered, scope=scope, label='bench')
+        self.stdout.write(f'命中缓存时 SQL 条数：{len(ctx.captured_queries)}')
+        for name, value in metrics.snapshot('count.bench.').items():
+            self.stdout.write(f'{name:<36}{value:>12}')
+
+    def bench_payload(self, iterations):
+        """响应体积与耗时：运营学员列表/详情的全字段、fields 投影、v=2 精简与压缩后字节数"""
+        from apps.operations import views as ops_views
+
+        user = User.objects.with_role('operator').first()
+        student = Student.objects.order_by('id').first()
+        if user is None or student is None:
+            raise CommandError('没有运营用户或学员数据，请先运行 create_test_data')
+        rounds = max(1, iterations // 1000)
+        factory = RequestFactory()
+        # 直接调用视图本体（跳过登录/权限/响应缓存装饰器），只衡量查询与序列化
+        list_view = inspect.unwrap(ops_views.get_students_list)
+        detail_view = inspect.unwrap(ops_views.get_student_detail)
+        compressor = CompressionMiddleware(lambda request: None)
+        encodings = ['gzip'] + (['br'] if brotli is not None else [])
+
+        cases = [
+            ('学员列表 全字段', list_view, '/?page_size=50', {}),
+            ('学员列表 fields 投影', list_view, '/?page_size=50&fields=id,student_name,groups,status', {}),
+            ('学员详情 v1', detail_view, '/', {'student_id': student.pk}),
+            ('学员详情 v=2', detail_view, '/?v=2', {'student_id': student.pk}),
+            ('学员详情 fields 投影', detail_view, '/?v=2&fields=student_name,status', {'student_id': student.pk}),
+        ]
+        self.stdout.write(f"{'':<28}{'ms/次':>10}{'原始字节':>10}" + ''.join(f'{e:>10}' for e in encodings))
+        for label, view, url, kwargs in cases:
+            def call():
+                request = factory.get(url)
+                request.user = user
+                return view(request, **kwargs)
+
+            elapsed = _per_call_us(call, rounds) / 1000
+            raw = call().content
+            sizes = []
+            for encoding in encodings:
+                response = compressor.process_response(factory.get(url, HTTP_ACCEPT_ENCODING=encoding), call())
+                sizes.append(len(response.content))
+            self.stdout.write(f'{label:<28}{elapsed:>10.3f}{len(raw):>10}' + ''.join(f'{n:>10}' for n in sizes))
+
+    def bench_asgi(self, iterations):
+        """并发吞吐：同一组热点接口在 WSGI（同步视图 + 工作线程）与 ASGI（同步 / 异步视图）下的每秒请求数
+
+        进程内直接调用 WSGIHandler / ASGIHandler（不经网络与服务器），concurrency 个客户端各自
+        连续发请求；WSGI 同时处理的请求数受 threads 限制。每个请求带不同的 _ 参数，绕过响应缓存，
+        衡量的是查询与序列化。本地 SQLite 查询几乎不等待 I/O，可用 --db-latency 为每条 SQL
+        加上模拟的网络往返，近似连接独立数据库服务器时的情况。
+        """
+        concurrency, threads = self.options['concurrency'], self.options['threads']
+        latency = self.options['db_latency'] / 1000
+        total = max(concurrency, iterations // 50)
+        roles = ('teacher', 'researcher', 'operator')
+        user = next((u for u in User.objects.exclude(roles_mask=0) if all(u.has_role(r) for r in roles)), None)
+        student = Student.objects.filter(pk__in=Feedback.objects.values('student_id')).first()
+        if user is None or student is None:
+            raise CommandError('需要同时拥有教学/教研/运营角色的用户与有点评的学员，请先运行 create_test_data')
+
+        client = Client()
+        client.force_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        urls = [
+            '/teaching/tasks/today/',
+            f'/teaching/students/{student.student_id}/',
+            f'/operations/students/{student.pk}/',
+            '/operations/tasks/api/?page=1',
+            '/research/quality/feedback/?ajax=1',
+        ]
+
+        def path_for(i):
+            url = urls[i % len(urls)]
+            return url + ('&' if '?' in url else '?') + f'_={i}'
+
+        def delayed(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # 同一线程的连接对象在每个请求结束后关闭、下次重连，包装只加一次
+            if delayed not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delayed)
+
+        if latency:
+            connection_created.connect(add_latency)
+        self.stdout.write(f'{total} 个请求，{concurrency} 个并发客户端，WSGI 工作线程 {threads}，'
+                          f'模拟 SQL 往返 {self.options["db_latency"]:g} ms')
+        self.stdout.write(f"{'':<28}{'请求/秒':>10}{'p50 ms':>10}{'p95 ms':>10}{'失败':>8}")
+        legs = [
+            ('WSGI 同步视图', False, self._run_wsgi),
+            ('ASGI 同步视图', False, self._run_asgi),
+            ('ASGI 异步视图', True, self._run_asgi),
+        ]
+        try:
+            for label, async_views, run in legs:
+                _use_async_views(async_views)
+                run(path_for, 2 * len(urls), concurrency, threads, cookie)  # 预热
+                start = time.perf_counter()
+                latencies, failures = run(path_for, total, concurrency, threads, cookie)
+                rate, p50, p95 = _latency_summary(latencies, time.perf_counter() - start)
+                self.stdout.write(f'{label:<28}{rate:>10.1f}{p50:>10.1f}{p95:>10.1f}{failures:>8}')
+        finally:
+            connection_created.disconnect(add_latency)
+            _use_async_views(False)
+
+    def bench_sqlite(self, iterations):
+        """SQLite 并发读写：Django 默认（回滚日志）/ WAL 调优 / WAL 调优 + 写队列
+
+        每种配置在当前数据库的临时副本上运行（不修改原库）。与 gunicorn 多进程多线程部署相同，
+        读写线程平均分布在 processes 个进程中：读线程数 1 → threads 递增，writers 个写线程持续
+        执行先读后写的写事务（校验学员后提交点评：db.write_transaction 内读取学员行，再调用
+        submit_feedback_batch），各持续 duration 秒。读操作为学员列表首页 + 某学员最近点评。
+        Django 默认配置下事务为 DEFERRED，读锁升级写锁时遇到其他进程的写入即报 database is locked。
+        """
+        if connection.vendor != 'sqlite':
+            raise CommandError('sqlite 基准需使用 SQLite 数据库')
+        teacher = User.objects.with_role('teacher').first()
+        student_ids = list(Student.objects.order_by('pk').values_list('pk', 'student_id')[:500])
+        if teacher is None or not student_ids:
+            raise CommandError('没有教师或学员数据，请先运行 create_test_data')
+        threads, writers, duration = self.options['threads'], self.options['writers'], self.options['duration']
+        processes = self.options['processes']
+        reader_counts = sorted({1, max(1, threads // 2), threads})
+
+        def read_once(i):
+            pk = student_ids[i % len(student_ids)][0]
+            list(Student.objects.order_by('-created_at', '-id').values_list('id', 'student_name', 'status')[:20])
+            list(Feedback.objects.filter(student_id=pk).order_by('-reply_time')[:5])
+
+        def write_once(i):
+            pk, student_id = student_ids[i % len(student_ids)]
+            with db.write_transaction():
+                Student.objects.filter(pk=pk).values_list('status', flat=True).get()
+                submit_feedback_batch(teacher, [{'student_id': student_id, 'lesson_progress': '3', 'teacher_comment': '基准写入'}])
+
+        profiles = [
+            ('Django 默认（回滚日志）', 'django.db.backends.sqlite3', {}, 'DELETE'),
+            ('WAL 调优', 'apps.common.backends.sqlite3', {'write_queue': False}, 'WAL'),
+            ('WAL 调优 + 写队列', 'apps.common.backends.sqlite3', {'write_queue': True}, 'WAL'),
+        ]
+        original = connections.settings['default']
+        self.stdout.write(f'进程 {processes}，写线程 {writers}，每轮 {duration:g} 秒')
+        self.stdout.write(f"{'':<26}{'读线程':>6}{'读/秒':>10}{'写/秒':>10}{'写 p95 ms':>12}{'读失败':>8}{'写失败':>8}")
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for n, (label, engine, db_options, journal_mode) in enumerate(profiles):
+                    path = os.path.join(tmp, f'bench{n}.sqlite3')
+                    with sqlite3.connect(original['NAME']) as source, sqlite3.connect(path) as target:
+                        source.backup(target)
+                        target.execute(f'PRAGMA journal_mode = {journal_mode}')
+                    # 子进程按此配置新建连接
+                    connections.settings['default'] = {**original, 'ENGINE': engine, 'NAME': path, 'OPTIONS': db_options}
+                    for readers in reader_counts:
+                        reads, read_errors, latencies, write_errors = self._run_sqlite(
+                            processes, readers, writers, duration, read_once, write_once)
+                        p95 = _latency_summary(latencies, duration)[2] if latencies else 0.0
+                        self.stdout.write(f'{label:<26}{readers:>6}{reads / duration:>10.1f}'
+                                          f'{len(latencies) / duration:>10.1f}{p95:>12.1f}{read_errors:>8}{write_errors:>8}')
+        finally:
+            connections.settings['default'] = original
+
+    def _run_sqlite(self, processes, readers, writers, duration, read_once, write_once):
+        """readers 个读线程与 writers 个写线程分布在 processes 个（fork 出的）进程中同时运行 duration 秒；
+        返回 (读次数, 读失败, 写耗时列表, 写失败)"""
+        context = multiprocessing.get_context('fork')
+        start = context.Event()
+        results = context.Queue()
+        # 子进程不得沿用父进程的数据库连接
+        connections.close_all()
+        children = [
+            context.Process(target=self._sqlite_worker, args=(
+                p, len(range(p, readers, processes)), len(range(p, writers, processes)),
+                duration, read_once, write_once, start, results,
+            ))
+            for p in range(processes)
+        ]
+        for child in children:
+            child.start()
+        start.set()
+        collected = [results.get() for _ in children]
+        for child in children:
+            child.join()
+        return (
+            sum(r[0] for r in collected), sum(r[1] for r in collected),
+            [latency for r in collected for latency in r[2]], sum(r[3] for r in collected),
+        )
+
+    @staticmethod
+    def _sqlite_worker(p, readers, writers, duration, read_once, write_once, start, results):
+        """子进程：readers 个读线程与 writers 个写线程运行 duration 秒，结果放入 results"""
+        stop = threading.Event()
+        ready = threading.Barrier(readers + writers + 1)
+        reads, read_errors, latencies, write_errors = [], [], [], []
+
+        def reader(k):
+            done = failed = 0
+            ready.wait()
+            while not stop.is_set():
+                try:
+                    read_once(k * 7919 + done)
+                    done += 1
+                except OperationalError:
+                    failed += 1
+            reads.append(done)
+            read_errors.append(failed)
+            connections.close_all()
+
+        def writer(k):
+            done = failed = 0
+            ready.wait()
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    write_once(k * 7919 + done)
+                    done += 1
+                    latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    failed += 1
+            write_errors.append(failed)
+            connections.close_all()
+
+        workers = [threading.Thread(target=reader, args=(p * 1000 + k,)) for k in range(readers)]
+        workers += [threading.Thread(target=writer, args=(p * 1000 + k,)) for k in range(writers)]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        ready.wait()
+        time.sleep(duration)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        results.put((sum(reads), sum(read_errors), latencies, sum(write_errors)))
+
+    def _run_wsgi(self, path_for, total, concurrency, threads, cookie):
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        slots = threading.Semaphore(threads)
+        counter = itertools.count()
+        latencies, failures = [], []
+
+        def client():
+            while (i := next(counter)) < total:
+                environ = factory.get(path_for(i), SERVER_NAME='localhost', HTTP_COOKIE=cookie).environ
+                statuses = []
+                started = time.perf_counter()
+                with slots:
+                    result = handler(environ, lambda status, headers: statuses.append(status))
+                    b''.join(result)
+                    result.close()
+                latencies.append(time.perf_counter() - started)
+                if not statuses[0].startswith('200'):
+                    failures.append(statuses[0])
+            connections.close_all()
+
+        workers = [threading.Thread(target=client) for _ in range(concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return latencies, len(failures)
+
+    def _run_asgi(self, path_for, total, concurrency, threads, cookie):
+        handler = ASGIHandler()
+        counter = itertools.count()
+        latencies, failures = [], []
+
+        async def request(path):
+            url, _, query = path.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url, 'raw_path': url.encode(), 'query_string': query.encode(),
+                'root_path': '', 'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+                'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            }
+            received = False
+            status = []
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # 客户端不断开：等待到响应结束时被取消
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await handler(scope, receive, send)
+            return status[0]
+
+        async def client():
+            while (i := next(counter)) < total:
+                started = time.perf_counter()
+                status = await request(path_for(i))
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    failures.append(status)
+
+        async def main():
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+
+        asyncio.run(main())
+        return latencies, len(failures)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.common import events
+
+
+class Command(BaseCommand):
+    help = '清理超过保留时长的变更事件（事件流发件箱）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help='保留小时数，默认 EVENT_RETENTION_HOURS')
+
+    def handle(self, *args, **options):
+        deleted = events.prune(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'已清理变更事件：{deleted} 条'))
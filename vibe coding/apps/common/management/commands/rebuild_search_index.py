@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.common import fulltext
+
+
+class Command(BaseCommand):
+    help = '重建点评/回访记录全文检索条目'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=sorted(fulltext.SOURCES),
+            help='只重建指定来源（默认全部）'
+        )
+
+    def handle(self, *args, **options):
+        sources = [options['source']] if options['source'] else sorted(fulltext.SOURCES)
+        for source in sources:
+            self.stdout.write(f'重建 {source} 检索条目...')
+            fulltext.rebuild(source)
+        self.stdout.write(self.style.SUCCESS('全文检索条目重建完成'))
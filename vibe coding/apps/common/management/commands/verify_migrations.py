@@ -0,0 +1,76 @@
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+    help = (
+        '在临时测试库上校验迁移：模型与迁移一致、正向迁移后表齐全、全部回滚后无残留表、再次正向迁移成功。'
+        'SQLite 与 PostgreSQL 均适用（设置 DATABASE_URL 即在 PostgreSQL 上校验，需要建库权限）'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='测试库已存在时直接删除重建')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        self.failures = []
+
+        self.step('模型与迁移一致（makemigrations --check）')
+        try:
+            call_command('makemigrations', check=True, dry_run=True, verbosity=0)
+        except SystemExit:
+            self.fail('存在未生成迁移的模型变更，请执行 makemigrations')
+
+        old_name = connection.settings_dict['NAME']
+        self.step(f'创建测试库并正向迁移（{connection.vendor}）')
+        connection.creation.create_test_db(
+            verbosity=max(verbosity - 1, 0), autoclobber=not options['interactive'], serialize=False,
+        )
+        try:
+            self.check_tables()
+
+            self.step('全部回滚到初始状态')
+            executor = MigrationExecutor(connection)
+            executor.migrate([(label, None) for label in executor.loader.migrated_apps])
+            leftover = sorted(set(connection.introspection.table_names()) - {'django_migrations'})
+            if leftover:
+                self.fail(f'回滚后残留表：{", ".join(leftover)}')
+
+            self.step('再次正向迁移')
+            executor = MigrationExecutor(connection)
+            executor.loader.build_graph()
+            executor.migrate(executor.loader.graph.leaf_nodes())
+            self.check_tables()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=max(verbosity - 1, 0))
+
+        if self.failures:
+            raise CommandError(f'迁移校验失败 {len(self.failures)} 项')
+        self.stdout.write(self.style.SUCCESS(f'迁移校验通过（{connection.vendor}）'))
+
+    def step(self, title):
+        self.stdout.write(f'- {title}')
+
+    def fail(self, message):
+        self.failures.append(message)
+        self.stdout.write(self.style.ERROR(f'  失败：{message}'))
+
+    def check_tables(self):
+        """所有受管模型的表都已创建，且模型字段对应的列都存在"""
+        tables = set(connection.introspection.table_names())
+        with connection.cursor() as cursor:
+            for model in apps.get_models(include_auto_created=True):
+                meta = model._meta
+                if not meta.managed or meta.proxy or meta.swapped:
+                    continue
+                if meta.db_table not in tables:
+                    self.fail(f'缺少表 {meta.db_table}（{meta.label}）')
+                    continue
+                columns = {c.name for c in connection.introspection.get_table_description(cursor, meta.db_table)}
+                missing = [f.column for f in meta.local_concrete_fields if f.column not in columns]
+                if missing:
+                    self.fail(f'表 {meta.db_table} 缺少列：{", ".join(missing)}')
@@ -0,0 +1,22 @@
+"""进程内计数指标（线程安全），供基准命令与排查使用"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot(prefix=''):
+    """当前计数的副本，可按名称前缀过滤"""
+    with _lock:
+        return {k: v for k, v in sorted(_counters.items()) if k.startswith(prefix)}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,49 @@
+"""JSON 响应压缩
+
+列表/详情接口的 JSON 正文压缩率很高（重复的键名与中文备注）。超过 COMPRESS_MIN_SIZE
+字节的 JSON 响应按客户端 Accept-Encoding 压缩：支持 br 且安装了 brotli 时用 brotli，
+否则用 gzip（沿用 Django GZipMiddleware 的实现，含随机填充）。流式响应（如事件流）、
+已编码的响应与非 JSON 响应原样返回。强 ETag 按 RFC 9110 改为弱 ETag，条件请求照常匹配。
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只用 gzip
+    brotli = None
+
+MIN_SIZE = getattr(settings, 'COMPRESS_MIN_SIZE', 1024)
+BROTLI_QUALITY = getattr(settings, 'COMPRESS_BROTLI_QUALITY', 5)
+
+re_accepts_br = _lazy_re_compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """JSON 响应超过阈值时按 br / gzip 压缩"""
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return response
+        if len(response.content) < MIN_SIZE:
+            return response
+
+        ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or not re_accepts_br.search(ae):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,106 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:49
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+from apps.common.fulltext import FTS_TABLE, tokenize
+
+SQLITE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"tokens, content='search_entries', content_rowid='id', tokenize='unicode61')",
+    f"CREATE TRIGGER search_entries_ai AFTER INSERT ON search_entries BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, tokens) VALUES (new.id, new.tokens); END",
+    f"CREATE TRIGGER search_entries_ad AFTER DELETE ON search_entries BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, tokens) VALUES ('delete', old.id, old.tokens); END",
+    f"CREATE TRIGGER search_entries_au AFTER UPDATE ON search_entries BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, tokens) VALUES ('delete', old.id, old.tokens); "
+    f"INSERT INTO {FTS_TABLE}(rowid, tokens) VALUES (new.id, new.tokens); END",
+]
+
+SQLITE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS search_entries_au",
+    "DROP TRIGGER IF EXISTS search_entries_ad",
+    "DROP TRIGGER IF EXISTS search_entries_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INDEX_SQL = (
+    "CREATE INDEX search_entries_tokens_gin ON search_entries "
+    "USING GIN (to_tsvector('simple', tokens))"
+)
+
+
+def create_fulltext_index(apps, schema_editor):
+    """按数据库后端创建全文索引；SQLite 未编译 FTS5 时跳过（查询回退 LIKE）"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            for sql in SQLITE_FTS_SQL:
+                schema_editor.execute(sql)
+        except OperationalError:
+            for sql in SQLITE_FTS_DROP_SQL:
+                schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_INDEX_SQL)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_FTS_DROP_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS search_entries_tokens_gin")
+
+
+def backfill_entries(apps, schema_editor):
+    """为已有点评与回访记录生成检索条目"""
+    SearchEntry = apps.get_model('common', 'SearchEntry')
+    sources = [
+        ('feedback', apps.get_model('teaching', 'Feedback'), ('teacher_comment', 'push_research', 'push_ops')),
+        ('visit', apps.get_model('operations', 'VisitRecord'), ('visit_note',)),
+    ]
+    for source, model, fields in sources:
+        batch = []
+        for obj in model.objects.only('pk', *fields).iterator(chunk_size=2000):
+            tokens = ' '.join(tokenize(' '.join(getattr(obj, f) or '' for f in fields)))
+            if tokens:
+                batch.append(SearchEntry(source=source, object_id=obj.pk, tokens=tokens))
+            if len(batch) >= 2000:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('teaching', '0002_feedback_student_name_initials_and_more'),
+        ('operations', '0002_opstask_student_name_initials_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('feedback', '教学反馈'), ('visit', '回访记录')], max_length=20, verbose_name='来源')),
+                ('object_id', models.BigIntegerField(verbose_name='对象ID')),
+                ('tokens', models.TextField(verbose_name='检索词')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '全文检索条目',
+                'verbose_name_plural': '全文检索条目',
+                'db_table': 'search_entries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('source', 'object_id'), name='search_entries_source_object_uniq'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_entries, migrations.RunPython.noop),
+    ]
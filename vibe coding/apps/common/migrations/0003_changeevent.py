@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_searchentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=50, verbose_name='频道')),
+                ('kind', models.CharField(max_length=50, verbose_name='事件类型')),
+                ('payload', models.JSONField(default=list, verbose_name='变更内容')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '变更事件',
+                'verbose_name_plural': '变更事件',
+                'db_table': 'change_events',
+                'indexes': [models.Index(fields=['channel', 'id'], name='change_even_channel_993937_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .pinyin import to_initials, to_pinyin
+
 # 移除 Announcement 模型，公告内容通过视图逻辑从学员数据中提取
 
 class SystemConfig(models.Model):
@@ -17,4 +19,82 @@ class SystemConfig(models.Model):
         db_table = 'system_config'
     
     def __str__(self):
-        return f"{self.key}: {self.value[:50]}"
\ No newline at end of file
+        return f"{self.key}: {self.value[:50]}"
+
+
+class StudentNamePinyinMixin(models.Model):
+    """学员昵称拼音列（Student 以及冗余 student_name 的 Feedback/OpsTask/VisitRecord 共用）"""
+    student_name_pinyin = models.CharField(max_length=255, blank=True, db_index=True, verbose_name='学员昵称拼音')
+    student_name_initials = models.CharField(max_length=100, blank=True, db_index=True, verbose_name='学员昵称首字母')
+
+    class Meta:
+        abstract = True
+
+    def sync_name_pinyin(self):
+        """按当前 student_name 重新计算拼音列（bulk_create/bulk_update 前需手动调用）"""
+        self.student_name_pinyin = to_pinyin(self.student_name)
+        self.student_name_initials = to_initials(self.student_name)
+
+    def save(self, *args, **kwargs):
+        """保存时同步拼音列"""
+        self.sync_name_pinyin()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'student_name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'student_name_pinyin', 'student_name_initials'}
+        super().save(*args, **kwargs)
+
+
+class CounterFieldsMixin(models.Model):
+    """计数列保护：计数列只允许用 F() 原子自增维护，常规 save() 不回写其（可能过期的）内存值"""
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # 与 Django 默认行为一致：延迟加载（only/defer）的字段不写回
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class SearchEntry(models.Model):
+    """全文检索条目（点评/回访记录），tokens 为预先切分的 bigram 文本，见 apps.common.fulltext"""
+    SOURCE_CHOICES = [
+        ('feedback', '教学反馈'),
+        ('visit', '回访记录'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, verbose_name='来源')
+    object_id = models.BigIntegerField(verbose_name='对象ID')
+    tokens = models.TextField(verbose_name='检索词')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '全文检索条目'
+        verbose_name_plural = '全文检索条目'
+        db_table = 'search_entries'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'object_id'], name='search_entries_source_object_uniq'),
+        ]
+
+
+class ChangeEvent(models.Model):
+    """变更事件（事件流推送用的发件箱），见 apps.common.events"""
+    channel = models.CharField(max_length=50, verbose_name='频道')
+    kind = models.CharField(max_length=50, verbose_name='事件类型')
+    payload = models.JSONField(default=list, verbose_name='变更内容')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '变更事件'
+        verbose_name_plural = '变更事件'
+        db_table = 'change_events'
+        indexes = [
+            # 事件流按频道 + 自增 id 轮询
+            models.Index(fields=['channel', 'id']),
+        ]
@@ -0,0 +1,196 @@
+"""游标（keyset）分页
+
+Paginator 翻页依赖 OFFSET 并且每页都要 COUNT(*)，页数越深、表越大越慢。游标分页以
+「排序键 + id」作为位置：下一页只取排在上一页最后一行之后的 page_size + 1 行，
+配合 (排序键, id) 复合索引，每页代价恒定，也不需要 COUNT。
+
+- 游标为不透明字符串（排序签名 + 最后一行的排序键取值，base64url 编码），
+  排序方式变化后旧游标作废
+- 排序键须为非空列（或注解），末尾自动追加与最后一个排序键同方向的 id 作为决胜键
+- 只支持向后翻页：has_previous 仅表示当前不在第一页
+- 接口按需启用：请求带 cursor 参数（第一页传空串）即切换为游标分页，见 cursor_requested
+
+页码分页的总数走计数服务（CountedPaginator）；异步视图用 acounted_page，总数与当前页并发查询。
+"""
+import asyncio
+import base64
+import binascii
+import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from . import jsoncodec
+from .aio import alist
+
+
+class CursorError(ValueError):
+    """游标无法解析或与当前排序不匹配"""
+
+
+def cursor_requested(request):
+    """请求是否启用游标分页（带 cursor 参数，第一页为空串）"""
+    return 'cursor' in request.GET
+
+
+def _normalize(ordering):
+    """('-created_at',) -> [('created_at', True), ('id', True)]"""
+    keys = []
+    for item in ordering:
+        keys.append((item.lstrip('-'), item.startswith('-')))
+    if not keys or keys[-1][0] not in ('id', 'pk'):
+        keys.append(('id', keys[-1][1] if keys else False))
+    return keys
+
+
+def _signature(keys):
+    return ','.join(('-' if desc else '') + name for name, desc in keys)
+
+
+def _cursor_default(obj):
+    # DjangoJSONEncoder 会把时间截断到毫秒，游标需保留完整精度
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    return jsoncodec.django_default(obj)
+
+
+def encode_cursor(keys, obj):
+    values = [getattr(obj, name) for name, _ in keys]
+    raw = jsoncodec.dumps_bytes([_signature(keys), values], default=_cursor_default)
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(keys, model, token):
+    """解析游标，按字段类型还原取值（注解字段原样返回）"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        signature, values = jsoncodec.loads(raw)
+    except (binascii.Error, TypeError, ValueError, *jsoncodec.DECODE_ERRORS):
+        raise CursorError('无效的分页游标')
+    if signature != _signature(keys) or not isinstance(values, list) or len(values) != len(keys):
+        raise CursorError('分页游标与当前排序不匹配')
+
+    restored = []
+    for (name, _), value in zip(keys, values):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            restored.append(value)
+            continue
+        try:
+            restored.append(field.to_python(value))
+        except ValidationError:
+            raise CursorError('无效的分页游标')
+    return restored
+
+
+def _after(keys, values):
+    """排在游标位置之后的行：a >= x AND ((a > x) OR (a = x AND b > y) OR ...)（降序取 <= / <）
+
+    首个排序键上冗余的 a >= x 条件可直接用作索引范围扫描；只有 OR 展开时 SQLite 的查询计划
+    拿不到 a 的范围，会从索引头部扫描到游标位置。
+    """
+    condition = Q()
+    for i, (name, desc) in enumerate(keys):
+        term = Q(**{prev: value for (prev, _), value in zip(keys[:i], values[:i])})
+        term &= Q(**{f'{name}__{"lt" if desc else "gt"}': values[i]})
+        condition |= term
+    first, desc = keys[0]
+    return Q(**{f'{first}__{"lte" if desc else "gte"}': values[0]}) & condition
+
+
+class CursorPage:
+    """一页游标分页结果（可迭代，接口与 Paginator 的 Page 相近）"""
+
+    def __init__(self, object_list, next_cursor, has_previous):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self._has_previous
+
+    def as_dict(self, page_size):
+        return {
+            'has_next': self.has_next(),
+            'has_previous': self.has_previous(),
+            'next_cursor': self.next_cursor,
+            'page_size': page_size,
+        }
+
+
+def paginate_by_cursor(queryset, ordering, cursor, page_size):
+    """按 ordering（外加 id 决胜键）取 cursor 之后的一页；cursor 为空取第一页"""
+    keys = _normalize(ordering)
+    queryset = queryset.order_by(*(('-' if desc else '') + name for name, desc in keys))
+    if cursor:
+        queryset = queryset.filter(_after(keys, decode_cursor(keys, queryset.model, cursor)))
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(keys, rows[-1])
+    return CursorPage(rows, next_cursor, has_previous=bool(cursor))
+
+
+class CountedPaginator(Paginator):
+    """页码分页，总数取自计数服务（可能为缓存值或估算值，见 apps.common.counting）"""
+
+    def __init__(self, object_list, per_page, total, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        return self.total.value
+
+    def as_dict(self, page_obj):
+        return {
+            'current_page': page_obj.number,
+            'total_pages': self.num_pages,
+            'total_count': self.count,
+            'total_approximate': self.total.approximate,
+            'has_next': page_obj.has_next(),
+            'has_previous': page_obj.has_previous(),
+        }
+
+
+async def acounted_page(queryset, per_page, number, total):
+    """CountedPaginator.get_page 的异步版本：total（返回 Total 的协程）与当前页并发查询
+
+    页码处理与 get_page 一致：非整数取第 1 页，超出范围取最后一页（此时再查一次该页）。
+    返回 (paginator, page)，page 的行已求值。
+    """
+    try:
+        requested = int(number) if number is not None else 1
+    except (TypeError, ValueError):
+        requested = 1
+    start = max(requested, 1)
+
+    def rows(page):
+        bottom = (page - 1) * per_page
+        return alist(queryset[bottom:bottom + per_page])
+
+    total, object_list = await asyncio.gather(total, rows(start))
+    paginator = CountedPaginator(queryset, per_page, total)
+    try:
+        valid = paginator.validate_number(requested)
+    except PageNotAnInteger:
+        valid = 1
+    except EmptyPage:
+        valid = paginator.num_pages
+    if valid != start:
+        object_list = await rows(valid)
+    return paginator, paginator._get_page(object_list, valid, paginator)
@@ -0,0 +1,70 @@
+"""中文昵称拼音工具
+
+为学员昵称预先计算全拼（xiaoming）与首字母（xm），落库并建索引，
+检索时按前缀范围查询（可走 B-tree 索引），排序时按拼音列排序。
+未安装 pypinyin 时退化为原文小写，功能可用但不支持拼音匹配。
+"""
+from django.db.models import Q
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pragma: no cover - 可选依赖
+    Style = lazy_pinyin = None
+
+PINYIN_MAX_LENGTH = 255
+INITIALS_MAX_LENGTH = 100
+
+# 前缀范围查询的上界：'{' 在 ASCII 中紧随 'z'
+_PREFIX_UPPER = '{'
+
+
+def _clean(parts):
+    return ''.join(ch for ch in ''.join(parts).lower() if ch.isalnum())
+
+
+def to_pinyin(text):
+    """全拼（无分隔、小写），例如 小明 -> xiaoming"""
+    if not text:
+        return ''
+    if lazy_pinyin is None:
+        return _clean([text])[:PINYIN_MAX_LENGTH]
+    return _clean(lazy_pinyin(text, errors='default'))[:PINYIN_MAX_LENGTH]
+
+
+def to_initials(text):
+    """拼音首字母（小写），例如 小明 -> xm"""
+    if not text:
+        return ''
+    if lazy_pinyin is None:
+        return _clean([text])[:INITIALS_MAX_LENGTH]
+    return _clean(lazy_pinyin(text, style=Style.FIRST_LETTER, errors='default'))[:INITIALS_MAX_LENGTH]
+
+
+def pinyin_q(query, prefix=''):
+    """构造学员昵称拼音/首字母前缀匹配条件；查询不是纯字母时返回 None
+
+    prefix 用于跨关联查询，例如 prefix='student__'。
+    """
+    key = (query or '').strip().lower()
+    if not key or not key.isascii() or not key.isalpha():
+        return None
+    upper = key + _PREFIX_UPPER
+    return (
+        Q(**{f'{prefix}student_name_pinyin__gte': key, f'{prefix}student_name_pinyin__lt': upper})
+        | Q(**{f'{prefix}student_name_initials__gte': key, f'{prefix}student_name_initials__lt': upper})
+    )
+
+
+def backfill_name_pinyin(model, batch_size=2000):
+    """数据迁移用：分批回填 student_name 的拼音列（model 可为迁移中的历史模型）"""
+    fields = ['student_name_pinyin', 'student_name_initials']
+    batch = []
+    for obj in model.objects.only('pk', 'student_name').iterator(chunk_size=batch_size):
+        obj.student_name_pinyin = to_pinyin(obj.student_name)
+        obj.student_name_initials = to_initials(obj.student_name)
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, fields)
@@ -0,0 +1,58 @@
+"""接口字段投影（fields= 参数）
+
+列表/详情接口默认返回全部字段，其中不少是长文本备注。请求带 fields=a,b,c 时只返回这些
+字段，并且只从数据库加载它们依赖的列（.only()）与关联（prefetch），未请求的列不会读取。
+
+每个接口声明一份「输出字段 -> OutputField」表::
+
+    STUDENT_FIELDS = {
+        'student_name': OutputField(lambda s: s.student_name, columns=('student_name',)),
+        'groups': OutputField(lambda s: s.groups, prefetch=('group_memberships',)),
+    }
+
+- parse_fields：解析 fields 参数，未带参数时返回 default（默认全部字段），未知字段抛 FieldsError
+- load：按所选字段给查询加上 only()/prefetch_related()
+- render：按所选字段输出一行
+"""
+from dataclasses import dataclass
+
+
+class FieldsError(ValueError):
+    """fields 参数包含未知字段"""
+
+
+@dataclass(frozen=True)
+class OutputField:
+    getter: object
+    columns: tuple = ()
+    prefetch: tuple = ()
+
+
+def parse_fields(request, available, default=None):
+    """fields=a,b,c -> ('a', 'b', 'c')；保持 available 中的顺序"""
+    raw = request.GET.get('fields', '').strip()
+    if not raw:
+        return tuple(default) if default is not None else tuple(available)
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = requested.difference(available)
+    if unknown:
+        raise FieldsError(f"未知字段：{', '.join(sorted(unknown))}")
+    return tuple(name for name in available if name in requested)
+
+
+def load(queryset, available, names, always=('id',)):
+    """只加载所选字段依赖的列与关联"""
+    columns = set(always)
+    prefetch = []
+    for name in names:
+        field = available[name]
+        columns.update(field.columns)
+        prefetch.extend(p for p in field.prefetch if p not in prefetch)
+    queryset = queryset.only(*sorted(columns))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def render(obj, available, names):
+    return {name: available[name].getter(obj) for name in names}
@@ -0,0 +1,48 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+
+from . import counting, tags
+
+# 写入会影响列表总数的模型（批量写入处需手动调用 counting.touch）
+COUNTED_MODELS = (
+    'students.Student',
+    'teaching.Feedback',
+    'research.TeachingTask',
+    'operations.OpsTask',
+    'operations.VisitRecord',
+)
+
+# 写入会影响接口缓存实体标签的模型：模型 -> 由实例取 (学员主键, 教师主键)
+# （批量写入处需手动调用 tags.invalidate）
+TAGGED_MODELS = {
+    'students.Student': lambda obj: (obj.pk, None),
+    'students.StudentGroup': lambda obj: (obj.student_id, None),
+    'teaching.Feedback': lambda obj: (obj.student_id, None),
+    'operations.VisitRecord': lambda obj: (obj.student_id, None),
+    'research.TeachingTask': lambda obj: (None, obj.teacher_id),
+}
+
+
+def touch_counts(sender, **kwargs):
+    """保存/删除后使依赖该模型的总数缓存失效"""
+    counting.touch(sender)
+
+
+def invalidate_tags(sender, instance, **kwargs):
+    """保存/删除后使涉及该学员/教师的接口缓存失效"""
+    student_id, teacher_id = TAGGED_MODELS[sender._meta.label](instance)
+    tags.invalidate(
+        tags.student_tag(student_id) if student_id else None,
+        tags.teacher_tag(teacher_id) if teacher_id else None,
+    )
+
+
+for label in COUNTED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(touch_counts, sender=model, dispatch_uid=f'counting:{label}:save')
+    post_delete.connect(touch_counts, sender=model, dispatch_uid=f'counting:{label}:delete')
+
+for label in TAGGED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(invalidate_tags, sender=model, dispatch_uid=f'tags:{label}:save')
+    post_delete.connect(invalidate_tags, sender=model, dispatch_uid=f'tags:{label}:delete')
@@ -0,0 +1,80 @@
+"""缓存标签版本
+
+每个标签在缓存中有一个版本号（idgen 生成的唯一值）。依赖某些标签的缓存把这些标签的
+当前版本拼进缓存键；标签失效只需换一个新版本，旧缓存键不再被读到、随超时自然淘汰，
+不必枚举删除。
+
+版本须对所有工作进程可见，多进程部署使用共享缓存后端（Redis / 文件缓存，见 settings.CACHES）。
+进程内本地内存缓存（单进程运行）下版本按 VERSION_TIMEOUT 过期换新，即使配置错误用于多进程，
+其他进程的陈旧缓存也最多保留该时长。
+
+标签约定：
+- model:<app_label.model>  某模型的任意写入（信号见 common/signals.py，批量写入处经 counting.touch）
+- student:<pk>             某学员本身及其点评、回访、分组变更
+- teacher:<pk>             某教师的教学任务变更
+- student:* / teacher:*    代际标签：依赖任一 student:<pk>（teacher:<pk>）的缓存同时依赖它，
+                           整表批量写入只需失效代际标签，不必逐个失效实体标签
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import idgen
+
+VERSION_TIMEOUT = getattr(settings, 'CACHE_TAG_VERSION_TIMEOUT', None)
+
+
+def model_tag(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def student_tag(pk):
+    return f'student:{pk}'
+
+
+def teacher_tag(pk):
+    return f'teacher:{pk}'
+
+
+ALL_STUDENTS = student_tag('*')
+ALL_TEACHERS = teacher_tag('*')
+
+_GENERATIONS = {'student': ALL_STUDENTS, 'teacher': ALL_TEACHERS}
+
+
+def _with_generations(tags):
+    """实体标签所属的代际标签追加在末尾（去重）"""
+    extra = []
+    for tag in tags:
+        generation = _GENERATIONS.get(tag.partition(':')[0])
+        if generation and generation != tag and generation not in extra:
+            extra.append(generation)
+    return list(tags) + extra
+
+
+def _version_key(tag):
+    return f'tag_ver:{tag}'
+
+
+def versions(tags):
+    """各标签的当前版本（与 tags 顺序一致；含实体标签时末尾另有其代际标签的版本）"""
+    keys = [_version_key(tag) for tag in _with_generations(tags)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # 版本丢失（过期/驱逐）时取新值，保证不会误用旧缓存
+            cache.add(key, idgen.next_id(), VERSION_TIMEOUT)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def invalidate(*tags):
+    """事务提交后更新标签版本，使依赖这些标签的缓存失效"""
+    keys = [_version_key(tag) for tag in tags if tag]
+    if not keys:
+        return
+
+    def bump():
+        cache.set_many({key: idgen.next_id() for key in keys}, VERSION_TIMEOUT)
+
+    transaction.on_commit(bump)
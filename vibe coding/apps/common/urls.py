@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'common'
+
+urlpatterns = [
+    path('metrics/', views.cache_metrics, name='cache_metrics'),
+    path('events/', views.event_stream, name='event_stream'),
+]
@@ -0,0 +1,170 @@
+"""读多写少的 JSON 接口响应缓存与条件请求（ETag / Last-Modified）
+
+用法（放在 login_required / role_required 之后，权限校验仍每次执行）::
+
+    @cached_view('teaching.search_students', tags=[Student])
+    def search_students(request): ...
+
+    @cached_view('operations.student_detail', tags=lambda request, student_id: [tags.student_tag(student_id)])
+    def get_student_detail(request, student_id): ...
+
+- 缓存键：接口名 + 用户角色（角色位掩码、是否超级用户；per_user=True 时再加用户）
+  + 查询参数与 URL 参数签名 + 各标签当前版本（daily=True 时再加本地日期）
+- tags 为标签字符串/模型类的列表，或按请求计算的可调用对象；模型类即 model:<label> 标签
+- 失效：标签版本在信号（common/signals.py）与批量写入处更新（见 apps.common.tags），
+  旧键不再命中，无需逐个删除
+- 只缓存 GET 且状态码 200、success 不为 False 的响应
+- 条件请求：ETag 由缓存键（含标签版本）摘要得到，Last-Modified 取各标签版本中的生成时间
+  （版本号为 idgen ID，见 idgen.id_timestamp）；请求带 If-None-Match / If-Modified-Since
+  且数据未变时直接返回 304，不执行视图、不读缓存正文。响应带 Cache-Control: private, no-cache，
+  浏览器每次都会校验
+- conditional_view：只做条件请求、不缓存正文，用于分页列表等缓存命中率低的接口
+- 命中/未命中/304 按接口计入 metrics（viewcache.<name>.hit / .miss / .not_modified），见 /common/metrics/
+- 缓存后端由 settings.CACHES 决定：默认文件缓存（本机多进程共享），配置 REDIS_URL 时使用 Redis
+- 同样可装饰异步视图（见 apps.common.aio）：标签解析、版本与缓存读写合并为一次线程切换，
+  与同步版本共用缓存键，两种部署下缓存互通
+"""
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import idgen, jsoncodec, metrics, tags as tagging
+
+CACHE_TIMEOUT = getattr(settings, 'VIEW_CACHE_TIMEOUT', 300)
+
+
+def _resolve_tags(tags, request, args, kwargs):
+    if callable(tags):
+        tags = tags(request, *args, **kwargs)
+    return [tag if isinstance(tag, str) else tagging.model_tag(tag) for tag in tags]
+
+
+def _cache_key(name, request, args, kwargs, versions, per_user, daily):
+    user = request.user
+    parts = [f'r{user.role_mask}', 's' if user.is_superuser else '']
+    if per_user:
+        parts.append(f'u{user.pk}')
+    if daily:
+        parts.append(f'{timezone.localdate():%Y%m%d}')
+    params = sorted((k, tuple(v)) for k, v in request.GET.lists())
+    # 标签版本一并摘要（批量接口标签较多，键长保持固定）
+    digest = hashlib.sha1(repr((params, args, sorted(kwargs.items()), versions)).encode()).hexdigest()
+    return f'view:{name}:{"".join(parts)}:{digest}'
+
+
+def _validators(key, versions, daily):
+    """(ETag, Last-Modified 时间戳)；没有标签时不提供 Last-Modified"""
+    etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()[:32]
+    if not versions:
+        return etag, None
+    stamps = [idgen.id_timestamp(v) for v in versions]
+    if daily:
+        # 按日变化的接口：跨天后即使标签未变也视为已修改
+        stamps.append(timezone.make_aware(datetime.combine(timezone.localdate(), time.min)).timestamp())
+    return etag, int(max(stamps))
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def _cacheable(response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    try:
+        data = jsoncodec.loads(response.content)
+    except (TypeError, ValueError, *jsoncodec.DECODE_ERRORS):
+        return False
+    return not (isinstance(data, dict) and data.get('success') is False)
+
+
+def cached_view(name, tags=(), per_user=False, daily=False, timeout=None, store=True):
+    """接口响应缓存装饰器，参数见模块说明；store=False 时只做条件请求"""
+    timeout = CACHE_TIMEOUT if timeout is None else timeout
+
+    def lookup(request, args, kwargs):
+        """执行视图前：返回 (key, etag, last_modified, response)，response 为 304 或缓存命中时直接返回"""
+        # 标签版本在执行视图之前读取：视图执行期间的写入会换新版本，本次结果不会被后续读到
+        versions = tagging.versions(_resolve_tags(tags, request, args, kwargs))
+        key = _cache_key(name, request, args, kwargs, versions, per_user, daily)
+        etag, last_modified = _validators(key, versions, daily)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            metrics.incr(f'viewcache.{name}.not_modified')
+            _set_validators(response, etag, last_modified)
+            return key, etag, last_modified, response
+
+        entry = cache.get(key) if store else None
+        if entry is not None:
+            metrics.incr(f'viewcache.{name}.hit')
+            content_type, content = entry
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            _set_validators(response, etag, last_modified)
+            return key, etag, last_modified, response
+
+        metrics.incr(f'viewcache.{name}.miss')
+        return key, etag, last_modified, None
+
+    def finish(response, key, etag, last_modified):
+        """执行视图后：可缓存的响应写入缓存并加上校验头"""
+        if not _cacheable(response):
+            return response
+        if store:
+            cache.set(key, (response['Content-Type'], response.content), timeout)
+            response['X-Cache'] = 'MISS'
+        _set_validators(response, etag, last_modified)
+        return response
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _async_wrapped_view(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view_func(request, *args, **kwargs)
+                key, etag, last_modified, response = await sync_to_async(lookup)(request, args, kwargs)
+                if response is not None:
+                    return response
+                response = await view_func(request, *args, **kwargs)
+                return await sync_to_async(finish)(response, key, etag, last_modified)
+            return _async_wrapped_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            key, etag, last_modified, response = lookup(request, args, kwargs)
+            if response is not None:
+                return response
+            return finish(view_func(request, *args, **kwargs), key, etag, last_modified)
+        return _wrapped_view
+    return decorator
+
+
+def conditional_view(name, tags=(), per_user=False, daily=False):
+    """只做条件请求（ETag / Last-Modified / 304），不缓存响应正文"""
+    return cached_view(name, tags=tags, per_user=per_user, daily=daily, store=False)
+
+
+def stats():
+    """各接口的命中/未命中/304 次数与命中率（当前进程；304 计为命中）"""
+    views = {}
+    for counter, value in metrics.snapshot('viewcache.').items():
+        name, outcome = counter[len('viewcache.'):].rsplit('.', 1)
+        views.setdefault(name, {'hit': 0, 'miss': 0, 'not_modified': 0})[outcome] = value
+    for row in views.values():
+        total = row['hit'] + row['miss'] + row['not_modified']
+        row['hit_rate'] = round((row['hit'] + row['not_modified']) / total, 4) if total else 0.0
+    return views
@@ -0,0 +1,41 @@
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+
+from apps.common import events, metrics, viewcache
+from apps.common.decorators import role_required
+from apps.common.http import JsonResponse
+
+
+@login_required
+@role_required(['管理员'])
+@require_http_methods(["GET"])
+def cache_metrics(request):
+    """接口缓存命中/未命中与列表总数来源统计（当前进程，多进程部署时各进程分别统计）"""
+    return JsonResponse({
+        'success': True,
+        'views': viewcache.stats(),
+        'counts': metrics.snapshot('count.'),
+    })
+
+
+@require_http_methods(["GET"])
+async def event_stream(request):
+    """当前用户的变更事件流（text/event-stream），见 apps.common.events"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': '请先登录'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        # WSGI 下长连接会占住工作线程，客户端收到非 200 后不再重连，继续按原方式刷新
+        return JsonResponse({'error': '事件流需在 ASGI 下运行'}, status=501)
+
+    channels = events.channels_for(user)
+    last_id = request.headers.get('Last-Event-ID', '')
+    after = int(last_id) if last_id.isdigit() else await events.alatest_id(channels)
+
+    response = StreamingHttpResponse(events.stream(channels, after), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # 关闭反向代理（nginx）缓冲，事件即时送达
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class OperationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.operations'
-    verbose_name = '运营管理'
\ No newline at end of file
+    verbose_name = '运营管理'
+
+    def ready(self):
+        # 注册信号：保持全文检索条目与数据同步
+        from . import signals  # noqa: F401
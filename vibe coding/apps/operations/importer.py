@@ -0,0 +1,246 @@
+"""学员批量导入（流式、分块 upsert）
+
+课程平台导出的学员表可达十万行。这里不再整表读入 pandas 逐行 get_or_create，而是：
+
+- XLSX 用 openpyxl 只读模式逐行读取；CSV 按 UTF-8（含 BOM）/ GB18030(GBK) 自动识别编码流式解码
+- 每 CHUNK_SIZE 行为一块：整块清洗校验、一次查出已存在的 external_user_id，
+  新增 bulk_create、昵称变更 bulk_update，每块一个事务
+- 只保留前 MAX_ERROR_LOGS 条错误明细，其余只计数（可通过 on_error 回调另行落盘）
+"""
+import codecs
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common import counting, db, jsoncodec, tags
+from apps.students.models import Student, StudentGroup
+from apps.teaching import dashboard
+
+REQUIRED_COLUMNS = ('用户ID', '昵称')
+
+# 新导入学员的默认分组
+DEFAULT_GROUPS = ['基础班']
+
+CHUNK_SIZE = 1000
+
+MAX_ERROR_LOGS = 200
+
+
+class ImportFileError(Exception):
+    """文件无法读取或缺少必要列"""
+
+
+@dataclass
+class ImportResult:
+    success_count: int = 0
+    update_count: int = 0
+    error_count: int = 0
+    processed: int = 0
+    error_logs: list = field(default_factory=list)
+
+    def add_error(self, line_no, message, on_error=None):
+        self.error_count += 1
+        text = f'第{line_no}行: {message}'
+        if len(self.error_logs) < MAX_ERROR_LOGS:
+            self.error_logs.append(text)
+        if on_error:
+            on_error(text)
+
+    def as_dict(self):
+        logs = list(self.error_logs)
+        omitted = self.error_count - len(logs)
+        if omitted > 0:
+            logs.append(f'其余 {omitted} 条错误已省略')
+        return {
+            'success_count': self.success_count,
+            'update_count': self.update_count,
+            'error_count': self.error_count,
+            'error_logs': logs,
+        }
+
+
+# ---------- 读取 ----------
+
+def _detect_encoding(binary):
+    """按文件开头的样本判断 UTF-8 / GB18030（兼容 GBK）"""
+    size = 64 * 1024
+    sample = binary.read(size)
+    binary.seek(0)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if len(sample) == size:
+        # 样本末尾可能截断多字节字符，去掉最后几个字节再判断
+        sample = sample[:-3]
+    try:
+        sample.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'gb18030'
+
+
+def _iter_csv(binary):
+    text = io.TextIOWrapper(binary, encoding=_detect_encoding(binary), newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(binary):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(binary, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(binary, filename):
+    """逐行产出 (行号, {列名: 值})，行号与表格中看到的一致（表头为第 1 行）"""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        reader = _iter_csv(binary)
+    elif name.endswith('.xlsx'):
+        reader = _iter_xlsx(binary)
+    else:
+        raise ImportFileError('请上传 XLSX 或 CSV 格式的文件')
+
+    try:
+        header = next(reader, None)
+    except Exception as e:
+        raise ImportFileError(f'文件读取失败: {e}')
+    if header is None:
+        raise ImportFileError('文件为空')
+    columns = [str(c).strip() if c is not None else '' for c in header]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ImportFileError(f'文件缺少必要列: {", ".join(missing)}')
+    positions = {c: columns.index(c) for c in REQUIRED_COLUMNS}
+
+    for line_no, row in enumerate(reader, start=2):
+        yield line_no, {
+            c: (row[i] if i < len(row) else None) for c, i in positions.items()
+        }
+
+
+# ---------- 写入 ----------
+
+def _clean(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Excel 中的纯数字 ID 会读成浮点数
+        value = int(value)
+    value = str(value).strip()
+    return '' if value.lower() == 'nan' else value
+
+
+class StudentImporter:
+    """分块导入：on_progress(已处理行数) / on_error(错误文本) 为可选回调"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE, on_progress=None, on_error=None):
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.result = ImportResult()
+
+    def run(self, rows):
+        chunk = []
+        for item in rows:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                self._apply_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._apply_chunk(chunk)
+        return self.result
+
+    def _validate(self, chunk):
+        """整块清洗校验；块内重复的用户ID以最后一行为准"""
+        result = self.result
+        ids = [_clean(row['用户ID']) for _, row in chunk]
+        names = [_clean(row['昵称']) for _, row in chunk]
+        valid = {}
+        for (line_no, _), external_user_id, student_name in zip(chunk, ids, names):
+            if not external_user_id:
+                result.add_error(line_no, '用户ID为空', self.on_error)
+            elif not student_name:
+                result.add_error(line_no, '昵称为空', self.on_error)
+            elif len(external_user_id) > 100 or len(student_name) > 100:
+                result.add_error(line_no, '用户ID或昵称超长', self.on_error)
+            else:
+                valid[external_user_id] = (line_no, student_name)
+        return valid
+
+    def _apply_chunk(self, chunk):
+        result = self.result
+        valid = self._validate(chunk)
+        if valid:
+            existing = {
+                s.external_user_id: s
+                for s in Student.objects.filter(external_user_id__in=list(valid))
+                .only('pk', 'external_user_id', 'student_name')
+            }
+            # 新学员以平台用户ID作为学员ID，先排除已被其他学员占用的
+            new_ids = [i for i in valid if i not in existing]
+            taken = set(
+                Student.objects.filter(student_id__in=new_ids).values_list('student_id', flat=True)
+            ) if new_ids else set()
+
+            now = timezone.now()
+            default_groups_json = jsoncodec.dumps(DEFAULT_GROUPS)
+            to_create, to_update = [], []
+            for external_user_id, (line_no, student_name) in valid.items():
+                student = existing.get(external_user_id)
+                if student is None:
+                    if external_user_id in taken:
+                        result.add_error(line_no, f'学员ID {external_user_id} 已被占用', self.on_error)
+                        continue
+                    student = Student(
+                        student_id=external_user_id,
+                        external_user_id=external_user_id,
+                        student_name=student_name,
+                        groups_json=default_groups_json,
+                    )
+                    to_create.append(student)
+                elif student.student_name != student_name:
+                    student.student_name = student_name
+                    student.updated_at = now
+                    to_update.append(student)
+                else:
+                    continue
+                student.sync_name_pinyin()
+
+            with db.write_transaction():
+                if to_create or to_update:
+                    counting.touch(Student)
+                if to_create:
+                    Student.objects.bulk_create(to_create, batch_size=500)
+                    StudentGroup.objects.bulk_create(
+                        [
+                            StudentGroup(student=s, group=group, position=i)
+                            for s in to_create
+                            for i, group in enumerate(DEFAULT_GROUPS)
+                        ],
+                        batch_size=1000,
+                    )
+                if to_update:
+                    Student.objects.bulk_update(
+                        to_update,
+                        ['student_name', 'student_name_pinyin', 'student_name_initials', 'updated_at'],
+                        batch_size=500,
+                    )
+                    # 昵称变更会改动教师主页公告与学员详情，bulk_update 不触发信号需手动失效
+                    pks = [s.pk for s in to_update]
+                    transaction.on_commit(lambda: dashboard.invalidate_for_students(pks))
+                    tags.invalidate(*(tags.student_tag(pk) for pk in pks))
+            result.success_count += len(to_create)
+            result.update_count += len(to_update)
+
+        result.processed += len(chunk)
+        if self.on_progress:
+            self.on_progress(result.processed)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.operations.importer import CHUNK_SIZE, ImportFileError, StudentImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = '从 XLSX/CSV 文件批量导入学员（流式读取，分块写入）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='XLSX 或 CSV 文件路径')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help=f'每块行数（默认{CHUNK_SIZE}）')
+        parser.add_argument('--errors-file', help='将全部错误明细写入该文件')
+
+    def handle(self, *args, **options):
+        errors_file = open(options['errors_file'], 'w', encoding='utf-8') if options['errors_file'] else None
+        importer = StudentImporter(
+            chunk_size=options['chunk_size'],
+            on_progress=lambda processed: self.stdout.write(f'已处理 {processed} 行'),
+            on_error=(lambda text: errors_file.write(text + '\n')) if errors_file else None,
+        )
+        try:
+            with open(options['path'], 'rb') as f:
+                result = importer.run(iter_rows(f, options['path']))
+        except ImportFileError as e:
+            raise CommandError(str(e))
+        finally:
+            if errors_file:
+                errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'导入完成: 新增{result.success_count}个，更新{result.update_count}个，失败{result.error_count}个'
+        ))
+        for text in result.as_dict()['error_logs'][:20]:
+            self.stdout.write(self.style.WARNING(text))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.operations.services import reconcile_student_visit_counts, reconcile_task_visit_counts
+
+
+class Command(BaseCommand):
+    help = '按回访记录整体校准学员/运营任务的累计回访次数'
+
+    def handle(self, *args, **options):
+        students = reconcile_student_visit_counts()
+        self.stdout.write(f'学员回访次数已重算：{students} 行')
+        tasks = reconcile_task_visit_counts()
+        self.stdout.write(f'运营任务回访次数已校准：{tasks} 行')
+        self.stdout.write(self.style.SUCCESS('回访计数校准完成'))
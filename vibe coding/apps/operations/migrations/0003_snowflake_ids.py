@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:59
+
+import apps.operations.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0002_opstask_student_name_initials_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='opstask',
+            name='task_id',
+            field=models.CharField(default=apps.operations.models.new_ops_task_id, max_length=50, unique=True, verbose_name='任务ID'),
+        ),
+        migrations.AlterField(
+            model_name='visitrecord',
+            name='record_id',
+            field=models.CharField(default=apps.operations.models.new_visit_record_id, max_length=50, unique=True, verbose_name='记录ID'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_student_visit_counts(apps, schema_editor):
+    """按回访记录数回填学员累计回访次数（单条 UPDATE）"""
+    Student = apps.get_model('students', 'Student')
+    VisitRecord = apps.get_model('operations', 'VisitRecord')
+    counts = (
+        VisitRecord.objects.filter(student=OuterRef('pk'))
+        .order_by().values('student').annotate(total=Count('pk')).values('total')
+    )
+    Student.objects.update(
+        visit_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0003_snowflake_ids'),
+        ('students', '0005_visit_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visitrecord',
+            name='ops_task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visit_records', to='operations.opstask', verbose_name='关联运营任务'),
+        ),
+        migrations.RunPython(backfill_student_visit_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0004_visit_counters'),
+        ('students', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='visitrecord',
+            name='visit_recor_student_f30d9c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='visitrecord',
+            name='visit_recor_visit_s_74f775_idx',
+        ),
+        migrations.AddIndex(
+            model_name='opstask',
+            index=models.Index(fields=['created_at', 'id'], name='ops_tasks_created_407b06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opstask',
+            index=models.Index(fields=['task_status', 'created_at', 'id'], name='ops_tasks_task_st_6165fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visitrecord',
+            index=models.Index(fields=['student', 'visit_time', 'id'], name='visit_recor_student_37a60e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visitrecord',
+            index=models.Index(fields=['visit_status', 'visit_time', 'id'], name='visit_recor_visit_s_e518a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visitrecord',
+            index=models.Index(fields=['visit_time', 'id'], name='visit_recor_visit_t_eadd5f_idx'),
+        ),
+    ]
@@ -1,8 +1,21 @@
 from django.db import models
+from apps.common import idgen
+from apps.common.models import CounterFieldsMixin, StudentNamePinyinMixin
 from apps.accounts.models import User
 from apps.students.models import Student
 
-class OpsTask(models.Model):
+
+def new_ops_task_id():
+    """运营任务ID：OPS- + Snowflake ID"""
+    return idgen.make_id('OPS-')
+
+
+def new_visit_record_id():
+    """回访记录ID：VR + Snowflake ID"""
+    return idgen.make_id('VR')
+
+
+class OpsTask(CounterFieldsMixin, StudentNamePinyinMixin):
     """运营待办事项模型"""
     TASK_SOURCE_CHOICES = [
         ('teacher', '教师端'),
@@ -18,13 +31,14 @@ class OpsTask(models.Model):
         ('closed', '已关闭'),
     ]
     
-    task_id = models.CharField(max_length=50, unique=True, verbose_name='任务ID')
+    task_id = models.CharField(max_length=50, unique=True, default=new_ops_task_id, verbose_name='任务ID')
     student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='关联学员')
     
     # 冗余字段，方便列表展示
     student_name = models.CharField(max_length=100, verbose_name='学员昵称')
     
     visit_count = models.IntegerField(default=0, verbose_name='回访次数')
+    counter_fields = ('visit_count',)
     source = models.CharField(max_length=20, choices=TASK_SOURCE_CHOICES, verbose_name='推送来源')
     task_status = models.CharField(max_length=20, choices=TASK_STATUS_CHOICES, default='pending', verbose_name='待办状态')
     
@@ -38,12 +52,15 @@ class OpsTask(models.Model):
         indexes = [
             models.Index(fields=['student', 'task_status']),
             models.Index(fields=['source', 'created_at']),
+            # 待办列表游标分页（按 created_at + id）
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['task_status', 'created_at', 'id']),
         ]
     
     def __str__(self):
         return f"{self.student_name} - {self.get_task_status_display()}"
 
-class VisitRecord(models.Model):
+class VisitRecord(StudentNamePinyinMixin):
     """回访记录模型"""
     VISIT_STATUS_CHOICES = [
         ('pending', '待办'),
@@ -52,8 +69,16 @@ class VisitRecord(models.Model):
         ('closed', '已关闭'),
     ]
     
-    record_id = models.CharField(max_length=50, unique=True, verbose_name='记录ID')
+    record_id = models.CharField(max_length=50, unique=True, default=new_visit_record_id, verbose_name='记录ID')
     student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='学员')
+    ops_task = models.ForeignKey(
+        OpsTask,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='visit_records',
+        verbose_name='关联运营任务'
+    )
     
     # 冗余字段，方便列表展示
     student_name = models.CharField(max_length=100, verbose_name='学员昵称')
@@ -72,8 +97,10 @@ class VisitRecord(models.Model):
         verbose_name_plural = '回访记录'
         db_table = 'visit_records'
         indexes = [
-            models.Index(fields=['student', 'visit_time']),
-            models.Index(fields=['visit_status', 'visit_time']),
+            # 回访记录游标分页（按 visit_time + id）
+            models.Index(fields=['student', 'visit_time', 'id']),
+            models.Index(fields=['visit_status', 'visit_time', 'id']),
+            models.Index(fields=['visit_time', 'id']),
         ]
     
     def __str__(self):
@@ -0,0 +1,108 @@
+"""回访记录写入与回访计数维护
+
+学员、运营任务上的 visit_count 为冗余计数列：写入回访记录时在同一事务内以 F() 原子自增，
+列表接口直接读取，无需 COUNT 聚合；常规 save() 不会回写计数列（见 CounterFieldsMixin）。
+计数偏差（历史数据、手工改库）由 reconcile_visit_counts 命令整体校准。
+
+运营待办行（ops_task_row）由待办列表接口与新待办事件推送（publish_created）共用。
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from apps.common import counting, db, events, tags
+from apps.students.models import Student
+from .models import OpsTask, VisitRecord
+
+
+def record_visit(student, visit_status, visit_note, teacher_name, task=None):
+    """写入一条回访记录并原子自增学员（及关联任务）的回访计数
+
+    记录上的 visit_count 为写入后的累计次数：关联任务时取任务计数，否则取学员计数。
+    """
+    with db.write_transaction():
+        Student.objects.filter(pk=student.pk).update(visit_count=F('visit_count') + 1)
+        if task is not None:
+            OpsTask.objects.filter(pk=task.pk).update(visit_count=F('visit_count') + 1)
+            counter = OpsTask.objects.filter(pk=task.pk)
+        else:
+            counter = Student.objects.filter(pk=student.pk)
+        # 本事务已持有该行写锁，读到的即为本次自增后的值
+        visit_count = counter.values_list('visit_count', flat=True).get()
+
+        record = VisitRecord.objects.create(
+            student=student,
+            ops_task=task,
+            student_name=student.student_name,
+            visit_status=visit_status,
+            visit_count=visit_count,
+            teacher_name=teacher_name,
+            visit_note=visit_note,
+        )
+    if task is not None:
+        task.visit_count = visit_count
+    return record
+
+
+def _count_subquery(field):
+    counts = (
+        VisitRecord.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def reconcile_student_visit_counts():
+    """按回访记录数重算全部学员的 visit_count（单条 UPDATE）；返回更新行数"""
+    updated = Student.objects.update(visit_count=_count_subquery('student'))
+    # update() 不触发信号：学员列表、各学员详情缓存均含回访次数（详情按学员代际标签整体失效）
+    tags.invalidate(tags.ALL_STUDENTS)
+    counting.touch(Student)
+    return updated
+
+
+def reconcile_task_visit_counts():
+    """按关联回访记录数校准运营任务的 visit_count（单条 UPDATE）；返回更新行数
+
+    引入 ops_task 关联之前的历史回访记录无法归属到任务，因此只向上校准（补回丢失的自增），
+    不会把历史计数清零。
+    """
+    updated = OpsTask.objects.update(visit_count=Greatest(F('visit_count'), _count_subquery('ops_task')))
+    counting.touch(OpsTask)
+    return updated
+
+
+# ---------- 运营待办推送 ----------
+
+def ops_task_row(task):
+    """运营待办列表的一行（task 需 select_related student 并预取分组）"""
+    return {
+        'id': task.id,
+        'student_id': task.student.id,
+        'student_nickname': task.student.student_name,
+        'student_groups': task.student.groups,
+        'student_status': task.student.status,
+        'student_progress': task.student.learning_progress,
+        'visit_count': task.visit_count,
+        'source': task.get_source_display(),
+        'status': task.get_task_status_display(),
+        'notes': '',
+        'assigned_by': '系统',
+        'created_at': timezone.localtime(task.created_at).strftime('%Y-%m-%d %H:%M'),
+    }
+
+
+def publish_created(task_pks):
+    """事务提交后向运营收件箱推送新建的待办行"""
+    task_pks = list(task_pks)
+    if not task_pks:
+        return
+
+    def rows():
+        tasks = (
+            OpsTask.objects.filter(pk__in=task_pks).exclude(task_status='closed')
+            .select_related('student').prefetch_related('student__group_memberships').order_by('-created_at')
+        )
+        return [ops_task_row(task) for task in tasks]
+
+    events.publish(events.OPS_CHANNEL, events.OPS_TASK_CREATED, rows)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.common import fulltext
+from .models import VisitRecord
+
+
+@receiver(post_save, sender=VisitRecord)
+def sync_fulltext_on_save(sender, instance, **kwargs):
+    """回访记录保存后同步全文检索条目"""
+    fulltext.index_objects('visit', [instance])
+
+
+@receiver(post_delete, sender=VisitRecord)
+def sync_fulltext_on_delete(sender, instance, **kwargs):
+    """回访记录删除后移除全文检索条目"""
+    fulltext.remove_objects('visit', [instance.pk])
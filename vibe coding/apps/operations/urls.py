@@ -1,4 +1,5 @@
 from django.urls import path
+from apps.common.aio import view_for
 from . import views
 
 app_name = 'operations'
@@ -8,13 +9,16 @@ urlpatterns = [
     path('', views.student_list, name='student_list'),
     path('students/api/', views.get_students_list, name='get_students_list'),
     path('students/create/', views.create_student, name='create_student'),
-    path('students/<str:student_id>/', views.get_student_detail, name='get_student_detail'),
-    path('students/<str:student_id>/update/', views.update_student_info, name='update_student'),
+    # 固定路径须在 <str:student_id> 之前，否则会被学员详情路由吞掉
     path('students/batch-import/', views.batch_import_students, name='batch_import_students'),
+    path('students/export/', views.export_students, name='export_students'),
+    path('students/batch/', views.get_student_details, name='get_student_details'),
+    path('students/<str:student_id>/', view_for(views.get_student_detail, views.get_student_detail_async), name='get_student_detail'),
+    path('students/<str:student_id>/update/', views.update_student_info, name='update_student'),
     
     # 任务管理
     path('tasks/', views.task_management, name='task_management'),
-    path('tasks/api/', views.get_ops_tasks, name='get_ops_tasks'),
+    path('tasks/api/', view_for(views.get_ops_tasks, views.get_ops_tasks_async), name='get_ops_tasks'),
     path('tasks/<int:task_id>/update/', views.update_task_status, name='update_task_status'),
     path('tasks/manual/', views.add_manual_task, name='add_manual_task'),
     
@@ -1,58 +1,108 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 # from django.views.decorators.csrf import csrf_exempt
-from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Q, F
+from django.db.models.functions import Coalesce
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.conf import settings
+import csv
 import json
-import pandas as pd
+import logging
 import os
 from datetime import datetime, timedelta
-import uuid
 
 # 修复导入
 from apps.accounts.models import User
+from apps.students import details
 from apps.students.models import Student
-from apps.teaching.models import Feedback
+from apps.students.search_index import student_index
+from apps.teaching.models import Feedback, FeedbackProgress, parse_lesson_bound
 from apps.operations.models import OpsTask, VisitRecord
-from apps.common.decorators import role_required
+from apps.operations.importer import ImportFileError, StudentImporter, iter_rows
+from apps.operations.services import ops_task_row, record_visit
+from apps.common import db, fulltext, projection, tags
+from apps.common.aio import aiterate
+from apps.common.counting import count_total
+from apps.common.http import JsonResponse
+from apps.common.decorators import login_required, role_required
+from apps.common.pagination import CountedPaginator, CursorError, acounted_page, cursor_requested, paginate_by_cursor
+from apps.common.pinyin import pinyin_q
+from apps.common.projection import OutputField
+from apps.common.viewcache import cached_view, conditional_view
+
+logger = logging.getLogger(__name__)
+
+# 学员列表可选字段（fields= 投影，只加载所选字段依赖的列）
+STUDENT_LIST_FIELDS = {
+    'id': OutputField(lambda s: s.id),
+    'external_user_id': OutputField(lambda s: s.external_user_id, columns=('external_user_id',)),
+    'student_name': OutputField(lambda s: s.student_name, columns=('student_name',)),
+    'alias_name': OutputField(lambda s: s.alias_name, columns=('alias_name',)),
+    'groups': OutputField(lambda s: s.groups, prefetch=('group_memberships',)),
+    'learning_progress': OutputField(lambda s: s.learning_progress, columns=('learning_progress',)),
+    'visit_count': OutputField(lambda s: s.visit_count, columns=('visit_count',)),
+    # 直接使用注入的 featured_count，避免每行额外 SQL
+    'featured_count': OutputField(lambda s: getattr(s, 'featured_count', 0) or 0),
+    'total_study_time': OutputField(lambda s: s.total_study_time or 0, columns=('total_study_time',)),
+    'status': OutputField(lambda s: s.status, columns=('status',)),
+    'research_note': OutputField(lambda s: s.research_note or '', columns=('research_note',)),
+    'ops_note': OutputField(lambda s: s.ops_note or '', columns=('ops_note',)),
+    'created_at': OutputField(
+        lambda s: timezone.localtime(s.created_at).strftime('%Y-%m-%d %H:%M'), columns=('created_at',)
+    ),
+}
+
 
 # 修复字段引用
 @login_required
 @role_required(['运营'])
+@conditional_view('operations.students', tags=[Student, Feedback, VisitRecord])
 def get_students_list(request):
-    """获取学员列表（AJAX接口）"""
+    """获取学员列表（AJAX接口；fields= 字段投影）"""
     try:
+        names = projection.parse_fields(request, STUDENT_LIST_FIELDS)
         # 获取查询参数
         search_term = request.GET.get('search', '').strip()
+        group = request.GET.get('group', '').strip()
+        course_from = parse_lesson_bound(request.GET.get('course_from'))
+        course_to = parse_lesson_bound(request.GET.get('course_to'))
         sort_by = request.GET.get('sort', 'created_at')
         sort_order = request.GET.get('order', 'desc')
         page = int(request.GET.get('page', 1))
         page_size = int(request.GET.get('page_size', 20))
         
-        # 基础查询 - 修复：user -> assigned_teacher
-        students = Student.objects.select_related('assigned_teacher').all()
-        # 统一注入精选数，避免循环内逐个统计造成 N+1
-        students = students.annotate(
-            featured_count=Count('feedback', filter=Q(feedback__is_featured=True))
-        )
+        # 基础查询（筛选条件先作用于不带关联/注解的查询，总数按它统计）
+        students = Student.objects.all()
         
-        # 搜索功能
+        # 搜索功能（走内存 n-gram 索引，字母查询同时匹配拼音/首字母索引列）
         if search_term:
+            students = student_index.filter_queryset(
+                students, search_term,
+                fields=('student_name', 'alias_name', 'external_user_id'),
+                extra=pinyin_q(search_term),
+            )
+        
+        # 分组筛选（走分组关系表索引）
+        if group:
+            students = students.filter(group_memberships__group=group)
+        
+        # 课次范围：点评涉及这些课次的学员（走 feedback_progress 索引）
+        if course_from is not None or course_to is not None:
             students = students.filter(
-                Q(student_name__icontains=search_term) |
-                Q(alias_name__icontains=search_term) |
-                Q(external_user_id__icontains=search_term)
+                pk__in=FeedbackProgress.objects.in_range(course_from, course_to).values('student_id')
             )
         
         # 排序
-        if sort_by == 'progress':
+        if sort_by == 'name':
+            # 按昵称拼音排序（预计算列，非字节序）
+            order_field = 'student_name_pinyin'
+        elif sort_by == 'progress':
             order_field = 'learning_progress'
         elif sort_by == 'featured':
-            # 已统一 annotate featured_count，这里只切换排序字段
+            # 已统一注入 featured_count（来自点评汇总），这里只切换排序字段
             order_field = 'featured_count'
         elif sort_by == 'study_time':
             order_field = 'total_study_time'
@@ -62,45 +112,35 @@ def get_students_list(request):
         if sort_order == 'desc':
             order_field = f'-{order_field}'
         
-        students = students.order_by(order_field)
-        
-        # 分页
-        paginator = Paginator(students, page_size)
-        page_obj = paginator.get_page(page)
+        filtered = students
+        # 只加载所选字段依赖的列（排序列始终加载，游标编码需要；精选数为注解）
+        always = ('id',) if sort_by == 'featured' else ('id', order_field.lstrip('-'))
+        students = projection.load(students, STUDENT_LIST_FIELDS, names, always=always)
+        if 'featured_count' in names or sort_by == 'featured':
+            # 精选数取自学员点评汇总（按主键连接一行），无需逐页聚合点评表
+            students = students.annotate(featured_count=Coalesce(F('feedback_summary__featured_count'), 0))
+        
+        # 分页：带 cursor 参数时走游标分页（排序键 + id，不做 COUNT）；页码分页总数走计数服务
+        if cursor_requested(request):
+            page_obj = paginate_by_cursor(students, [order_field], request.GET['cursor'], page_size)
+            pagination = page_obj.as_dict(page_size)
+        else:
+            total = count_total(filtered, scope=(Student, Feedback), label='operations.students')
+            paginator = CountedPaginator(students.order_by(order_field), page_size, total)
+            page_obj = paginator.get_page(page)
+            pagination = paginator.as_dict(page_obj)
         
         # 构建返回数据
-        students_data = []
-        for student in page_obj:
-            # 直接使用注入的 featured_count，避免每行额外 SQL
-            featured_count = getattr(student, 'featured_count', 0) or 0
-            
-            students_data.append({
-                'id': student.id,
-                'external_user_id': student.external_user_id,
-                'student_name': student.student_name,
-                'alias_name': student.alias_name,
-                'groups': student.groups,
-                'learning_progress': student.learning_progress,
-                'featured_count': featured_count,
-                'total_study_time': student.total_study_time or 0,
-                'status': student.status,
-                'research_note': student.research_note or '',
-                'ops_note': student.ops_note or '',
-                'created_at': timezone.localtime(student.created_at).strftime('%Y-%m-%d %H:%M')
-            })
+        students_data = [projection.render(student, STUDENT_LIST_FIELDS, names) for student in page_obj]
         
         return JsonResponse({
             'success': True,
             'data': students_data,
-            'pagination': {
-                'current_page': page_obj.number,
-                'total_pages': paginator.num_pages,
-                'total_count': paginator.count,
-                'has_next': page_obj.has_next(),
-                'has_previous': page_obj.has_previous()
-            }
+            'pagination': pagination
         })
         
+    except (CursorError, projection.FieldsError) as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -181,65 +221,95 @@ def update_student_info(request, student_id):
         return JsonResponse({'success': False, 'message': f'更新学员信息失败: {str(e)}'})
 
 
+def _student_detail_tags(request, student_id):
+    try:
+        return [tags.student_tag(int(student_id))]
+    except (TypeError, ValueError):
+        return [tags.student_tag(student_id)]
+
+
 @login_required
 @role_required(['运营'])
 @require_http_methods(["GET"])
+@cached_view('operations.student_detail', tags=_student_detail_tags)
 def get_student_detail(request, student_id):
-    """获取学员详细信息（统一结构 + 向后兼容）"""
+    """获取学员详细信息（统一结构 + 向后兼容；fields= 字段投影，v=2 精简结构）"""
     try:
-        student = get_object_or_404(Student, id=student_id)
+        lean = details.lean_requested(request)
+        available = details.available_fields(details.OPS_FIELDS, lean)
+        names = projection.parse_fields(request, available)
+        # 只加载所选字段依赖的列；最近点评/回访仅在请求了对应字段时查询
+        student = get_object_or_404(projection.load(Student.objects.all(), available, names), id=student_id)
+        student_payload = projection.render(student, available, names)
+
+        if lean:
+            return JsonResponse({'success': True, 'student': student_payload})
+        # 同时提供 student 与 data 键，兼容旧前端
+        return JsonResponse({
+            'success': True,
+            'student': student_payload,
+            'data': student_payload
+        })
+    except projection.FieldsError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'获取学员详情失败: {str(e)}'
+        })
 
-        # 最近5条点评（使用 teaching.Feedback）
-        recent_feedbacks = Feedback.objects.filter(student=student).order_by('-reply_time')[:5]
-        feedback_list = []
-        for fb in recent_feedbacks:
-            progress_str = ','.join(map(str, fb.progress))
-            feedback_list.append({
-                'teacher_name': fb.teacher_name,
-                'lesson_progress': progress_str,
-                'teacher_comment': fb.teacher_comment,
-                'feedback_time': timezone.localtime(fb.reply_time).strftime('%Y-%m-%d %H:%M'),
-            })
-        # 仅评论文本（优先用于展示）
-        feedback_comments = [fb.teacher_comment for fb in recent_feedbacks if fb.teacher_comment][:5]
-
-        # 最近5条回访记录（仅文本）
-        visit_notes = list(
-            VisitRecord.objects.filter(student=student)
-            .order_by('-visit_time')
-            .values_list('visit_note', flat=True)[:5]
-        )
 
-        # 备注：仅用正式字段
-        research_note = student.research_note or ''
-        ops_note = student.ops_note or ''
-        # 统一结构
-        student_payload = {
-            # 新结构
-            'student_name': student.student_name,
-            'groups': student.groups,
-            'progress': student.progress,
-            'status': student.status,
-            'learning_hours': student.learning_hours,
-            'feedback_comments': feedback_comments,
-            'research_note': research_note,
-            'ops_note': ops_note,
-            'visit_notes': visit_notes,
-            # 旧字段（向后兼容）
-            'student_id': student.student_id,
-            'name': student.student_name,
-            'nickname': student.alias_name,
-            'current_progress': student.current_progress,
-            'total_study_time': getattr(student, 'total_study_time', 0.0),
-            'created_at': student.created_at.strftime('%Y-%m-%d %H:%M'),
-        }
+@login_required
+@role_required(['运营'])
+@require_http_methods(["GET"])
+@cached_view('operations.student_detail', tags=_student_detail_tags)
+async def get_student_detail_async(request, student_id):
+    """获取学员详细信息（异步实现：学员行、最近点评、最近回访并发查询）"""
+    try:
+        lean = details.lean_requested(request)
+        available = details.available_fields(details.OPS_FIELDS, lean)
+        names = projection.parse_fields(request, available)
+        student_payload = await details.arender({'id': student_id}, available, names)
 
-        # 同时提供 student 与 data 键，兼容旧前端
+        if lean:
+            return JsonResponse({'success': True, 'student': student_payload})
         return JsonResponse({
             'success': True,
             'student': student_payload,
             'data': student_payload
         })
+    except projection.FieldsError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'获取学员详情失败: {str(e)}'
+        })
+
+
+@login_required
+@role_required(['运营'])
+@require_http_methods(["GET"])
+@cached_view('operations.student_details', tags=details.batch_tags('pk', int))
+def get_student_details(request):
+    """批量获取学员详情（ids=1,2,3，最多 50 个；fields= / v=2 同单个详情）"""
+    try:
+        ids = details.parse_ids(request, int)
+        lean = details.lean_requested(request)
+        available = details.available_fields(details.OPS_FIELDS, lean)
+        names = projection.parse_fields(request, available)
+        students = list(projection.load(Student.objects.filter(pk__in=ids), available, names))
+        # 最近点评/回访：全部学员各一条窗口函数查询
+        details.prefetch_recent(students, names)
+        found = {s.pk: projection.render(s, available, names) for s in students}
+
+        return JsonResponse({
+            'success': True,
+            'students': {str(pk): found[pk] for pk in ids if pk in found},
+            'missing': [pk for pk in ids if pk not in found],
+        })
+    except (details.BatchError, projection.FieldsError) as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -261,83 +331,22 @@ def batch_import_students(request):
         
         file = request.FILES['file']
         
-        # 验证文件格式
-        if not file.name.endswith('.xlsx'):
-            return JsonResponse({
-                'success': False,
-                'message': '请上传XLSX格式的文件'
-            })
-        
-        # 读取Excel文件
+        # 流式读取 + 分块批量写入，不整表载入内存
+        importer = StudentImporter(
+            on_progress=lambda processed: logger.info('学员导入 %s: 已处理 %d 行', file.name, processed),
+        )
         try:
-            df = pd.read_excel(file)
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'message': f'文件读取失败: {str(e)}'
-            })
-        
-        # 验证必要列
-        required_columns = ['用户ID', '昵称']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
+            result = importer.run(iter_rows(file, file.name))
+        except ImportFileError as e:
             return JsonResponse({
                 'success': False,
-                'message': f'文件缺少必要列: {", ".join(missing_columns)}'
+                'message': str(e)
             })
         
-        # 处理数据
-        success_count = 0
-        update_count = 0
-        error_count = 0
-        error_logs = []
-        
-        for index, row in df.iterrows():
-            try:
-                external_user_id = str(row['用户ID']).strip()
-                student_name = str(row['昵称']).strip()
-                if not external_user_id or external_user_id == 'nan':
-                    error_count += 1
-                    error_logs.append(f'第{index+2}行: 用户ID为空')
-                    continue
-                
-                if not student_name or student_name == 'nan':
-                    error_count += 1
-                    error_logs.append(f'第{index+2}行: 昵称为空')
-                    continue
-                
-                # 检查是否已存在
-                student, created = Student.objects.get_or_create(
-                    external_user_id=external_user_id,
-                    defaults={
-                        'student_name': student_name,  # 修复：nickname -> student_name
-                        'groups': ['基础班'],
-                        'status': '加入'
-                    }
-                )
-                
-                if created:
-                    success_count += 1
-                else:
-                    # 更新学员姓名（如果不同）
-                    if student.student_name != student_name:  # 修复：nickname -> student_name
-                        student.student_name = student_name    # 修复：nickname -> student_name
-                        student.save()
-                        update_count += 1
-                
-            except Exception as e:
-                error_count += 1
-                error_logs.append(f'第{index+2}行: {str(e)}')
-        
         return JsonResponse({
             'success': True,
-            'message': f'导入完成: 新增{success_count}个，更新{update_count}个，失败{error_count}个',
-            'result': {
-                'success_count': success_count,
-                'update_count': update_count,
-                'error_count': error_count,
-                'error_logs': error_logs
-            }
+            'message': f'导入完成: 新增{result.success_count}个，更新{result.update_count}个，失败{result.error_count}个',
+            'result': result.as_dict()
         })
         
     except Exception as e:
@@ -347,6 +356,62 @@ def batch_import_students(request):
         })
 
 
+class Echo:
+    """csv.writer 的伪文件对象：writerow 直接返回该行文本"""
+
+    def write(self, value):
+        return value
+
+
+STUDENT_EXPORT_HEADER = ['ID', '用户ID', '昵称', '备注名', '分组', '创建时间', '状态', '累计学习时长(分钟)']
+
+
+@login_required
+@role_required(['运营'])
+@require_http_methods(["GET"])
+def export_students(request):
+    """导出学员 CSV（服务端游标逐块读取，边读边输出，不整表载入内存）"""
+    students = Student.objects.all()
+    search_term = request.GET.get('search', '').strip()
+    if search_term:
+        students = student_index.filter_queryset(
+            students, search_term,
+            fields=('student_name', 'alias_name', 'external_user_id'),
+            extra=pinyin_q(search_term),
+        )
+    students = (
+        students.only('id', 'external_user_id', 'student_name', 'alias_name', 'created_at', 'status', 'total_study_time')
+        .prefetch_related('group_memberships')
+        .order_by('-created_at', '-id')
+    )
+
+    writer = csv.writer(Echo())
+
+    def rows():
+        # BOM 便于 Excel 识别 UTF-8；导入同样接受带 BOM 的 UTF-8
+        yield '\ufeff' + writer.writerow(STUDENT_EXPORT_HEADER)
+        for s in db.stream(students):
+            yield writer.writerow([
+                s.id,
+                s.external_user_id or '',
+                s.student_name,
+                s.alias_name or '',
+                '|'.join(s.groups),
+                timezone.localtime(s.created_at).strftime('%Y-%m-%d %H:%M'),
+                s.status,
+                s.total_study_time or 0,
+            ])
+
+    content = rows()
+    if isinstance(request, ASGIRequest):
+        # ASGI 下同步迭代器会被整体读入内存后才发送，改用异步迭代器分批读取
+        content = aiterate(content)
+    filename = f'students_export_{timezone.localtime().strftime("%Y%m%d_%H%M%S")}.csv'
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # ==================== 运营任务管理模块 ====================
 
 @login_required
@@ -360,76 +425,105 @@ def task_management(request):
     return render(request, 'operations/task_management.html', context)
 
 
+def _filtered_ops_tasks(request):
+    """按状态/搜索词筛选的运营待办（未加关联加载，供计数使用）"""
+    status_filter = request.GET.get('status', '')
+    search_term = request.GET.get('search', '').strip()
+    
+    # 基础查询（移除无效的 assigned_by），默认排除“已关闭”的任务
+    tasks = OpsTask.objects.exclude(task_status='closed')
+    
+    # 状态筛选：兼容中文或枚举值
+    if status_filter:
+        status_map = {
+            '待办': 'pending',
+            '已联系': 'contacted',
+            '未回复': 'no_reply',
+            '已关闭': 'closed',
+        }
+        code = status_map.get(status_filter, status_filter)
+        tasks = tasks.filter(task_status=code)
+    
+    # 搜索功能（检索学员昵称/备注名，字母查询同时匹配冗余的拼音列）
+    if search_term:
+        condition = (
+            Q(student__student_name__icontains=search_term) |
+            Q(student__alias_name__icontains=search_term)
+        )
+        pinyin_condition = pinyin_q(search_term)
+        if pinyin_condition is not None:
+            condition |= pinyin_condition
+        tasks = tasks.filter(condition)
+    return tasks
+
+
 @login_required
 @role_required(['运营'])
+@conditional_view('operations.tasks', tags=[OpsTask, Student, VisitRecord])
 def get_ops_tasks(request):
     """获取运营待办事项列表"""
     try:
         # 获取查询参数
-        status_filter = request.GET.get('status', '')
-        search_term = request.GET.get('search', '').strip()
         page = int(request.GET.get('page', 1))
         page_size = int(request.GET.get('page_size', 20))
         
-        # 基础查询（移除无效的 assigned_by）
-        tasks = OpsTask.objects.select_related('student').all()
-        # 默认排除“已关闭”的任务
-        tasks = tasks.exclude(task_status='closed')
+        filtered = _filtered_ops_tasks(request)
+        tasks = filtered.select_related('student').prefetch_related('student__group_memberships')
         
-        # 状态筛选：兼容中文或枚举值
-        if status_filter:
-            status_map = {
-                '待办': 'pending',
-                '已联系': 'contacted',
-                '未回复': 'no_reply',
-                '已关闭': 'closed',
-            }
-            code = status_map.get(status_filter, status_filter)
-            tasks = tasks.filter(task_status=code)
+        # 分页：带 cursor 参数时走游标分页（按 created_at + id，不做 COUNT）；页码分页总数走计数服务
+        if cursor_requested(request):
+            page_obj = paginate_by_cursor(tasks, ['-created_at'], request.GET['cursor'], page_size)
+            pagination = page_obj.as_dict(page_size)
+        else:
+            total = count_total(filtered, scope=(OpsTask, Student), label='operations.tasks')
+            paginator = CountedPaginator(tasks.order_by('-created_at'), page_size, total)
+            page_obj = paginator.get_page(page)
+            pagination = paginator.as_dict(page_obj)
         
-        # 搜索功能（检索学员昵称/备注名）
-        if search_term:
-            tasks = tasks.filter(
-                Q(student__student_name__icontains=search_term) |
-                Q(student__alias_name__icontains=search_term)
-            )
+        # 行格式与新待办事件推送一致（见 services.ops_task_row）
+        tasks_data = [ops_task_row(task) for task in page_obj]
         
-        # 排序
-        tasks = tasks.order_by('-created_at')
+        return JsonResponse({
+            'success': True,
+            'data': tasks_data,
+            'pagination': pagination
+        })
+    except CursorError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'获取任务列表失败: {str(e)}'
+        })
+
+
+@login_required
+@role_required(['运营'])
+@conditional_view('operations.tasks', tags=[OpsTask, Student, VisitRecord])
+async def get_ops_tasks_async(request):
+    """获取运营待办事项列表（异步实现：页码分页时总数与当前页并发查询）"""
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', 20))
         
-        # 分页
-        paginator = Paginator(tasks, page_size)
-        page_obj = paginator.get_page(page)
+        filtered = _filtered_ops_tasks(request)
+        tasks = filtered.select_related('student').prefetch_related('student__group_memberships')
         
-        # 构建返回数据
-        tasks_data = []
-        for task in page_obj:
-            tasks_data.append({
-                'id': task.id,
-                'student_id': task.student.id,
-                'student_nickname': task.student.student_name,
-                'student_groups': task.student.groups,
-                'student_status': task.student.status,
-                'student_progress': task.student.learning_progress,
-                'visit_count': task.visit_count,
-                'source': task.get_source_display() if hasattr(task, 'get_source_display') else task.source,
-                'status': task.get_task_status_display() if hasattr(task, 'get_task_status_display') else task.task_status,
-                'notes': '',
-                'assigned_by': '系统',
-                'created_at': timezone.localtime(task.created_at).strftime('%Y-%m-%d %H:%M'),
-            })
+        if cursor_requested(request):
+            page_obj = await sync_to_async(paginate_by_cursor)(tasks, ['-created_at'], request.GET['cursor'], page_size)
+            pagination = page_obj.as_dict(page_size)
+        else:
+            total = sync_to_async(count_total)(filtered, scope=(OpsTask, Student), label='operations.tasks')
+            paginator, page_obj = await acounted_page(tasks.order_by('-created_at'), page_size, page, total)
+            pagination = paginator.as_dict(page_obj)
         
         return JsonResponse({
             'success': True,
-            'data': tasks_data,
-            'pagination': {
-                'current_page': page_obj.number,
-                'total_pages': paginator.num_pages,
-                'total_count': paginator.count,
-                'has_next': page_obj.has_next(),
-                'has_previous': page_obj.has_previous()
-            }
+            'data': [ops_task_row(task) for task in page_obj],
+            'pagination': pagination
         })
+    except CursorError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -466,27 +560,18 @@ def update_task_status(request, task_id):
         # 更新任务状态
         task.task_status = code
         
-        # 若携带备注，则写入回访记录，并自增任务回访次数
-        if notes:
-            # 生成唯一记录ID
-            record_id = f"VR{int(timezone.now().timestamp()*1000)}"
-            # 学员与老师信息
-            student = task.student
-            teacher_name = getattr(student, 'assigned_teacher_name', None)
-            if callable(teacher_name):
-                teacher_name = student.assigned_teacher_name
-            teacher_name = teacher_name or '未分配'
-            task.visit_count = (task.visit_count or 0) + 1
-            VisitRecord.objects.create(
-                record_id=record_id,
-                student=student,
-                student_name=student.student_name,
-                visit_status=code,
-                visit_count=task.visit_count,
-                teacher_name=teacher_name,
-                visit_note=notes
-            )
-        task.save()
+        with db.write_transaction():
+            # 若携带备注，则写入回访记录，并原子自增学员与任务的回访次数
+            if notes:
+                # 学员与老师信息
+                student = task.student
+                teacher_name = getattr(student, 'assigned_teacher_name', None)
+                if callable(teacher_name):
+                    teacher_name = student.assigned_teacher_name
+                teacher_name = teacher_name or '未分配'
+                record_visit(student, code, notes, teacher_name, task=task)
+            # 只写状态列，不回写（可能过期的）回访计数
+            task.save(update_fields=['task_status', 'updated_at'])
         return JsonResponse({'success': True, 'message': '状态更新成功'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'更新失败: {str(e)}'})
@@ -514,28 +599,14 @@ def create_visit_record(request):
         }
         status_code = status_map.get(status_cn, status_cn)
 
-        # 生成唯一记录ID
-        record_id = f"VR{int(timezone.now().timestamp()*1000)}"
-
         # 任课老师名称（尽量复用学员的 assigned_teacher_name 逻辑）
         teacher_name = getattr(student, 'assigned_teacher_name', None)
         if callable(teacher_name):
             teacher_name = student.assigned_teacher_name
         teacher_name = teacher_name or '未分配'
 
-        # 计算累计回访次数（简单按该学员已有记录数+1）
-        visit_count = VisitRecord.objects.filter(student=student).count() + 1
-
-        visit_record = VisitRecord.objects.create(
-            record_id=record_id,
-            student=student,
-            student_name=student.student_name,
-            visit_status=status_code,
-            visit_count=visit_count,
-            teacher_name=teacher_name,
-            visit_note=data.get('notes', '').strip(),
-            # visit_time 使用模型的 auto_now_add
-        )
+        # 累计回访次数由学员计数列原子自增得到，无需 COUNT（visit_time 使用模型的 auto_now_add）
+        visit_record = record_visit(student, status_code, data.get('notes', '').strip(), teacher_name)
 
         return JsonResponse({
             'success': True,
@@ -551,6 +622,7 @@ def create_visit_record(request):
 
 @login_required
 @role_required(['运营'])
+@conditional_view('operations.visits', tags=[VisitRecord, Student])
 def get_visit_records_v2(request):
     """获取回访记录列表"""
     try:
@@ -579,20 +651,28 @@ def get_visit_records_v2(request):
             code = status_map.get(status_filter, status_filter)
             records = records.filter(visit_status=code)
         
-        # 搜索（学员名/别名/备注）
+        # 搜索（学员名/别名/备注），回访备注走全文索引
         if search_term:
-            records = records.filter(
+            condition = (
                 Q(student__student_name__icontains=search_term) |
-                Q(student__alias_name__icontains=search_term) |
-                Q(visit_note__icontains=search_term)
+                Q(student__alias_name__icontains=search_term)
             )
-        
-        # 排序
-        records = records.order_by('-visit_time')
-        
-        # 分页
-        paginator = Paginator(records, page_size)
-        page_obj = paginator.get_page(page)
+            fulltext_condition = fulltext.match_q('visit', search_term)
+            if fulltext_condition is not None:
+                condition |= fulltext_condition
+            else:
+                condition |= Q(visit_note__icontains=search_term)
+            records = records.filter(condition)
+        
+        # 分页：带 cursor 参数时走游标分页（按 visit_time + id，不做 COUNT）；页码分页总数走计数服务
+        if cursor_requested(request):
+            page_obj = paginate_by_cursor(records, ['-visit_time'], request.GET['cursor'], page_size)
+            pagination = page_obj.as_dict(page_size)
+        else:
+            total = count_total(records, scope=(VisitRecord, Student), label='operations.visits')
+            paginator = CountedPaginator(records.order_by('-visit_time'), page_size, total)
+            page_obj = paginator.get_page(page)
+            pagination = paginator.as_dict(page_obj)
         
         # 构建返回数据
         records_data = []
@@ -607,20 +687,17 @@ def get_visit_records_v2(request):
                 'teacher_name': record.teacher_name,
                 'operator': '—',
                 'notes': record.visit_note,
+                'highlight': fulltext.highlight(record.visit_note, search_term) if search_term else '',
                 'created_at': timezone.localtime(record.created_at).strftime('%Y-%m-%d %H:%M'),
             })
         
         return JsonResponse({
             'success': True,
             'data': records_data,
-            'pagination': {
-                'current_page': page_obj.number,
-                'total_pages': paginator.num_pages,
-                'total_count': paginator.count,
-                'has_next': page_obj.has_next(),
-                'has_previous': page_obj.has_previous()
-            }
+            'pagination': pagination
         })
+    except CursorError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -651,15 +728,8 @@ def add_manual_task(request):
                 'message': '该学员已存在未完成的运营任务'
             })
         
-        # 生成唯一的任务ID：OPS-学员编码-随机片段
-        task_id_val = f"OPS-{getattr(student, 'student_id', student.id)}-{uuid.uuid4().hex[:8].upper()}"
-        # 极低概率冲突，再做一次兜底检查
-        while OpsTask.objects.filter(task_id=task_id_val).exists():
-            task_id_val = f"OPS-{getattr(student, 'student_id', student.id)}-{uuid.uuid4().hex[:8].upper()}"
-
-        # 创建任务，使用现有字段
+        # 创建任务（task_id 由模型默认值经 Snowflake 生成器分配，无需查重）
         task = OpsTask.objects.create(
-            task_id=task_id_val,
             student=student,
             student_name=student.student_name,
             source='manual',          # 使用枚举值
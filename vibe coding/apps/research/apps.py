@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class ResearchConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.research'
-    verbose_name = '教研管理'
\ No newline at end of file
+    verbose_name = '教研管理'
+
+    def ready(self):
+        # 注册信号：教学任务状态流转时增量维护教师工作量统计
+        from . import signals  # noqa: F401
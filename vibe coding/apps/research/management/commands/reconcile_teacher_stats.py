@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.research.workload import RETENTION_DAYS, reconcile
+
+
+class Command(BaseCommand):
+    help = '按教学任务整体校准教师工作量统计，并重建保留期内的每日完成数分桶'
+
+    def handle(self, *args, **options):
+        teachers, buckets = reconcile()
+        self.stdout.write(f'教师工作量已重算：{teachers} 行')
+        self.stdout.write(f'完成数分桶已重建：{buckets} 个（保留 {RETENTION_DAYS} 天）')
+        self.stdout.write(self.style.SUCCESS('教师工作量统计校准完成'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:59
+
+import apps.research.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='teachingtask',
+            name='task_id',
+            field=models.CharField(default=apps.research.models.new_teaching_task_id, max_length=50, unique=True, verbose_name='任务ID'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research', '0002_snowflake_ids'),
+        ('students', '0006_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teachingtask',
+            index=models.Index(fields=['created_at', 'id'], name='teaching_ta_created_223cc1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachingtask',
+            index=models.Index(fields=['teacher', 'created_at', 'id'], name='teaching_ta_teacher_40a0bf_idx'),
+        ),
+    ]
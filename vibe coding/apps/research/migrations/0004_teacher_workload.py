@@ -0,0 +1,82 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_teacher_stats(apps, schema_editor):
+    """按已有教学任务生成教师工作量与完成分桶"""
+    TeachingTask = apps.get_model('research', 'TeachingTask')
+    TeacherWorkload = apps.get_model('research', 'TeacherWorkload')
+    TeacherDailyCompletion = apps.get_model('research', 'TeacherDailyCompletion')
+    rows = (
+        TeachingTask.objects.values('teacher_id')
+        .annotate(
+            pending_tasks=Count('pk', filter=Q(status='pending')),
+            in_progress_tasks=Count('pk', filter=Q(status='in_progress')),
+            completed_tasks=Count('pk', filter=Q(status='completed')),
+            cancelled_tasks=Count('pk', filter=Q(status='cancelled')),
+            total_students=Count('student_id', distinct=True),
+        )
+        .order_by()
+    )
+    TeacherWorkload.objects.bulk_create([TeacherWorkload(**row) for row in rows], batch_size=500)
+    buckets = (
+        TeachingTask.objects.filter(status='completed', completed_at__isnull=False)
+        .annotate(day=TruncDate('completed_at', tzinfo=timezone.get_current_timezone()))
+        .values('teacher_id', 'day').annotate(completed=Count('pk')).order_by()
+    )
+    TeacherDailyCompletion.objects.bulk_create([TeacherDailyCompletion(**row) for row in buckets], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_roles_mask'),
+        ('research', '0003_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherWorkload',
+            fields=[
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='教师')),
+                ('pending_tasks', models.IntegerField(default=0, verbose_name='待处理任务数')),
+                ('in_progress_tasks', models.IntegerField(default=0, verbose_name='进行中任务数')),
+                ('completed_tasks', models.IntegerField(default=0, verbose_name='已完成任务数')),
+                ('cancelled_tasks', models.IntegerField(default=0, verbose_name='已取消任务数')),
+                ('total_students', models.IntegerField(default=0, verbose_name='涉及学员数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '教师工作量',
+                'verbose_name_plural': '教师工作量',
+                'db_table': 'teacher_workloads',
+            },
+        ),
+        migrations.CreateModel(
+            name='TeacherDailyCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('completed', models.IntegerField(default=0, verbose_name='完成任务数')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_completions', to=settings.AUTH_USER_MODEL, verbose_name='教师')),
+            ],
+            options={
+                'verbose_name': '教师每日完成数',
+                'verbose_name_plural': '教师每日完成数',
+                'db_table': 'teacher_daily_completions',
+                'indexes': [models.Index(fields=['day', 'teacher'], name='teacher_dai_day_fd3396_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='teacherdailycompletion',
+            constraint=models.UniqueConstraint(fields=('teacher', 'day'), name='teacher_daily_completions_teacher_day_uniq'),
+        ),
+        migrations.RunPython(backfill_teacher_stats, migrations.RunPython.noop),
+    ]
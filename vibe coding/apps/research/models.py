@@ -1,7 +1,14 @@
 from django.db import models
 from apps.accounts.models import User
+from apps.common import idgen
 from apps.students.models import Student
 
+
+def new_teaching_task_id():
+    """教学任务ID：TASK- + Snowflake ID"""
+    return idgen.make_id('TASK-')
+
+
 class TeachingTask(models.Model):
     """教学任务分配模型"""
     TASK_STATUS_CHOICES = [
@@ -11,7 +18,7 @@ class TeachingTask(models.Model):
         ('cancelled', '已取消'),
     ]
     
-    task_id = models.CharField(max_length=50, unique=True, verbose_name='任务ID')
+    task_id = models.CharField(max_length=50, unique=True, default=new_teaching_task_id, verbose_name='任务ID')
     student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='学员')
     teacher = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='分配教师')
     researcher = models.ForeignKey(
@@ -37,7 +44,76 @@ class TeachingTask(models.Model):
         indexes = [
             models.Index(fields=['teacher', 'status']),
             models.Index(fields=['student', 'assigned_at']),
+            # 分配历史游标分页（按 created_at + id）
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['teacher', 'created_at', 'id']),
         ]
     
     def __str__(self):
-        return f"{self.teacher.real_name} -> {self.student.student_name}"
\ No newline at end of file
+        return f"{self.teacher.real_name} -> {self.student.student_name}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """记录加载时的状态，保存时据此识别状态流转（见 apps.research.workload）"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = tuple(instance.__dict__.get(f) for f in ('teacher_id', 'status', 'completed_at'))
+        return instance
+
+
+class TeacherWorkload(models.Model):
+    """教师工作量统计（冗余表）：随教学任务状态流转以 F() 增量维护，reconcile_teacher_stats 定期校准"""
+    teacher = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='workload',
+        verbose_name='教师'
+    )
+    pending_tasks = models.IntegerField(default=0, verbose_name='待处理任务数')
+    in_progress_tasks = models.IntegerField(default=0, verbose_name='进行中任务数')
+    completed_tasks = models.IntegerField(default=0, verbose_name='已完成任务数')
+    cancelled_tasks = models.IntegerField(default=0, verbose_name='已取消任务数')
+    total_students = models.IntegerField(default=0, verbose_name='涉及学员数')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '教师工作量'
+        verbose_name_plural = '教师工作量'
+        db_table = 'teacher_workloads'
+
+    def __str__(self):
+        return f"{self.teacher_id} - {self.open_tasks}/{self.total_tasks}"
+
+    @property
+    def open_tasks(self):
+        return self.pending_tasks + self.in_progress_tasks
+
+    @property
+    def total_tasks(self):
+        return self.open_tasks + self.completed_tasks + self.cancelled_tasks
+
+
+class TeacherDailyCompletion(models.Model):
+    """教师每日完成任务数（按本地日期分桶），滚动窗口统计只需累加窗口内的桶"""
+    teacher = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_completions',
+        verbose_name='教师'
+    )
+    day = models.DateField(verbose_name='日期')
+    completed = models.IntegerField(default=0, verbose_name='完成任务数')
+
+    class Meta:
+        verbose_name = '教师每日完成数'
+        verbose_name_plural = '教师每日完成数'
+        db_table = 'teacher_daily_completions'
+        constraints = [
+            models.UniqueConstraint(fields=['teacher', 'day'], name='teacher_daily_completions_teacher_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'teacher']),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher_id} - {self.day}: {self.completed}"
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""教学任务批量分配
+
+教研一次给老师分配几百上千名学员。原先逐个 get_object_or_404 + create，既慢又无事务。
+这里按 BATCH_SIZE 分批：每批一次 in_bulk 解析学员、一次集合查询排除已有未完成任务的学员、
+一次 bulk_create（任务ID批量预分配），全部批次在同一事务内，要么全部生效要么全部回滚。
+"""
+from django.db import transaction
+
+from apps.common import counting, db, idgen, tags
+from apps.students.models import Student
+from apps.teaching import dashboard
+from apps.teaching.services import publish_assigned
+from . import workload
+from .models import TeachingTask
+
+BATCH_SIZE = 500
+
+# 单次请求允许的最大分配条数
+MAX_ASSIGNMENTS = 5000
+
+OPEN_STATUSES = ('pending', 'in_progress')
+
+# 单条分配结果
+STATUS_CREATED = 'created'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_OPEN_TASK = 'open_task'
+STATUS_DUPLICATE = 'duplicate'
+STATUS_INVALID = 'invalid'
+
+
+def _parse_assignments(assignments):
+    """解析 (学员主键, 备注) 对；返回 (有效列表, 无效/重复的结果)"""
+    pairs, outcomes, seen = [], [], set()
+    for item in assignments:
+        raw_id = item.get('student_id') if isinstance(item, dict) else None
+        try:
+            student_pk = int(raw_id)
+        except (TypeError, ValueError):
+            outcomes.append({'student_id': raw_id, 'status': STATUS_INVALID})
+            continue
+        if student_pk in seen:
+            outcomes.append({'student_id': student_pk, 'status': STATUS_DUPLICATE})
+            continue
+        seen.add(student_pk)
+        note = item.get('task_note') or ''
+        pairs.append((student_pk, note if isinstance(note, str) else str(note)))
+    return pairs, outcomes
+
+
+def assign_tasks(researcher, teacher, assignments):
+    """批量创建教学任务；返回逐个学员的结果列表"""
+    pairs, outcomes = _parse_assignments(assignments)
+    created_pks = []
+
+    with db.write_transaction():
+        for start in range(0, len(pairs), BATCH_SIZE):
+            batch = pairs[start:start + BATCH_SIZE]
+            pks = [pk for pk, _ in batch]
+            students = Student.objects.only('pk', 'student_name').in_bulk(pks)
+            busy = set(
+                TeachingTask.objects.filter(student_id__in=list(students), status__in=OPEN_STATUSES)
+                .values_list('student_id', flat=True)
+            )
+
+            tasks, created = [], []
+            for student_pk, note in batch:
+                student = students.get(student_pk)
+                if student is None:
+                    outcomes.append({'student_id': student_pk, 'status': STATUS_NOT_FOUND})
+                elif student_pk in busy:
+                    outcomes.append({
+                        'student_id': student_pk,
+                        'status': STATUS_OPEN_TASK,
+                        'student_name': student.student_name,
+                    })
+                else:
+                    tasks.append(TeachingTask(
+                        student=student,
+                        teacher=teacher,
+                        researcher=researcher,
+                        task_note=note,
+                    ))
+                    created.append(student)
+
+            for task, task_id in zip(tasks, idgen.make_ids('TASK-', len(tasks))):
+                task.task_id = task_id
+            TeachingTask.objects.bulk_create(tasks)
+            workload.record_created(tasks)
+            created_pks.extend(task.pk for task in tasks)
+            for task, student in zip(tasks, created):
+                outcomes.append({
+                    'student_id': student.pk,
+                    'status': STATUS_CREATED,
+                    'id': task.pk,
+                    'task_id': task.task_id,
+                    'student_name': student.student_name,
+                })
+        # bulk_create 不触发信号，手动记录工作量、清除教师主页缓存、接口缓存与列表总数缓存并推送新任务
+        transaction.on_commit(lambda: dashboard.invalidate_teachers([teacher.pk]))
+        tags.invalidate(tags.teacher_tag(teacher.pk))
+        counting.touch(TeachingTask)
+        publish_assigned(teacher.pk, created_pks)
+    return outcomes
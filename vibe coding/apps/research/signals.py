@@ -0,0 +1,47 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.common import tags
+from apps.teaching.services import publish_assigned
+from . import workload
+from .models import TeachingTask
+
+
+OPEN_STATUSES = ('pending', 'in_progress')
+
+
+def _state(task):
+    return (task.status, task.completed_at)
+
+
+@receiver(post_save, sender=TeachingTask)
+def record_workload_on_save(sender, instance, created, **kwargs):
+    """教学任务新建/状态流转/改派后增量更新教师工作量统计"""
+    new = (instance.teacher_id, *_state(instance))
+    if created:
+        workload.record_transition(instance.teacher_id, None, _state(instance))
+        if instance.status in OPEN_STATUSES:
+            publish_assigned(instance.teacher_id, [instance.pk])
+    else:
+        old = getattr(instance, '_loaded_state', None)
+        if old is None:
+            # 未经数据库加载的实例无从比对，交由 reconcile_teacher_stats 校准
+            return
+        if old[0] != new[0]:
+            changes = workload.Changes()
+            changes.add(old[0], old[1:], None)
+            changes.add(new[0], None, new[1:])
+            changes.apply()
+            # 改派：原教师的今日任务等接口缓存同样失效，新教师收到任务推送
+            tags.invalidate(tags.teacher_tag(old[0]))
+            if instance.status in OPEN_STATUSES:
+                publish_assigned(new[0], [instance.pk])
+        elif old != new:
+            workload.record_transition(instance.teacher_id, old[1:], new[1:])
+    instance._loaded_state = new
+
+
+@receiver(post_delete, sender=TeachingTask)
+def record_workload_on_delete(sender, instance, **kwargs):
+    """教学任务删除后扣减教师工作量统计"""
+    workload.record_transition(instance.teacher_id, _state(instance), None)
@@ -1,4 +1,5 @@
 from django.urls import path
+from apps.common.aio import view_for
 from . import views
 
 app_name = 'research'
@@ -17,11 +18,11 @@ urlpatterns = [
     path('tasks/detail/<int:task_id>/', views.get_task_detail, name='get_task_detail'),
     path('tasks/use-history/<int:task_id>/', views.use_history_assignment, name='use_history_assignment'),
     path('tasks/export/', views.export_assignment_results, name='export_assignment_results'),
-    path('students/search/', views.search_students, name='search_students'),
+    path('students/search/', view_for(views.search_students, views.search_students_async), name='search_students'),
     path('teachers/stats/', views.get_teacher_stats, name='get_teacher_stats'),
     
     # 质量监控子功能（命名保持不变）
-    path('quality/feedback/', views.feedback_monitoring, name='feedback_monitoring'),
+    path('quality/feedback/', view_for(views.feedback_monitoring, views.feedback_monitoring_async), name='feedback_monitoring'),
     path('quality/students/search/', views.student_search, name='student_search'),
     path('quality/students/<int:student_id>/', views.student_detail, name='student_detail'),
     path('quality/students/<int:student_id>/note/', views.update_student_research_note, name='update_student_research_note'),
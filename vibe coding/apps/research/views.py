@@ -1,22 +1,31 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q, Count, OuterRef, Subquery
+from django.http import HttpResponse
+from django.db.models import Q, F
 from django.utils import timezone
 from datetime import datetime, timedelta
-from django.core.paginator import Paginator
 from django.views.decorators.http import require_http_methods
 import json
-import uuid
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from io import BytesIO
 
+from . import workload
 from .models import TeachingTask
-from apps.students.models import Student
+from .services import MAX_ASSIGNMENTS, STATUS_CREATED, assign_tasks
+from apps.students.models import Student, StudentGroup
+from apps.students.search_index import student_index
 from apps.accounts.models import User
-from apps.teaching.models import Feedback
+from apps.teaching.models import Feedback, FeedbackProgress, parse_lesson_bound
+from apps.common import db, fulltext
+from apps.common.aio import alist
+from apps.common.counting import count_total
+from apps.common.decorators import login_required
+from apps.common.http import JsonResponse
+from apps.common.pagination import CountedPaginator, CursorError, acounted_page, cursor_requested, paginate_by_cursor
+from apps.common.pinyin import pinyin_q
+from apps.common.viewcache import cached_view
 
 # 教学任务分配视图
 @login_required
@@ -27,7 +36,7 @@ def task_assignment(request):
         return redirect('accounts:profile')
     
     # 获取所有教师
-    teachers = User.objects.filter(roles_json__contains='"teacher"')
+    teachers = User.objects.with_role('teacher')
     
     # 获取最近的任务分配记录
     recent_tasks = TeachingTask.objects.select_related('student', 'teacher', 'researcher').order_by('-created_at')[:10]
@@ -50,64 +59,84 @@ def create_task_assignment(request):
         teacher_id = data.get('teacher_id')
         student_assignments = data.get('assignments', [])
         
-        teacher = get_object_or_404(User, id=teacher_id, roles_json__contains='"teacher"')
+        teacher = get_object_or_404(User.objects.with_role('teacher'), id=teacher_id)
         
-        created_tasks = []
-        for assignment in student_assignments:
-            student_id = assignment.get('student_id')
-            task_note = assignment.get('task_note', '')
-            
-            student = get_object_or_404(Student, id=student_id)
-            
-            # 创建任务
-            task = TeachingTask.objects.create(
-                task_id=f"TASK_{uuid.uuid4().hex[:8].upper()}",
-                student=student,
-                teacher=teacher,
-                researcher=request.user,
-                task_note=task_note
-            )
-            created_tasks.append({
-                'id': task.id,
-                'task_id': task.task_id,
-                'student_name': student.student_name,
+        if not isinstance(student_assignments, list) or not student_assignments:
+            return JsonResponse({'success': False, 'message': '没有需要分配的学员'})
+        if len(student_assignments) > MAX_ASSIGNMENTS:
+            return JsonResponse({'success': False, 'message': f'单次最多分配 {MAX_ASSIGNMENTS} 名学员'})
+        
+        # 批量分配：分批解析学员、排除已有未完成任务的学员、bulk_create，整体在一个事务内
+        results = assign_tasks(request.user, teacher, student_assignments)
+        created_tasks = [
+            {
+                'id': r['id'],
+                'task_id': r['task_id'],
+                'student_name': r['student_name'],
                 'teacher_name': teacher.real_name
-            })
+            }
+            for r in results if r['status'] == STATUS_CREATED
+        ]
+        skipped_count = len(results) - len(created_tasks)
         
+        message = f'成功分配 {len(created_tasks)} 个任务'
+        if skipped_count:
+            message += f'，跳过 {skipped_count} 个（学员不存在、重复或已有未完成任务）'
         return JsonResponse({
             'success': True,
-            'message': f'成功分配 {len(created_tasks)} 个任务',
-            'tasks': created_tasks
+            'message': message,
+            'tasks': created_tasks,
+            'results': results,
+            'created_count': len(created_tasks),
+            'skipped_count': skipped_count,
         })
         
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
 
+def _search_students(query):
+    """学员搜索查询集（索引过期时会查库刷新）"""
+    # 注意：不能直接 values('groups')，因为 groups 是 property
+    return student_index.filter_queryset(
+        Student.objects.all(), query,
+        fields=('student_name', 'student_id', 'alias_name'),
+        limit=20,
+        extra=pinyin_q(query),
+    ).only('id', 'student_id', 'student_name', 'alias_name').prefetch_related('group_memberships')[:20]
+
+
+def _search_row(s):
+    return {
+        'id': s.id,
+        'student_id': s.student_id,
+        'student_name': s.student_name,
+        'alias_name': s.alias_name,
+        'groups': s.groups,  # property 转为 list
+    }
+
+
 @login_required
+@cached_view('research.search_students', tags=[Student])
 def search_students(request):
     """搜索学员（AJAX接口）"""
     query = request.GET.get('q', '')
     if len(query) < 2:
         return JsonResponse({'students': []})
     
-    # 注意：不能直接 values('groups')，因为 groups 是 property
-    qs = Student.objects.filter(
-        Q(student_name__icontains=query) |
-        Q(student_id__icontains=query) |
-        Q(alias_name__icontains=query)
-    ).only('id', 'student_id', 'student_name', 'alias_name', 'groups_json')[:20]
-    
-    students = []
-    for s in qs:
-        students.append({
-            'id': s.id,
-            'student_id': s.student_id,
-            'student_name': s.student_name,
-            'alias_name': s.alias_name,
-            'groups': s.groups,  # property 转为 list
-        })
+    return JsonResponse({'students': [_search_row(s) for s in _search_students(query)]})
+
+
+@login_required
+@cached_view('research.search_students', tags=[Student])
+async def search_students_async(request):
+    """搜索学员（异步实现，见 apps.common.aio）"""
+    query = request.GET.get('q', '')
+    if len(query) < 2:
+        return JsonResponse({'students': []})
     
-    return JsonResponse({'students': students})
+    # 索引检索为同步调用（可能刷新索引），放到线程中；结果查询走异步 ORM
+    students = await alist(await sync_to_async(_search_students)(query))
+    return JsonResponse({'students': [_search_row(s) for s in students]})
 
 @login_required
 def task_history(request):
@@ -122,7 +151,7 @@ def task_history(request):
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
-    tasks = TeachingTask.objects.select_related('student', 'teacher', 'researcher')
+    tasks = TeachingTask.objects.all()
     
     if teacher_id:
         tasks = tasks.filter(teacher_id=teacher_id)
@@ -133,15 +162,24 @@ def task_history(request):
     if date_to:
         tasks = tasks.filter(created_at__lte=date_to)
     
-    tasks = tasks.order_by('-created_at')
+    filtered = tasks
+    tasks = tasks.select_related('student', 'teacher', 'researcher')
     
-    # 分页
-    paginator = Paginator(tasks, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # 分页：带 cursor 参数时走游标分页（按 created_at + id，不做 COUNT）；页码分页总数走计数服务
+    if cursor_requested(request):
+        try:
+            page_obj = paginate_by_cursor(tasks, ['-created_at'], request.GET['cursor'], 20)
+        except CursorError as e:
+            messages.error(request, str(e))
+            page_obj = paginate_by_cursor(tasks, ['-created_at'], '', 20)
+    else:
+        total = count_total(filtered, label='research.task_history')
+        paginator = CountedPaginator(tasks.order_by('-created_at'), 20, total)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     # 获取教师列表用于筛选
-    teachers = User.objects.filter(roles_json__contains='"teacher"')
+    teachers = User.objects.with_role('teacher')
     
     context = {
         'page_obj': page_obj,
@@ -181,30 +219,101 @@ def quality_monitoring(request):
     if not request.user.has_role('researcher'):
         messages.error(request, '您没有权限访问此页面')
         return redirect('accounts:profile')
-    teachers = User.objects.filter(roles_json__contains='"teacher"')
+    teachers = User.objects.with_role('teacher')
     groups = Student.GROUP_CHOICES
-    latest_comment_sq = Feedback.objects.filter(
-        student=OuterRef('pk')
-    ).order_by('-reply_time').values('teacher_comment')[:1]
-    latest_teacher_sq = Feedback.objects.filter(
-        student=OuterRef('pk')
-    ).order_by('-reply_time').values('teacher_name')[:1]
+    # 各分组学员数（分组关系表单次 GROUP BY）
+    group_counts = StudentGroup.objects.counts()
+    # 最新评语/教师取自学员点评汇总（按主键连接一行），不再逐个学员关联子查询
     attention_students = (
         Student.objects.filter(is_difficult=True)
         .select_related('assigned_teacher')
+        .prefetch_related('group_memberships')
         .annotate(
-            latest_teacher_comment=Subquery(latest_comment_sq),
-            latest_teacher_name=Subquery(latest_teacher_sq),
+            latest_teacher_comment=F('feedback_summary__latest_comment'),
+            latest_teacher_name=F('feedback_summary__latest_teacher_name'),
         )
     )
     context = {
         'current_user': request.user,
         'teachers': teachers,
         'groups': groups,
+        'group_counts': group_counts,
         'attention_students': attention_students,
     }
     return render(request, 'research/quality_monitor.html', context)
 
+def _monitored_feedbacks(request):
+    """点评监控的筛选结果 (查询集, 关键词)；全文条件需确定检索后端，可能查库"""
+    # 获取本周点评
+    week_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = week_start - timedelta(days=week_start.weekday())
+    week_end = week_start + timedelta(days=7)
+    
+    # 筛选条件
+    teacher_id = request.GET.get('teacher')
+    group = request.GET.get('group')
+    keyword = request.GET.get('keyword')
+    course_from = parse_lesson_bound(request.GET.get('course_from'))
+    course_to = parse_lesson_bound(request.GET.get('course_to'))
+    student_id = request.GET.get('student')  # 新增：按学员ID筛选
+    
+    feedbacks = Feedback.objects.select_related('student', 'teacher').prefetch_related('student__group_memberships')
+    
+    # 默认显示本周点评（当没有任何筛选条件时）
+    if not any([teacher_id, group, keyword, course_from is not None, course_to is not None, student_id]):
+        feedbacks = feedbacks.filter(reply_time__gte=week_start, reply_time__lt=week_end)
+    
+    if teacher_id:
+        feedbacks = feedbacks.filter(teacher_id=teacher_id)
+    if group:
+        # 走分组关系表 (group, student) 索引连接
+        feedbacks = feedbacks.filter(student__group_memberships__group=group)
+    if student_id:
+        feedbacks = feedbacks.filter(student_id=student_id)
+    if keyword:
+        # 点评内容（评语/推送备注）走全文索引，学员昵称仍按子串匹配
+        keyword_condition = Q(student__student_name__icontains=keyword)
+        fulltext_condition = fulltext.match_q('feedback', keyword)
+        if fulltext_condition is not None:
+            keyword_condition |= fulltext_condition
+        else:
+            keyword_condition |= Q(teacher_comment__icontains=keyword)
+        feedbacks = feedbacks.filter(keyword_condition)
+    if course_from is not None or course_to is not None:
+        # 课次范围走 feedback_progress (lesson, feedback) 索引
+        feedbacks = feedbacks.filter(
+            pk__in=FeedbackProgress.objects.in_range(course_from, course_to).values('feedback_id')
+        )
+    return feedbacks, keyword
+
+
+def _monitor_row(feedback, keyword):
+    return {
+        'id': feedback.id,
+        'student': {
+            'id': feedback.student.id,
+            'student_id': feedback.student.student_id,
+            'student_name': feedback.student.student_name,
+            'groups': feedback.student.groups,
+        },
+        'teacher': {
+            'id': feedback.teacher.id,
+            'real_name': feedback.teacher.real_name,
+        },
+        'teacher_comment': feedback.teacher_comment,
+        'highlight': fulltext.snippet_for('feedback', feedback, keyword) if keyword else '',
+        'reply_time': timezone.localtime(feedback.reply_time).isoformat(),
+    }
+
+
+def _monitor_ordering(feedbacks, keyword, order):
+    """order=relevance 且可走全文索引时按相关度（未命中全文的行得分为 0）、其次时间倒序，否则按时间倒序"""
+    score = fulltext.score_expression('feedback', keyword, Feedback) if keyword and order == 'relevance' else None
+    if score is None:
+        return feedbacks.order_by('-reply_time')
+    return feedbacks.annotate(relevance=score).order_by('-relevance', '-reply_time', '-id')
+
+
 @login_required
 def feedback_monitoring(request):
     """点评记录监控 - AJAX接口"""
@@ -213,79 +322,65 @@ def feedback_monitoring(request):
     
     # 如果是AJAX请求，返回JSON数据
     if request.GET.get('ajax') == '1':
-        # 获取本周点评
-        week_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        week_start = week_start - timedelta(days=week_start.weekday())
-        week_end = week_start + timedelta(days=7)
-        
-        # 筛选条件
-        teacher_id = request.GET.get('teacher')
-        group = request.GET.get('group')
-        keyword = request.GET.get('keyword')
-        course_from = request.GET.get('course_from')
-        course_to = request.GET.get('course_to')
-        student_id = request.GET.get('student')  # 新增：按学员ID筛选
-        
-        feedbacks = Feedback.objects.select_related('student', 'teacher')
-        
-        # 默认显示本周点评（当没有任何筛选条件时）
-        if not any([teacher_id, group, keyword, course_from, course_to, student_id]):
-            feedbacks = feedbacks.filter(reply_time__gte=week_start, reply_time__lt=week_end)
-        
-        if teacher_id:
-            feedbacks = feedbacks.filter(teacher_id=teacher_id)
-        if group:
-            # 原来的groups查询
-            # feedbacks = feedbacks.filter(student__groups__contains=[group])
-            # 改为SQLite兼容的查询
-            feedbacks = feedbacks.filter(student__groups_json__icontains=f'"{group}"')
-        if student_id:
-            feedbacks = feedbacks.filter(student_id=student_id)
-        if keyword:
-            feedbacks = feedbacks.filter(
-                Q(student__student_name__icontains=keyword) |
-                Q(teacher_comment__icontains=keyword)
-            )
-        if course_from and course_to:
-            # 这里需要根据实际的课程进度字段来筛选
-            pass
-        
-        feedbacks = feedbacks.order_by('-reply_time')
-        
-        # 分页
-        paginator = Paginator(feedbacks, 20)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        feedbacks, keyword = _monitored_feedbacks(request)
+        
+        if cursor_requested(request):
+            # 游标分页：按 reply_time + id 取下一页，不做 COUNT
+            try:
+                page_obj = paginate_by_cursor(feedbacks, ['-reply_time'], request.GET['cursor'], 20)
+            except CursorError as e:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+            pagination = {'has_next': page_obj.has_next(), 'next_cursor': page_obj.next_cursor}
+        else:
+            total = count_total(feedbacks, scope=(Feedback, Student), label='research.feedback_monitoring')
+            # 按相关度排序时在已过滤的结果集内排序（关联子查询取得分），不截断结果
+            ordered = _monitor_ordering(feedbacks, keyword, request.GET.get('order'))
+            paginator = CountedPaginator(ordered, 20, total)
+            page_obj = paginator.get_page(request.GET.get('page'))
+            pagination = {'total': total.value, 'total_approximate': total.approximate}
         
         # 序列化数据（修正：只序列化当前页）
-        feedbacks_data = []
-        for feedback in page_obj:
-            feedbacks_data.append({
-                'id': feedback.id,
-                'student': {
-                    'id': feedback.student.id,
-                    'student_id': feedback.student.student_id,
-                    'student_name': feedback.student.student_name,
-                    'groups': feedback.student.groups,
-                },
-                'teacher': {
-                    'id': feedback.teacher.id,
-                    'real_name': feedback.teacher.real_name,
-                },
-                'teacher_comment': feedback.teacher_comment,
-                'reply_time': timezone.localtime(feedback.reply_time).isoformat(),
-            })
-        
         return JsonResponse({
             'success': True,
-            'feedbacks': feedbacks_data,
-            'total': paginator.count,
+            'feedbacks': [_monitor_row(feedback, keyword) for feedback in page_obj],
+            **pagination,
         })
     
     # 非AJAX请求返回模板
     messages.error(request, '您没有权限访问此页面')
     return redirect('accounts:profile')
 
+
+@login_required
+async def feedback_monitoring_async(request):
+    """点评记录监控 - AJAX接口（异步实现：页码分页时总数与当前页并发查询）"""
+    if not request.user.has_role('researcher'):
+        return JsonResponse({'success': False, 'message': '权限不足'})
+    
+    if request.GET.get('ajax') != '1':
+        await sync_to_async(messages.error)(request, '您没有权限访问此页面')
+        return redirect('accounts:profile')
+    
+    feedbacks, keyword = await sync_to_async(_monitored_feedbacks)(request)
+    
+    if cursor_requested(request):
+        try:
+            page_obj = await sync_to_async(paginate_by_cursor)(feedbacks, ['-reply_time'], request.GET['cursor'], 20)
+        except CursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        pagination = {'has_next': page_obj.has_next(), 'next_cursor': page_obj.next_cursor}
+    else:
+        total = sync_to_async(count_total)(feedbacks, scope=(Feedback, Student), label='research.feedback_monitoring')
+        ordered = await sync_to_async(_monitor_ordering)(feedbacks, keyword, request.GET.get('order'))
+        paginator, page_obj = await acounted_page(ordered, 20, request.GET.get('page'), total)
+        pagination = {'total': paginator.total.value, 'total_approximate': paginator.total.approximate}
+    
+    return JsonResponse({
+        'success': True,
+        'feedbacks': [_monitor_row(feedback, keyword) for feedback in page_obj],
+        **pagination,
+    })
+
 @login_required
 def student_search(request):
     """学员搜索功能（改为返回 JSON，以供质量监控页的前端 fetch 使用）"""
@@ -294,29 +389,40 @@ def student_search(request):
         return JsonResponse({'success': False, 'message': '权限不足'}, status=403)
     
     query = (request.GET.get('q') or '').strip()
-    if len(query) < 1:
+    course_from = parse_lesson_bound(request.GET.get('course_from'))
+    course_to = parse_lesson_bound(request.GET.get('course_to'))
+    has_range = course_from is not None or course_to is not None
+    if len(query) < 1 and not has_range:
         # 与前端最小长度校验保持一致：1 个字符即可
         return JsonResponse({'success': True, 'students': []})
     
+    students_qs = Student.objects.all()
+    if query:
+        students_qs = student_index.filter_queryset(
+            students_qs, query,
+            fields=('student_name', 'student_id', 'alias_name'),
+            extra=pinyin_q(query),
+        )
+    if has_range:
+        # 点评涉及指定课次范围的学员（feedback_progress (lesson, student) 索引）
+        students_qs = students_qs.filter(
+            pk__in=FeedbackProgress.objects.in_range(course_from, course_to).values('student_id')
+        )
+    
     # 优化：select_related('assigned_teacher') 消除 N+1，并仅加载必要字段
     students_qs = (
-        Student.objects
-        .filter(
-            Q(student_name__icontains=query) |
-            Q(student_id__icontains=query) |
-            Q(alias_name__icontains=query)
-        )
+        students_qs
         .select_related('assigned_teacher')
         .only(
             'id',
             'student_id',
             'student_name',
-            'groups_json',
             'learning_progress',
             'learning_status',
             'assigned_teacher__real_name',
         )
-        .order_by('student_name')[:50]
+        .prefetch_related('group_memberships')
+        .order_by('student_name_pinyin')[:50]
     )
     
     students_data = []
@@ -455,35 +561,24 @@ def get_task_detail(request, task_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 # get_teacher_stats函数已经在第375-402行正确修复了
-# 使用了正确的roles_json__contains查询和teacher.real_name字段
+# 使用 roles_mask 索引查询教师和 teacher.real_name 字段
 @login_required
+@cached_view('research.teacher_stats', tags=[TeachingTask], daily=True)
 def get_teacher_stats(request):
     try:
-        # 修复：单次聚合统计，避免按老师循环产生 N+1
-        teachers_qs = (
-            User.objects.filter(roles_json__contains='"teacher"')
-            .annotate(
-                total_tasks=Count('teachingtask'),
-                pending_tasks=Count('teachingtask', filter=Q(teachingtask__status='pending')),
-                completed_tasks=Count('teachingtask', filter=Q(teachingtask__status='completed')),
-                total_students=Count('teachingtask__student', distinct=True),
-            )
-            .only('id', 'real_name', 'username')
-        )
+        # 读取增量维护的统计表（见 apps.research.workload），耗时与任务历史规模无关
+        windows = workload.DEFAULT_WINDOWS
+        days = request.GET.get('days')
+        if days:
+            try:
+                days = int(days)
+            except ValueError:
+                days = 0
+            if not 1 <= days <= workload.RETENTION_DAYS:
+                return JsonResponse({'success': False, 'message': f'days 需为 1-{workload.RETENTION_DAYS} 之间的整数'})
+            windows = (*windows, days) if days not in windows else windows
 
-        stats = [
-            {
-                'teacher_id': t.id,
-                'teacher_name': t.real_name or t.username,
-                'total_tasks': t.total_tasks,
-                'pending_tasks': t.pending_tasks,
-                'completed_tasks': t.completed_tasks,
-                'total_students': t.total_students,
-            }
-            for t in teachers_qs
-        ]
-
-        return JsonResponse({'success': True, 'data': stats})
+        return JsonResponse({'success': True, 'data': workload.teacher_stats(windows)})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
@@ -526,7 +621,8 @@ def export_assignment_results(request):
         y_position = height - 100
         p.setFont("Helvetica", 12)
         
-        for task in tasks:
+        # 服务端游标逐块读取（select_related 的学员/教师随行取回）
+        for task in db.stream(tasks):
             if y_position < 100:  # 换页
                 p.showPage()
                 y_position = height - 50
@@ -600,6 +696,7 @@ def use_history_assignment(request, task_id):
 
 # 在文件末尾添加这个函数
 @login_required
+@cached_view('research.task_history', tags=[TeachingTask, Student])
 def get_task_history_api(request):
     """获取任务分配历史的API接口"""
     if not request.user.has_role('researcher'):
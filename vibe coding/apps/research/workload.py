@@ -0,0 +1,208 @@
+"""教师工作量统计（增量维护）
+
+原先 get_teacher_stats 每次都把全部教师与全部教学任务连接后做四个 Count 聚合，任务历史越长越慢，
+也无法做「近 N 天完成数」这类时间窗口统计。这里维护两张冗余表：
+
+- TeacherWorkload：每位教师一行，各状态任务数与涉及学员数
+- TeacherDailyCompletion：教师 × 本地日期的完成数分桶，滚动窗口只需累加窗口内的桶
+
+任务状态流转时以 F() 增量更新：单条保存/删除走信号（research/signals.py），
+bulk_create 与 QuerySet.update 等批量写入处调用 record_created / update_status。
+涉及学员数（去重）在任务增删时按教师重算一次。reconcile_teacher_stats 命令定期整体校准并清理过期分桶。
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.common import db
+from .models import TeacherDailyCompletion, TeacherWorkload, TeachingTask
+
+STATUS_FIELDS = {
+    'pending': 'pending_tasks',
+    'in_progress': 'in_progress_tasks',
+    'completed': 'completed_tasks',
+    'cancelled': 'cancelled_tasks',
+}
+
+# 完成数分桶保留天数（时间窗口统计的上限）
+RETENTION_DAYS = getattr(settings, 'TEACHER_STATS_RETENTION_DAYS', 90)
+
+# 接口默认返回的滚动窗口
+DEFAULT_WINDOWS = (7, 30)
+
+
+def _completion_day(completed_at):
+    return timezone.localdate(completed_at) if completed_at else None
+
+
+class Changes:
+    """一批状态流转的增量汇总；状态为 (status, completed_at)，None 表示新建前/删除后"""
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+        self.completions = Counter()
+        self.membership = set()
+        # 有新增状态的教师才需要补建统计行；纯扣减（如随教师级联删除）只更新已有行
+        self.growing = set()
+
+    def add(self, teacher_id, old, new, n=1):
+        for state, sign in ((old, -n), (new, n)):
+            if state is None:
+                continue
+            status, completed_at = state
+            field = STATUS_FIELDS.get(status)
+            if field:
+                self.counts[teacher_id][field] += sign
+            day = _completion_day(completed_at) if status == 'completed' else None
+            if day:
+                self.completions[(teacher_id, day)] += sign
+        if old is None or new is None:
+            self.membership.add(teacher_id)
+        if new is not None:
+            self.growing.add(teacher_id)
+
+    def apply(self):
+        """在当前事务内写入所有增量"""
+        teachers = set(self.counts) | self.membership
+        if not teachers:
+            return
+        with transaction.atomic():
+            TeacherWorkload.objects.bulk_create(
+                [TeacherWorkload(teacher_id=t) for t in self.growing], ignore_conflicts=True
+            )
+            for teacher_id, deltas in self.counts.items():
+                updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+                if updates:
+                    TeacherWorkload.objects.filter(pk=teacher_id).update(**updates, updated_at=timezone.now())
+
+            if self.membership:
+                students = dict(
+                    TeachingTask.objects.filter(teacher_id__in=self.membership)
+                    .values('teacher_id').annotate(n=Count('student_id', distinct=True)).order_by()
+                    .values_list('teacher_id', 'n')
+                )
+                for teacher_id in self.membership:
+                    TeacherWorkload.objects.filter(pk=teacher_id).update(total_students=students.get(teacher_id, 0))
+
+            buckets = {key: delta for key, delta in self.completions.items() if delta}
+            if buckets:
+                TeacherDailyCompletion.objects.bulk_create(
+                    [TeacherDailyCompletion(teacher_id=t, day=day) for (t, day), delta in buckets.items() if delta > 0],
+                    ignore_conflicts=True,
+                )
+                for (teacher_id, day), delta in buckets.items():
+                    TeacherDailyCompletion.objects.filter(teacher_id=teacher_id, day=day).update(
+                        completed=F('completed') + delta
+                    )
+
+
+def record_transition(teacher_id, old, new):
+    changes = Changes()
+    changes.add(teacher_id, old, new)
+    changes.apply()
+
+
+def record_created(tasks):
+    """bulk_create 之后调用"""
+    changes = Changes()
+    for task in tasks:
+        changes.add(task.teacher_id, None, (task.status, task.completed_at))
+    changes.apply()
+
+
+def update_status(queryset, status, **fields):
+    """批量改状态（QuerySet.update）并记录流转；返回更新行数"""
+    with db.write_transaction():
+        before = list(
+            queryset.exclude(status=status)
+            .values('teacher_id', 'status', 'completed_at').annotate(n=Count('pk')).order_by()
+        )
+        updated = queryset.update(status=status, **fields)
+        changes = Changes()
+        new_state = (status, fields.get('completed_at'))
+        for row in before:
+            changes.add(row['teacher_id'], (row['status'], row['completed_at']), new_state, row['n'])
+        changes.apply()
+    return updated
+
+
+# ---------- 读取 ----------
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def teacher_stats(windows=DEFAULT_WINDOWS):
+    """全部教师的统计行；windows 为滚动窗口天数（不超过 RETENTION_DAYS），查询次数与任务量无关"""
+    today = timezone.localdate()
+    starts = {n: today - timedelta(days=n - 1) for n in windows}
+    completions = {}
+    if starts:
+        completions = {
+            row['teacher_id']: row
+            for row in TeacherDailyCompletion.objects.filter(day__gte=min(starts.values()))
+            .values('teacher_id')
+            .annotate(**{
+                f'completed_{n}d': Sum('completed', filter=Q(day__gte=start))
+                for n, start in starts.items()
+            })
+            .order_by()
+        }
+
+    rows = []
+    for teacher in User.objects.with_role('teacher').select_related('workload').order_by('id'):
+        try:
+            workload = teacher.workload
+        except TeacherWorkload.DoesNotExist:
+            workload = TeacherWorkload(teacher=teacher)
+        windowed = completions.get(teacher.id, {})
+        row = {
+            'teacher_id': teacher.id,
+            'teacher_name': teacher.real_name or teacher.username,
+            'total_tasks': workload.total_tasks,
+            'open_tasks': workload.open_tasks,
+            'pending_tasks': workload.pending_tasks,
+            'in_progress_tasks': workload.in_progress_tasks,
+            'completed_tasks': workload.completed_tasks,
+            'cancelled_tasks': workload.cancelled_tasks,
+            'total_students': workload.total_students,
+        }
+        for n in windows:
+            row[f'completed_{n}d'] = windowed.get(f'completed_{n}d') or 0
+        rows.append(row)
+    return rows
+
+
+# ---------- 校准 ----------
+
+def reconcile():
+    """按教学任务整体重算统计与保留期内的完成分桶，并清理过期分桶；返回 (教师数, 分桶数)"""
+    since = timezone.localdate() - timedelta(days=RETENTION_DAYS - 1)
+    aggregates = {
+        field: Count('pk', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()
+    }
+    with db.write_transaction():
+        workloads = [
+            TeacherWorkload(teacher_id=row.pop('teacher_id'), total_students=row.pop('students'), **row)
+            for row in TeachingTask.objects.values('teacher_id')
+            .annotate(students=Count('student_id', distinct=True), **aggregates)
+            .order_by()
+        ]
+        TeacherWorkload.objects.all().delete()
+        TeacherWorkload.objects.bulk_create(workloads, batch_size=500)
+
+        buckets = [
+            TeacherDailyCompletion(teacher_id=row['teacher_id'], day=row['day'], completed=row['n'])
+            for row in TeachingTask.objects.filter(status='completed', completed_at__gte=_day_start(since))
+            .annotate(day=TruncDate('completed_at', tzinfo=timezone.get_current_timezone()))
+            .values('teacher_id', 'day').annotate(n=Count('pk')).order_by()
+        ]
+        TeacherDailyCompletion.objects.all().delete()
+        TeacherDailyCompletion.objects.bulk_create(buckets, batch_size=1000)
+    return len(workloads), len(buckets)
@@ -1,11 +1,28 @@
+import json
+
 from django.contrib import admin
-from .models import Student
+from .models import Student, StudentGroup
+
+
+class GroupListFilter(admin.SimpleListFilter):
+    """按分组过滤（走分组关系表索引）"""
+    title = '分组'
+    parameter_name = 'group'
+
+    def lookups(self, request, model_admin):
+        counts = StudentGroup.objects.counts()
+        return [(group, f'{group} ({total})') for group, total in sorted(counts.items())]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(group_memberships__group=self.value())
+        return queryset
+
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ('student_name', 'student_id', 'status', 'learning_hours', 'created_at')
-    # 移除groups过滤器，因为JSON字段不支持直接过滤
-    list_filter = ('status', 'learning_status', 'created_at')
+    list_filter = ('status', 'learning_status', GroupListFilter, 'created_at')
     search_fields = ('student_name', 'student_id', 'external_user_id', 'alias_name')
     readonly_fields = ('created_at', 'updated_at')
     
@@ -22,4 +39,13 @@ class StudentAdmin(admin.ModelAdmin):
         ('时间信息', {
             'fields': ('created_at', 'updated_at')
         }),
-    )
\ No newline at end of file
+    )
+
+    def save_model(self, request, obj, form, change):
+        # 后台直接编辑 groups_json 时，经 groups 属性同步到分组关系表
+        if 'groups_json' in form.changed_data:
+            try:
+                obj.groups = json.loads(obj.groups_json or '[]')
+            except (json.JSONDecodeError, TypeError):
+                obj.groups = []
+        super().save_model(request, obj, form, change)
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.students'
-    verbose_name = '学员管理'
\ No newline at end of file
+    verbose_name = '学员管理'
+
+    def ready(self):
+        # 注册信号：保持学员搜索索引与数据同步
+        from . import signals  # noqa: F401
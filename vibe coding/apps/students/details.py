@@ -0,0 +1,212 @@
+"""学员详情接口的输出字段（运营 / 教学两个详情接口共用）
+
+字段按需加载（见 apps.common.projection）：学员列只加载所选字段依赖的列；最近点评、
+最近回访只在请求了依赖它们的字段时才查询，且每个学员实例只查询一次。
+
+批量详情（ids=，最多 BATCH_LIMIT 个）：prefetch_recent 对全部学员各用一条窗口函数查询
+（ROW_NUMBER() OVER (PARTITION BY student ORDER BY 时间 DESC) <= RECENT_LIMIT）取最近点评
+与回访，不随学员数增加查询次数。
+
+异步详情（arender，ASGI 下的异步视图使用）：学员行、最近点评、最近回访三条查询并发发出。
+
+两种响应模式：
+- 默认（v1）：全部字段，含旧前端使用的别名键（name / nickname / current_progress /
+  total_study_time）；运营详情另以 data 键重复返回一份
+- 精简（v=2）：去掉别名键（改为 alias_name），只返回 student 一个键
+"""
+import asyncio
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+
+from apps.common import projection, tags
+from apps.common.aio import alist
+from apps.common.projection import OutputField
+from apps.operations.models import VisitRecord
+from apps.teaching.models import Feedback
+from .models import Student
+
+RECENT_LIMIT = 5
+
+# 批量详情单次最多学员数
+BATCH_LIMIT = 50
+
+FEEDBACK_COLUMNS = ('id', 'student_id', 'teacher_name', 'progress_json', 'teacher_comment', 'reply_time')
+
+
+class BatchError(ValueError):
+    """批量详情的 ids 参数无效"""
+
+
+def lean_requested(request):
+    """是否请求精简（v2）响应"""
+    return request.GET.get('v') == '2'
+
+
+def _recent_feedbacks_qs(**lookup):
+    return Feedback.objects.filter(**lookup).only(*FEEDBACK_COLUMNS).order_by('-reply_time', '-id')[:RECENT_LIMIT]
+
+
+def _recent_visit_notes_qs(**lookup):
+    return (
+        VisitRecord.objects.filter(**lookup)
+        .order_by('-visit_time', '-id')
+        .values_list('visit_note', flat=True)[:RECENT_LIMIT]
+    )
+
+
+def recent_feedbacks(student):
+    """最近 RECENT_LIMIT 条点评（每个实例只查询一次）"""
+    if '_recent_feedbacks' not in student.__dict__:
+        student.__dict__['_recent_feedbacks'] = list(_recent_feedbacks_qs(student=student))
+    return student.__dict__['_recent_feedbacks']
+
+
+def recent_visit_notes(student):
+    """最近 RECENT_LIMIT 条回访记录文本（每个实例只查询一次）"""
+    if '_recent_visit_notes' not in student.__dict__:
+        student.__dict__['_recent_visit_notes'] = list(_recent_visit_notes_qs(student=student))
+    return student.__dict__['_recent_visit_notes']
+
+
+def _feedback_row(feedback):
+    return {
+        'teacher_name': feedback.teacher_name,
+        'lesson_progress': ','.join(map(str, feedback.progress)),
+        'teacher_comment': feedback.teacher_comment,
+        'feedback_time': timezone.localtime(feedback.reply_time).strftime('%Y-%m-%d %H:%M'),
+    }
+
+
+FIELDS = {
+    'student_id': OutputField(lambda s: s.student_id, columns=('student_id',)),
+    'student_name': OutputField(lambda s: s.student_name, columns=('student_name',)),
+    'alias_name': OutputField(lambda s: s.alias_name, columns=('alias_name',)),
+    'groups': OutputField(lambda s: s.groups, prefetch=('group_memberships',)),
+    'progress': OutputField(lambda s: s.progress, columns=('progress_json',)),
+    'status': OutputField(lambda s: s.status, columns=('status',)),
+    'learning_hours': OutputField(lambda s: s.learning_hours, columns=('learning_hours',)),
+    'visit_count': OutputField(lambda s: s.visit_count, columns=('visit_count',)),
+    'feedback_comments': OutputField(
+        lambda s: [fb.teacher_comment for fb in recent_feedbacks(s) if fb.teacher_comment][:RECENT_LIMIT]
+    ),
+    'recent_feedbacks': OutputField(lambda s: [_feedback_row(fb) for fb in recent_feedbacks(s)]),
+    'research_note': OutputField(lambda s: s.research_note or '', columns=('research_note',)),
+    'ops_note': OutputField(lambda s: s.ops_note or '', columns=('ops_note',)),
+    'visit_notes': OutputField(recent_visit_notes),
+    'created_at': OutputField(lambda s: s.created_at.strftime('%Y-%m-%d %H:%M'), columns=('created_at',)),
+    # 旧字段（向后兼容）
+    'name': OutputField(lambda s: s.student_name, columns=('student_name',)),
+    'nickname': OutputField(lambda s: s.alias_name, columns=('alias_name',)),
+    'current_progress': OutputField(lambda s: s.current_progress, columns=('progress_json',)),
+    'total_study_time': OutputField(lambda s: s.total_study_time, columns=('total_study_time',)),
+}
+
+LEGACY_FIELDS = ('name', 'nickname', 'current_progress', 'total_study_time')
+
+# 运营详情（v1 字段与原接口一致）
+OPS_FIELDS = (
+    'student_name', 'groups', 'progress', 'status', 'learning_hours', 'visit_count',
+    'feedback_comments', 'research_note', 'ops_note', 'visit_notes',
+    'student_id', 'name', 'nickname', 'current_progress', 'total_study_time', 'created_at',
+)
+
+# 教学详情（v1 字段与原接口一致）
+TEACHING_FIELDS = (
+    'student_name', 'groups', 'progress', 'status', 'learning_hours',
+    'feedback_comments', 'research_note', 'ops_note', 'visit_notes',
+    'student_id', 'name', 'nickname', 'current_progress', 'total_study_time', 'recent_feedbacks',
+)
+
+
+def available_fields(names, lean):
+    """某接口可选的字段表；精简模式去掉别名键、补上 alias_name"""
+    if lean:
+        names = tuple(n for n in names if n not in LEGACY_FIELDS) + ('alias_name',)
+    return {name: FIELDS[name] for name in names}
+
+
+# ---------- 批量详情 ----------
+
+def parse_ids(request, convert=str):
+    """ids=a,b,c -> 去重后的列表（保持顺序）"""
+    raw = [value.strip() for value in request.GET.get('ids', '').split(',')]
+    ids = list(dict.fromkeys(value for value in raw if value))
+    if not ids:
+        raise BatchError('请提供 ids')
+    if len(ids) > BATCH_LIMIT:
+        raise BatchError(f'一次最多查询 {BATCH_LIMIT} 个学员')
+    try:
+        return [convert(value) for value in ids]
+    except ValueError:
+        raise BatchError('ids 格式错误')
+
+
+def batch_tags(lookup, convert=str):
+    """批量详情的缓存标签：各学员标签；有不存在的学员时加学员模型标签（新建后失效）"""
+    def resolve(request):
+        try:
+            ids = parse_ids(request, convert)
+        except BatchError:
+            return []
+        pks = list(Student.objects.filter(**{f'{lookup}__in': ids}).values_list('pk', flat=True))
+        resolved = [tags.student_tag(pk) for pk in pks]
+        if len(pks) < len(ids):
+            resolved.append(tags.model_tag(Student))
+        return resolved
+    return resolve
+
+
+def _ranked(queryset, order_field):
+    """每个学员按 order_field 倒序的前 RECENT_LIMIT 行（窗口函数，一条 SQL）"""
+    return queryset.annotate(
+        recent_rank=Window(
+            RowNumber(),
+            partition_by=[F('student_id')],
+            order_by=[F(order_field).desc(), F('id').desc()],
+        )
+    ).filter(recent_rank__lte=RECENT_LIMIT).order_by('student_id', 'recent_rank')
+
+
+def prefetch_recent(students, names):
+    """为一批学员填充最近点评/回访（仅在 names 中有依赖它们的字段时查询）"""
+    ids = [s.pk for s in students]
+    if not ids:
+        return
+    if {'feedback_comments', 'recent_feedbacks'}.intersection(names):
+        grouped = defaultdict(list)
+        for feedback in _ranked(Feedback.objects.filter(student_id__in=ids).only(*FEEDBACK_COLUMNS), 'reply_time'):
+            grouped[feedback.student_id].append(feedback)
+        for student in students:
+            student.__dict__['_recent_feedbacks'] = grouped.get(student.pk, [])
+    if 'visit_notes' in names:
+        grouped = defaultdict(list)
+        rows = _ranked(VisitRecord.objects.filter(student_id__in=ids), 'visit_time').values_list('student_id', 'visit_note')
+        for student_id, note in rows:
+            grouped[student_id].append(note)
+        for student in students:
+            student.__dict__['_recent_visit_notes'] = grouped.get(student.pk, [])
+
+
+# ---------- 异步详情 ----------
+
+async def arender(lookup, available, names):
+    """按 lookup（如 {'id': 1} / {'student_id': 'S001'}）渲染单个学员详情
+
+    学员行与所需的最近点评/回访并发查询（后两者按学员条件关联过滤，不等待学员行）；
+    学员不存在时抛出 Http404，与同步版本的 get_object_or_404 一致。
+    """
+    related = {f'student__{key}': value for key, value in lookup.items()}
+    jobs = {'student': aget_object_or_404(projection.load(Student.objects.all(), available, names), **lookup)}
+    if {'feedback_comments', 'recent_feedbacks'}.intersection(names):
+        jobs['_recent_feedbacks'] = alist(_recent_feedbacks_qs(**related))
+    if 'visit_notes' in names:
+        jobs['_recent_visit_notes'] = alist(_recent_visit_notes_qs(**related))
+
+    results = dict(zip(jobs, await asyncio.gather(*jobs.values())))
+    student = results.pop('student')
+    student.__dict__.update(results)
+    return projection.render(student, available, names)
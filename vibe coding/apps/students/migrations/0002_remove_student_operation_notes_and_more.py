@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='student',
+            name='operation_notes',
+        ),
+        migrations.RemoveField(
+            model_name='student',
+            name='research_notes',
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['updated_at'], name='students_updated_3a23b9_idx'),
+        ),
+    ]
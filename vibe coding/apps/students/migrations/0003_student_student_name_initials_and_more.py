@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+from apps.common.pinyin import backfill_name_pinyin
+
+
+def backfill_pinyin(apps, schema_editor):
+    backfill_name_pinyin(apps.get_model('students', 'Student'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_remove_student_operation_notes_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='student_name_initials',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='学员昵称首字母'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='student_name_pinyin',
+            field=models.CharField(blank=True, db_index=True, max_length=255, verbose_name='学员昵称拼音'),
+        ),
+        migrations.RunPython(backfill_pinyin, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:50
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_student_groups(apps, schema_editor):
+    """由 groups_json 批量回填分组关系表"""
+    Student = apps.get_model('students', 'Student')
+    StudentGroup = apps.get_model('students', 'StudentGroup')
+    batch = []
+    rows = Student.objects.values_list('pk', 'groups_json').iterator(chunk_size=2000)
+    for pk, groups_json in rows:
+        try:
+            groups = json.loads(groups_json or '[]')
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if not isinstance(groups, list):
+            continue
+        groups = [g for g in dict.fromkeys(str(g).strip() for g in groups) if g]
+        batch.extend(
+            StudentGroup(student_id=pk, group=group[:50], position=i)
+            for i, group in enumerate(groups)
+        )
+        if len(batch) >= 5000:
+            StudentGroup.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        StudentGroup.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_student_name_initials_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=50, verbose_name='分组')),
+                ('position', models.PositiveSmallIntegerField(default=0, verbose_name='排序')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_memberships', to='students.student', verbose_name='学员')),
+            ],
+            options={
+                'verbose_name': '学员分组',
+                'verbose_name_plural': '学员分组',
+                'db_table': 'student_groups',
+                'ordering': ['position', 'id'],
+                'indexes': [models.Index(fields=['group', 'student'], name='student_gro_group_f2b249_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='studentgroup',
+            constraint=models.UniqueConstraint(fields=('student', 'group'), name='student_groups_student_group_uniq'),
+        ),
+        migrations.RunPython(backfill_student_groups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_studentgroup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='visit_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='累计回访次数'),
+        ),
+    ]
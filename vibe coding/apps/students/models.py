@@ -1,7 +1,8 @@
-from django.db import models
-import json
+from django.db import models, transaction
+from apps.common.jsoncodec import JSONProperty, dumps as json_dumps
+from apps.common.models import CounterFieldsMixin, StudentNamePinyinMixin
 
-class Student(models.Model):
+class Student(CounterFieldsMixin, StudentNamePinyinMixin):
     """学员信息模型"""
     GROUP_CHOICES = [
         ('basic', '基础班'),
@@ -70,6 +71,9 @@ class Student(models.Model):
     # 额外字段
     learning_progress = models.IntegerField(default=0, verbose_name='学习进度（课程数）')
     total_study_time = models.FloatField(default=0.0, verbose_name='总学习时长')
+    # 累计回访次数（回访写入时 F() 原子自增，reconcile_visit_counts 可整体校准）
+    visit_count = models.PositiveIntegerField(default=0, verbose_name='累计回访次数')
+    counter_fields = ('visit_count',)
    
     
     # 时间字段
@@ -86,39 +90,43 @@ class Student(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['learning_status']),
             models.Index(fields=['is_difficult']),
+            # 搜索索引跨进程增量刷新按 updated_at 水位线读取
+            models.Index(fields=['updated_at']),
+            # 学员列表游标分页：各排序键 + id
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['student_name_pinyin', 'id']),
+            models.Index(fields=['learning_progress', 'id']),
+            models.Index(fields=['total_study_time', 'id']),
         ]
     
     def __str__(self):
         return f"{self.student_name} ({self.student_id})"
     
+    # 已赋值但尚未保存到分组关系表的分组列表
+    _pending_groups = None
+    
     @property
     def groups(self):
-        """获取分组列表"""
-        try:
-            return json.loads(self.groups_json)
-        except (json.JSONDecodeError, TypeError):
+        """获取分组列表（读取分组关系表；列表接口请 prefetch_related('group_memberships')）"""
+        if self._pending_groups is not None:
+            return list(self._pending_groups)
+        if self.pk is None:
             return []
+        return [m.group for m in self.group_memberships.all()]
     
     @groups.setter
     def groups(self, value):
-        """设置分组列表"""
-        self.groups_json = json.dumps(value if value else [])
+        """设置分组列表，保存时写入分组关系表；groups_json 仅作为兼容镜像保留"""
+        groups = [g for g in dict.fromkeys(value or []) if g]
+        self._pending_groups = groups
+        self.groups_json = json_dumps(groups)
     
-    @property
-    def progress(self):
-        """获取学习进度列表"""
-        try:
-            return json.loads(self.progress_json)
-        except (json.JSONDecodeError, TypeError):
-            return []
+    # 学习进度列表（每个实例只解码一次），赋值时同步 learning_progress
+    progress = JSONProperty('progress_json', on_set='_sync_learning_progress', doc='学习进度列表')
     
-    @progress.setter
-    def progress(self, value):
-        """设置学习进度列表，同时同步 learning_progress（以 progress_json 为事实源）"""
-        import json as _json
-        self.progress_json = _json.dumps(value if value else [])
+    def _sync_learning_progress(self, lst):
+        """同步 learning_progress（以 progress_json 为事实源）"""
         try:
-            lst = value if isinstance(value, list) else []
             current = lst[-1] if lst else 0
             if isinstance(current, str) and current.strip().isdigit():
                 self.learning_progress = int(current.strip())
@@ -148,9 +156,17 @@ class Student(models.Model):
     
     @property
     def latest_feedback(self):
-        """最新反馈"""
-        from apps.teaching.models import Feedback
-        return Feedback.objects.filter(student=self).order_by('-reply_time').first()
+        """最新反馈（按点评汇总记录的主键读取，每个实例只查询一次）"""
+        if '_latest_feedback' not in self.__dict__:
+            from apps.teaching.models import Feedback, StudentFeedbackSummary
+            try:
+                feedback_id = self.feedback_summary.latest_feedback_id
+            except StudentFeedbackSummary.DoesNotExist:
+                feedback_id = None
+            self.__dict__['_latest_feedback'] = (
+                Feedback.objects.filter(pk=feedback_id).first() if feedback_id else None
+            )
+        return self.__dict__['_latest_feedback']
     
     def get_learning_status_display_custom(self):
         """自定义学习状态显示"""
@@ -158,8 +174,14 @@ class Student(models.Model):
         return status_dict.get(self.learning_status, '未知')
     
     def save(self, *args, **kwargs):
-        """保存时的额外处理"""
-        super().save(*args, **kwargs)
+        """保存时的额外处理：同步分组关系表（与学员行同一事务，groups_json 与分组行不会不一致）"""
+        if self._pending_groups is None:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            StudentGroup.objects.replace_for(self, self._pending_groups)
+        self._pending_groups = None
     
     def get_difficulty_source_display(self):
         """获取困难来源显示名称"""
@@ -168,4 +190,52 @@ class Student(models.Model):
             'teacher': '教师推送', 
             'manual': '教研选择',
         }
-        return source_dict.get(self.difficulty_source, '未知')
\ No newline at end of file
+        return source_dict.get(self.difficulty_source, '未知')
+
+
+class StudentGroupQuerySet(models.QuerySet):
+    def replace_for(self, student, groups):
+        """整体替换某个学员的分组（删除与重建在同一事务内）"""
+        with transaction.atomic(using=self.db):
+            self.filter(student=student).delete()
+            self.bulk_create([
+                StudentGroup(student=student, group=group, position=i)
+                for i, group in enumerate(groups)
+            ])
+        # 刷新 prefetch 缓存，保证随后读取 student.groups 得到新值
+        prefetched = getattr(student, '_prefetched_objects_cache', None)
+        if prefetched:
+            prefetched.pop('group_memberships', None)
+
+    def counts(self):
+        """各分组学员数（单次 GROUP BY）"""
+        return dict(self.values_list('group').annotate(total=models.Count('id')).order_by())
+
+
+class StudentGroup(models.Model):
+    """学员分组关系（由 groups_json 规范化而来，支持按分组走索引过滤与统计）"""
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='group_memberships',
+        verbose_name='学员'
+    )
+    group = models.CharField(max_length=50, verbose_name='分组')
+    position = models.PositiveSmallIntegerField(default=0, verbose_name='排序')
+
+    objects = StudentGroupQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = '学员分组'
+        verbose_name_plural = '学员分组'
+        db_table = 'student_groups'
+        ordering = ['position', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'group'], name='student_groups_student_group_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['group', 'student']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.group}"
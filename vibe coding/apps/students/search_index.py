@@ -0,0 +1,236 @@
+"""学员目录 n-gram 内存索引
+
+各角色的学员搜索接口（教师、教研、运营）原先每次按键都对 students 表做多列 icontains，
+无法利用索引。这里在每个 worker 进程内维护一份紧凑的 n-gram 倒排索引：
+
+- 索引字段：student_name / alias_name / student_id / external_user_id（统一小写）
+- 倒排表：bigram（以及非 ASCII 单字）-> array('I') 槽位列表，槽位再映射到主键
+- 本进程的写入通过 Student 的 save/delete 信号实时同步（事务提交后生效）
+- 其他 worker 的写入通过 updated_at 水位线定期增量补齐；删除由最终的 pk__in 查询兜底。
+  updated_at 在保存时取值、提交后才可见，晚提交的行可能早于已前进的水位线，因此每次补齐都
+  回看水位线之前 SETTLE_SECONDS 秒内的行（同 apps.common.events 的已定序窗口）
+"""
+import threading
+import time
+from array import array
+from datetime import timedelta
+
+from django.db.models import Q
+
+from apps.common import db
+
+# 参与索引的字段
+INDEXED_FIELDS = ('student_name', 'alias_name', 'student_id', 'external_user_id')
+
+# 候选结果超过该数量时认为区分度不足，回退数据库查询（同时避开 SQLite 参数个数上限）
+MAX_CANDIDATES = 900
+
+# 跨进程增量刷新间隔（秒）
+REFRESH_INTERVAL = 5.0
+
+# 增量刷新回看的秒数：保存到提交之间超过该时长的写入要等下次全量构建才能补齐
+SETTLE_SECONDS = 30
+
+# 失效槽位占比超过该值时在内存中重排，回收空间
+COMPACT_RATIO = 0.25
+
+
+def _grams(text):
+    """生成文本的 bigram 以及非 ASCII 单字（ASCII 单字区分度太低，不建倒排）"""
+    grams = set()
+    for i, ch in enumerate(text):
+        if not ch.isascii():
+            grams.add(ch)
+        if i + 1 < len(text):
+            grams.add(text[i:i + 2])
+    return grams
+
+
+def _normalize(value):
+    return (value or '').strip().lower()
+
+
+class StudentSearchIndex:
+    """进程内学员目录索引（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = False
+        self._watermark = None
+        self._last_refresh = 0.0
+        self._reset()
+
+    def _reset(self):
+        self._pks = array('q')        # 槽位 -> 主键
+        self._statuses = []           # 槽位 -> 学员状态
+        self._texts = []              # 槽位 -> 各字段小写文本元组，None 表示已失效
+        self._slot_by_pk = {}
+        self._postings = {}           # gram -> array('I') 槽位列表
+        self._dead = 0
+
+    # ---------- 维护 ----------
+
+    def _add(self, pk, status, values):
+        slot = len(self._pks)
+        texts = tuple(_normalize(v) for v in values)
+        self._pks.append(pk)
+        self._statuses.append(status)
+        self._texts.append(texts)
+        self._slot_by_pk[pk] = slot
+        grams = set()
+        for text in texts:
+            grams |= _grams(text)
+        postings = self._postings
+        for gram in grams:
+            bucket = postings.get(gram)
+            if bucket is None:
+                bucket = postings[gram] = array('I')
+            bucket.append(slot)
+
+    def _discard(self, pk):
+        slot = self._slot_by_pk.pop(pk, None)
+        if slot is not None:
+            self._texts[slot] = None
+            self._dead += 1
+
+    def _compact_if_needed(self):
+        if len(self._pks) < 1000 or self._dead < len(self._pks) * COMPACT_RATIO:
+            return
+        live = [
+            (self._pks[slot], self._statuses[slot], texts)
+            for slot, texts in enumerate(self._texts)
+            if texts is not None
+        ]
+        self._reset()
+        for pk, status, texts in live:
+            self._add(pk, status, texts)
+
+    def _upsert(self, pk, status, values):
+        self._discard(pk)
+        self._add(pk, status, values)
+
+    def build(self):
+        """从数据库全量构建索引"""
+        from .models import Student
+
+        with self._lock:
+            self._reset()
+            watermark = None
+            rows = db.stream(
+                Student.objects.order_by('pk').values_list('pk', 'status', 'updated_at', *INDEXED_FIELDS),
+                chunk_size=5000,
+            )
+            for pk, status, updated_at, *values in rows:
+                self._add(pk, status, values)
+                if updated_at and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+            self._watermark = watermark
+            self._last_refresh = time.monotonic()
+            self._ready = True
+
+    def refresh(self):
+        """按 updated_at 水位线（回看 SETTLE_SECONDS 秒）增量补齐其他进程的写入"""
+        from .models import Student
+
+        with self._lock:
+            if self._watermark is None:
+                self.build()
+                return
+            rows = (
+                Student.objects.filter(updated_at__gte=self._watermark - timedelta(seconds=SETTLE_SECONDS))
+                .values_list('pk', 'status', 'updated_at', *INDEXED_FIELDS)
+            )
+            for pk, status, updated_at, *values in rows:
+                self._upsert(pk, status, values)
+                if updated_at > self._watermark:
+                    self._watermark = updated_at
+            self._compact_if_needed()
+            self._last_refresh = time.monotonic()
+
+    def _ensure_ready(self):
+        if not self._ready:
+            self.build()
+        elif time.monotonic() - self._last_refresh > REFRESH_INTERVAL:
+            self.refresh()
+
+    def update_student(self, student):
+        """同步单个学员（信号调用；索引尚未构建时无需处理）"""
+        if not self._ready:
+            return
+        with self._lock:
+            self._upsert(
+                student.pk,
+                student.status,
+                [getattr(student, field) for field in INDEXED_FIELDS],
+            )
+            self._compact_if_needed()
+
+    def remove_student(self, pk):
+        if not self._ready:
+            return
+        with self._lock:
+            self._discard(pk)
+            self._compact_if_needed()
+
+    def invalidate(self):
+        """批量写入（bulk_create / update）之后调用，下次查询时重建"""
+        with self._lock:
+            self._ready = False
+            self._reset()
+
+    # ---------- 查询 ----------
+
+    def search(self, query, fields=INDEXED_FIELDS, statuses=None, limit=None):
+        """返回匹配学员主键列表；查询无法走索引（单个 ASCII 字符）时返回 None"""
+        q = _normalize(query)
+        if not q:
+            return []
+        if len(q) == 1 and q.isascii():
+            return None
+
+        self._ensure_ready()
+        field_idx = [INDEXED_FIELDS.index(f) for f in fields]
+        with self._lock:
+            # 取倒排最短的 gram 作为候选集，再逐条校验子串
+            keys = [q] if len(q) == 1 else [q[i:i + 2] for i in range(len(q) - 1)]
+            candidates = None
+            for key in keys:
+                bucket = self._postings.get(key)
+                if bucket is None:
+                    return []
+                if candidates is None or len(bucket) < len(candidates):
+                    candidates = bucket
+
+            pks = []
+            texts, statuses_by_slot, slot_pks = self._texts, self._statuses, self._pks
+            for slot in candidates:
+                row = texts[slot]
+                if row is None:
+                    continue
+                if statuses is not None and statuses_by_slot[slot] not in statuses:
+                    continue
+                if any(q in row[i] for i in field_idx):
+                    pks.append(slot_pks[slot])
+                    if limit is not None and len(pks) >= limit:
+                        break
+            return pks
+
+    def filter_queryset(self, queryset, query, fields=INDEXED_FIELDS, statuses=None, limit=None, extra=None):
+        """用索引结果过滤 Student 查询集；候选过多或无法走索引时回退 icontains
+
+        extra 为额外的 OR 条件（例如拼音前缀匹配）。
+        """
+        pks = self.search(query, fields, statuses, limit=limit or MAX_CANDIDATES + 1)
+        if pks is None or (limit is None and len(pks) > MAX_CANDIDATES):
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': query})
+        else:
+            condition = Q(pk__in=pks)
+        if extra is not None:
+            condition |= extra
+        return queryset.filter(condition)
+
+
+# 进程级单例
+student_index = StudentSearchIndex()
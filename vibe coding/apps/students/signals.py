@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Student
+from .search_index import student_index
+
+
+@receiver(post_save, sender=Student)
+def sync_search_index_on_save(sender, instance, **kwargs):
+    """学员保存后同步搜索索引（事务提交后生效，避免回滚残留）"""
+    transaction.on_commit(lambda: student_index.update_student(instance))
+
+
+@receiver(post_delete, sender=Student)
+def sync_search_index_on_delete(sender, instance, **kwargs):
+    """学员删除后移出搜索索引"""
+    pk = instance.pk
+    transaction.on_commit(lambda: student_index.remove_student(pk))
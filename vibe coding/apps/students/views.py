@@ -1,11 +1,11 @@
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView, UpdateView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
 from django.contrib import messages
 from django.urls import reverse_lazy
 from .models import Student
 from apps.accounts.models import User
+from apps.common.http import JsonResponse
 
 class StudentListView(LoginRequiredMixin, ListView):
     """学员列表视图"""
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class TeachingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.teaching'
-    verbose_name = '教学管理'
\ No newline at end of file
+    verbose_name = '教学管理'
+
+    def ready(self):
+        # 注册信号：保持全文检索条目与数据同步
+        from . import signals  # noqa: F401
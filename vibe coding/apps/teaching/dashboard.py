@@ -0,0 +1,107 @@
+"""教师点评主页公告与计数缓存
+
+teacher_dashboard 每次打开都要遍历教师全部未完成任务拼装公告、再 COUNT 一遍任务、
+再按日期统计当日点评。这里把一位教师的「公告 + 计数」整体缓存：
+
+- 构建：一次 values_list 取出任务备注与学员备注，任务数取行数；当日点评按本地日期的
+  reply_time 区间统计，可走 (teacher, reply_time) 索引
+- 失效：TeachingTask / Feedback 增删改、相关学员的备注或昵称变更时精确删除对应教师的缓存
+  （信号见 teaching/signals.py；QuerySet.update / bulk_create 等批量写入处手动调用）
+- 缓存键含本地日期，跨天自动换新；CACHE_TIMEOUT 为兜底（删除须对所有进程可见，
+  多进程部署使用共享缓存后端，见 settings.CACHES）
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.research.models import TeachingTask
+from .models import Feedback
+
+CACHE_TIMEOUT = 300
+
+OPEN_STATUSES = ('pending', 'in_progress')
+
+
+def _today_range():
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    return today, start, start + timedelta(days=1)
+
+
+def _cache_key(teacher_id, day):
+    return f'teacher_dashboard:{teacher_id}:{day:%Y%m%d}'
+
+
+def build_dashboard(teacher_id):
+    """构建公告与计数（2 条 SQL）"""
+    rows = (
+        TeachingTask.objects.filter(teacher_id=teacher_id, status__in=OPEN_STATUSES)
+        .order_by('-assigned_at')
+        .values_list('task_note', 'student__student_name', 'student__research_note', 'student__ops_note')
+    )
+
+    notes_from_research = []
+    notes_from_ops = []
+    seen_research = set()
+    seen_ops = set()
+    today_tasks = 0
+    for task_note, student_name, research_note, ops_note in rows:
+        today_tasks += 1
+        # 学员教研备注、教研任务备注（task_note）、学员运营备注，各自去重
+        candidates = []
+        if research_note:
+            candidates.append((f"{student_name}：{research_note}".strip(), notes_from_research, seen_research))
+        if task_note:
+            candidates.append((f"【任务备注】{student_name}：{task_note}".strip(), notes_from_research, seen_research))
+        if ops_note:
+            candidates.append((f"{student_name}：{ops_note}".strip(), notes_from_ops, seen_ops))
+        for msg, target, seen in candidates:
+            if msg not in seen:
+                target.append(msg)
+                seen.add(msg)
+
+    _, start, end = _today_range()
+    completed_feedbacks = Feedback.objects.filter(
+        teacher_id=teacher_id, reply_time__gte=start, reply_time__lt=end
+    ).count()
+
+    return {
+        'announcements': {
+            'notes_from_research': notes_from_research,
+            'notes_from_ops': notes_from_ops,
+        },
+        'today_tasks': today_tasks,
+        'completed_feedbacks': completed_feedbacks,
+    }
+
+
+def get_dashboard(teacher_id):
+    """读取（必要时构建并缓存）教师主页数据"""
+    day, _, _ = _today_range()
+    key = _cache_key(teacher_id, day)
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = build_dashboard(teacher_id)
+        cache.set(key, bundle, CACHE_TIMEOUT)
+    return bundle
+
+
+def invalidate_teachers(teacher_ids):
+    """删除指定教师的主页缓存"""
+    day, _, _ = _today_range()
+    keys = [_cache_key(teacher_id, day) for teacher_id in set(teacher_ids) if teacher_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_for_students(student_ids):
+    """学员备注/昵称变更：删除对其有未完成任务的教师的主页缓存"""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+    invalidate_teachers(
+        TeachingTask.objects.filter(student_id__in=student_ids, status__in=OPEN_STATUSES)
+        .values_list('teacher_id', flat=True)
+        .distinct()
+    )
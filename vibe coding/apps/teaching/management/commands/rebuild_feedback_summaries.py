@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.teaching.models import StudentFeedbackSummary
+
+
+class Command(BaseCommand):
+    help = '按点评表整体重建学员点评汇总（最新评语、点评数、精选数、最大课次）'
+
+    def handle(self, *args, **options):
+        total = StudentFeedbackSummary.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'学员点评汇总已重建：{total} 名学员'))
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:54
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.teaching.models import parse_lesson
+
+
+def backfill_feedback_progress(apps, schema_editor):
+    """由 progress_json 批量回填点评课次条目"""
+    Feedback = apps.get_model('teaching', 'Feedback')
+    FeedbackProgress = apps.get_model('teaching', 'FeedbackProgress')
+    batch = []
+    rows = Feedback.objects.values_list('pk', 'student_id', 'progress_json').iterator(chunk_size=2000)
+    for pk, student_id, progress_json in rows:
+        try:
+            items = json.loads(progress_json or '[]')
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if not isinstance(items, list):
+            items = [items]
+        lessons = {parsed for parsed in map(parse_lesson, items) if parsed is not None}
+        batch.extend(
+            FeedbackProgress(feedback_id=pk, student_id=student_id, lesson=lesson, section=section)
+            for lesson, section in lessons
+        )
+        if len(batch) >= 5000:
+            FeedbackProgress.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedbackProgress.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_studentgroup'),
+        ('teaching', '0002_feedback_student_name_initials_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lesson', models.PositiveIntegerField(verbose_name='课次')),
+                ('section', models.PositiveIntegerField(default=0, verbose_name='小节')),
+                ('feedback', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_entries', to='teaching.feedback', verbose_name='点评')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.student', verbose_name='学员')),
+            ],
+            options={
+                'verbose_name': '点评课次',
+                'verbose_name_plural': '点评课次',
+                'db_table': 'feedback_progress',
+                'indexes': [models.Index(fields=['lesson', 'feedback'], name='feedback_pr_lesson_abf093_idx'), models.Index(fields=['lesson', 'student'], name='feedback_pr_lesson_f53f15_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedbackprogress',
+            constraint=models.UniqueConstraint(fields=('feedback', 'lesson', 'section'), name='feedback_progress_feedback_lesson_uniq'),
+        ),
+        migrations.RunPython(backfill_feedback_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_keyset_indexes'),
+        ('teaching', '0003_feedbackprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedback',
+            name='feedback_teacher_13c7d5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['teacher', 'reply_time', 'id'], name='feedback_teacher_ac2bca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['reply_time', 'id'], name='feedback_reply_t_8616e7_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.teaching.models import summary_rows
+
+
+def backfill_feedback_summaries(apps, schema_editor):
+    """为已有点评的学员生成汇总行"""
+    Feedback = apps.get_model('teaching', 'Feedback')
+    FeedbackProgress = apps.get_model('teaching', 'FeedbackProgress')
+    StudentFeedbackSummary = apps.get_model('teaching', 'StudentFeedbackSummary')
+    ids = list(Feedback.objects.values_list('student_id', flat=True).distinct().order_by())
+    for start in range(0, len(ids), 500):
+        StudentFeedbackSummary.objects.bulk_create(
+            summary_rows(Feedback, FeedbackProgress, StudentFeedbackSummary, ids[start:start + 500])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_keyset_indexes'),
+        ('teaching', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentFeedbackSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feedback_summary', serialize=False, to='students.student', verbose_name='学员')),
+                ('feedback_count', models.PositiveIntegerField(default=0, verbose_name='点评数')),
+                ('featured_count', models.PositiveIntegerField(default=0, verbose_name='精选点评数')),
+                ('latest_feedback_id', models.BigIntegerField(blank=True, null=True, verbose_name='最新点评ID')),
+                ('latest_comment', models.TextField(blank=True, verbose_name='最新评语')),
+                ('latest_teacher_name', models.CharField(blank=True, max_length=50, verbose_name='最新点评教师')),
+                ('latest_reply_time', models.DateTimeField(blank=True, null=True, verbose_name='最新点评时间')),
+                ('last_lesson', models.PositiveIntegerField(default=0, verbose_name='最大点评课次')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '学员点评汇总',
+                'verbose_name_plural': '学员点评汇总',
+                'db_table': 'student_feedback_summaries',
+                'indexes': [models.Index(fields=['featured_count', 'student'], name='student_fee_feature_c6d6e9_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_feedback_summaries, migrations.RunPython.noop),
+    ]
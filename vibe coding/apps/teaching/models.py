@@ -1,9 +1,40 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from apps.common.jsoncodec import JSONProperty
+from apps.common.models import StudentNamePinyinMixin
 from apps.accounts.models import User
 from apps.students.models import Student
-import json
+import re
 
-class Feedback(models.Model):
+# 进度条目中的课次：'5' -> (5, 0)，'6.2' -> (6, 2)，'第7课' -> (7, 0)
+_LESSON_RE = re.compile(r'(\d+)(?:\.(\d+))?')
+
+
+def parse_lesson(value):
+    """解析单个进度条目为 (课次, 小节)；无法识别时返回 None"""
+    if isinstance(value, dict):
+        value = value.get('lesson', value.get('course'))
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    match = _LESSON_RE.search(value)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def parse_lesson_bound(value):
+    """解析课程范围参数（取课次整数部分）；为空或非法时返回 None"""
+    parsed = parse_lesson((value or '').strip()) if isinstance(value, str) else parse_lesson(value)
+    return parsed[0] if parsed else None
+
+
+class Feedback(StudentNamePinyinMixin):
     """教师点评反馈模型"""
     # 使用需求文档中的字段名
     reply_time = models.DateTimeField(auto_now_add=True, verbose_name='点评时间')
@@ -38,24 +69,16 @@ class Feedback(models.Model):
         db_table = 'feedback'
         indexes = [
             models.Index(fields=['student', 'reply_time']),
-            models.Index(fields=['teacher', 'reply_time']),
+            # 点评列表游标分页（按 reply_time + id）
+            models.Index(fields=['teacher', 'reply_time', 'id']),
+            models.Index(fields=['reply_time', 'id']),
         ]
     
     def __str__(self):
         return f"{self.student_name} - {self.teacher_name} - {timezone.localtime(self.reply_time).strftime('%Y-%m-%d')}"
     
-    @property
-    def progress(self):
-        """获取学习进度列表"""
-        try:
-            return json.loads(self.progress_json)
-        except (json.JSONDecodeError, TypeError):
-            return []
-    
-    @progress.setter
-    def progress(self, value):
-        """设置学习进度列表"""
-        self.progress_json = json.dumps(value if value else [])
+    # 学习进度列表（每个实例只解码一次）
+    progress = JSONProperty('progress_json', doc='学习进度列表')
     
     @property
     def learning_progress(self):
@@ -64,10 +87,193 @@ class Feedback(models.Model):
         return progress_list[-1] if progress_list else 0
     
     def save(self, *args, **kwargs):
-        """保存反馈时同步更新学员信息"""
-        super().save(*args, **kwargs)
+        """保存反馈时同步更新学员信息、课次索引与学员点评汇总（同一事务）"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or 'progress_json' in update_fields:
+                FeedbackProgress.objects.replace_for(self)
+            StudentFeedbackSummary.objects.refresh([self.student_id])
         
-        # 更新学员的学习进度
-        if self.student and self.progress:
-            self.student.progress = self.progress
-            self.student.save()
\ No newline at end of file
+            # 更新学员的学习进度
+            if self.student and self.progress:
+                self.student.progress = self.progress
+                self.student.save()
+
+
+class FeedbackProgressQuerySet(models.QuerySet):
+    def replace_for(self, feedback):
+        """按点评的 progress_json 重建其课次条目"""
+        self.filter(feedback=feedback).delete()
+        self.bulk_create(FeedbackProgress.entries_for(feedback))
+
+    def in_range(self, lesson_from=None, lesson_to=None):
+        """课次范围（闭区间，按课次整数部分；'6.2' 属于第 6 课）"""
+        qs = self
+        if lesson_from is not None:
+            qs = qs.filter(lesson__gte=lesson_from)
+        if lesson_to is not None:
+            qs = qs.filter(lesson__lte=lesson_to)
+        return qs
+
+
+class FeedbackProgress(models.Model):
+    """点评课次条目（由 progress_json 规范化而来，支持课程范围走索引查询）"""
+    feedback = models.ForeignKey(
+        Feedback,
+        on_delete=models.CASCADE,
+        related_name='progress_entries',
+        verbose_name='点评'
+    )
+    # 冗余学员外键，按课次范围筛学员时无需回表到 feedback
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name='学员')
+    lesson = models.PositiveIntegerField(verbose_name='课次')
+    section = models.PositiveIntegerField(default=0, verbose_name='小节')
+
+    objects = FeedbackProgressQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = '点评课次'
+        verbose_name_plural = '点评课次'
+        db_table = 'feedback_progress'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['feedback', 'lesson', 'section'],
+                name='feedback_progress_feedback_lesson_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['lesson', 'feedback']),
+            models.Index(fields=['lesson', 'student']),
+        ]
+
+    def __str__(self):
+        return f"{self.feedback_id} - 第{self.lesson}.{self.section}课"
+
+    @classmethod
+    def entries_for(cls, feedback):
+        """由点评的进度列表生成（去重后的）课次条目"""
+        items = feedback.progress
+        seen = set()
+        for item in items:
+            parsed = parse_lesson(item)
+            if parsed is not None:
+                seen.add(parsed)
+        return [
+            cls(feedback_id=feedback.pk, student_id=feedback.student_id, lesson=lesson, section=section)
+            for lesson, section in sorted(seen)
+        ]
+
+
+def summary_rows(feedback_model, progress_model, summary_model, ids):
+    """按点评表计算指定学员的汇总行（3 条聚合查询；迁移回填时传入历史模型）"""
+    counts = {
+        row['student_id']: row
+        for row in feedback_model.objects.filter(student_id__in=ids)
+        .values('student_id')
+        .annotate(total=Count('pk'), featured=Count('pk', filter=Q(is_featured=True)))
+        .order_by()
+    }
+    lessons = dict(
+        progress_model.objects.filter(student_id__in=ids)
+        .values('student_id').annotate(last=Max('lesson')).order_by()
+        .values_list('student_id', 'last')
+    )
+    latest = {
+        row['student_id']: row
+        for row in feedback_model.objects.filter(student_id__in=ids)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('student_id')],
+            order_by=[F('reply_time').desc(), F('pk').desc()],
+        ))
+        .filter(rank=1)
+        .values('pk', 'student_id', 'teacher_comment', 'teacher_name', 'reply_time')
+    }
+
+    now = timezone.now()
+    rows = []
+    for student_id in ids:
+        count = counts.get(student_id, {})
+        last = latest.get(student_id, {})
+        rows.append(summary_model(
+            student_id=student_id,
+            feedback_count=count.get('total', 0),
+            featured_count=count.get('featured', 0),
+            latest_feedback_id=last.get('pk'),
+            latest_comment=last.get('teacher_comment', ''),
+            latest_teacher_name=last.get('teacher_name', ''),
+            latest_reply_time=last.get('reply_time'),
+            last_lesson=lessons.get(student_id) or 0,
+            updated_at=now,
+        ))
+    return rows
+
+
+class StudentFeedbackSummaryQuerySet(models.QuerySet):
+    def refresh(self, student_ids, create=True):
+        """按点评表重算指定学员的汇总行（每批 3 条聚合查询 + 批量写入）
+
+        create=False 时只更新已有汇总行：点评随学员级联删除时，不会为即将删除的学员重新插入汇总。
+        """
+        ids = list(dict.fromkeys(i for i in student_ids if i is not None))
+        fields = StudentFeedbackSummary.REFRESH_FIELDS
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows = summary_rows(Feedback, FeedbackProgress, StudentFeedbackSummary, batch)
+            existing = set(self.filter(student_id__in=batch).values_list('student_id', flat=True))
+            self.bulk_update([row for row in rows if row.student_id in existing], fields)
+            if create:
+                # 并发首次写入同一学员时以后写为准
+                self.bulk_create(
+                    [row for row in rows if row.student_id not in existing and row.feedback_count],
+                    update_conflicts=True,
+                    unique_fields=['student'],
+                    update_fields=fields,
+                )
+
+    def rebuild(self):
+        """整体重建：清空后为所有有点评的学员重新生成汇总行；返回行数"""
+        ids = list(Feedback.objects.values_list('student_id', flat=True).distinct().order_by())
+        with transaction.atomic():
+            self.all().delete()
+            self.refresh(ids)
+        return len(ids)
+
+
+class StudentFeedbackSummary(models.Model):
+    """学员点评汇总（冗余表）：随点评写入/删除在同一事务内刷新，rebuild_feedback_summaries 可整体重建"""
+    REFRESH_FIELDS = [
+        'feedback_count', 'featured_count', 'latest_feedback_id', 'latest_comment',
+        'latest_teacher_name', 'latest_reply_time', 'last_lesson', 'updated_at',
+    ]
+
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feedback_summary',
+        verbose_name='学员'
+    )
+    feedback_count = models.PositiveIntegerField(default=0, verbose_name='点评数')
+    featured_count = models.PositiveIntegerField(default=0, verbose_name='精选点评数')
+    # 仅记录主键，不建外键：点评删除时无需级联维护本表
+    latest_feedback_id = models.BigIntegerField(null=True, blank=True, verbose_name='最新点评ID')
+    latest_comment = models.TextField(blank=True, verbose_name='最新评语')
+    latest_teacher_name = models.CharField(max_length=50, blank=True, verbose_name='最新点评教师')
+    latest_reply_time = models.DateTimeField(null=True, blank=True, verbose_name='最新点评时间')
+    last_lesson = models.PositiveIntegerField(default=0, verbose_name='最大点评课次')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    objects = StudentFeedbackSummaryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = '学员点评汇总'
+        verbose_name_plural = '学员点评汇总'
+        db_table = 'student_feedback_summaries'
+        indexes = [
+            models.Index(fields=['featured_count', 'student']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.feedback_count}"
@@ -0,0 +1,138 @@
+"""点评批量提交
+
+教师一次提交几十条点评时，逐条 get/create/save 会产生数百条 SQL，且不在同一事务内。
+这里按批处理：学员一次 in_bulk 解析，点评与课次条目 bulk_create，学员进度一次
+bulk_update（只写变更字段），相关教学任务一次 UPDATE 关闭，全部在一个事务中完成。
+SQL 条数与提交条数无关（仅随数据库单批参数上限分批）。
+
+今日任务行（today_task_row）由今日任务接口与任务分配事件推送（publish_assigned）共用。
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common import counting, db, events, fulltext, tags
+from apps.research import workload
+from apps.research.models import TeachingTask
+from apps.students.models import Student
+from . import dashboard
+from .models import Feedback, FeedbackProgress, StudentFeedbackSummary
+
+
+def parse_progress(lesson_progress):
+    """解析课程进度输入（支持 "5" 或 "5,7"）；无法解析时返回 None"""
+    if not isinstance(lesson_progress, str):
+        lesson_progress = str(lesson_progress) if isinstance(lesson_progress, (int, float)) else ''
+    progress_list = [x.strip() for x in lesson_progress.split(',') if x.strip()]
+    return progress_list or None
+
+
+def submit_feedback_batch(teacher, items):
+    """批量创建点评；返回 (已创建的点评列表, 跳过的条目数)
+
+    条目缺少必填字段、学员不存在或进度无法解析时跳过，与逐条提交时的行为一致。
+    """
+    parsed = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        student_id = item.get('student_id')
+        teacher_comment = item.get('teacher_comment')
+        progress_list = parse_progress(item.get('lesson_progress'))
+        if not all([student_id, progress_list, teacher_comment]):
+            continue
+        parsed.append((str(student_id), progress_list, teacher_comment))
+
+    students = Student.objects.in_bulk({student_id for student_id, _, _ in parsed}, field_name='student_id')
+    teacher_name = teacher.real_name or teacher.username
+
+    feedbacks = []
+    for student_id, progress_list, teacher_comment in parsed:
+        student = students.get(student_id)
+        if student is None:
+            continue
+        feedback = Feedback(
+            user_id=student.student_id,
+            student=student,
+            student_name=student.student_name,
+            # 拼音列与学员一致，无需逐条重新计算
+            student_name_pinyin=student.student_name_pinyin,
+            student_name_initials=student.student_name_initials,
+            teacher_name=teacher_name,
+            teacher=teacher,
+            teacher_comment=teacher_comment,
+        )
+        feedback.progress = progress_list
+        feedbacks.append(feedback)
+        # 与 Feedback.save 一致：学员进度取其最后一条点评的进度
+        student.progress = progress_list
+
+    if not feedbacks:
+        return [], len(items)
+
+    touched = {feedback.student_id: feedback.student for feedback in feedbacks}
+    now = timezone.now()
+    for student in touched.values():
+        # bulk_update 不会触发 auto_now，手动推进以便学员索引按水位线增量刷新
+        student.updated_at = now
+
+    with db.write_transaction():
+        Feedback.objects.bulk_create(feedbacks, batch_size=500)
+        FeedbackProgress.objects.bulk_create(
+            [entry for feedback in feedbacks for entry in FeedbackProgress.entries_for(feedback)],
+            batch_size=1000,
+        )
+        Student.objects.bulk_update(
+            list(touched.values()),
+            ['progress_json', 'learning_progress', 'updated_at'],
+            batch_size=500,
+        )
+        workload.update_status(
+            TeachingTask.objects.filter(
+                student_id__in=list(touched),
+                teacher=teacher,
+                status__in=['pending', 'in_progress'],
+            ),
+            'completed',
+            completed_at=now,
+        )
+        fulltext.index_objects('feedback', feedbacks)
+        StudentFeedbackSummary.objects.refresh(list(touched))
+        # 批量写入不触发信号，手动清除教师主页缓存、接口缓存与列表总数缓存
+        transaction.on_commit(lambda: dashboard.invalidate_teachers([teacher.pk]))
+        tags.invalidate(tags.teacher_tag(teacher.pk), *(tags.student_tag(pk) for pk in touched))
+        counting.touch(Feedback, Student, TeachingTask)
+
+    return feedbacks, len(items) - len(feedbacks)
+
+
+# ---------- 今日任务推送 ----------
+
+def today_task_row(task):
+    """今日任务列表的一行（task 需 select_related student 并预取分组）"""
+    student = task.student
+    return {
+        'task_id': task.task_id,
+        'student_id': student.student_id,
+        'student_name': student.student_name,
+        'student_groups': student.groups,
+        'current_progress': student.current_progress,
+        'is_difficult': student.is_difficult,
+        'research_note': student.research_note,
+        'ops_note': getattr(student, 'ops_note', ''),
+    }
+
+
+def publish_assigned(teacher_id, task_pks):
+    """事务提交后向教师推送新分配的今日任务行"""
+    task_pks = list(task_pks)
+    if not task_pks:
+        return
+
+    def rows():
+        tasks = (
+            TeachingTask.objects.filter(pk__in=task_pks, teacher_id=teacher_id, status__in=['pending', 'in_progress'])
+            .select_related('student').prefetch_related('student__group_memberships').order_by('-assigned_at')
+        )
+        return [today_task_row(task) for task in tasks]
+
+    events.publish(events.user_channel(teacher_id), events.TEACHING_TASK_ASSIGNED, rows)
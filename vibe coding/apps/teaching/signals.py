@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.common import fulltext
+from apps.research.models import TeachingTask
+from apps.students.models import Student
+from . import dashboard
+from .models import Feedback, StudentFeedbackSummary
+
+# 影响教师主页公告内容的学员字段
+ANNOUNCEMENT_STUDENT_FIELDS = frozenset({'student_name', 'research_note', 'ops_note'})
+
+
+@receiver(post_save, sender=Feedback)
+def sync_fulltext_on_save(sender, instance, **kwargs):
+    """点评保存后同步全文检索条目"""
+    fulltext.index_objects('feedback', [instance])
+
+
+@receiver(post_delete, sender=Feedback)
+def sync_fulltext_on_delete(sender, instance, **kwargs):
+    """点评删除后移除全文检索条目"""
+    fulltext.remove_objects('feedback', [instance.pk])
+
+
+@receiver(post_delete, sender=Feedback)
+def refresh_summary_on_delete(sender, instance, **kwargs):
+    """点评删除后重算学员点评汇总（与删除同一事务；只更新已有汇总行）"""
+    StudentFeedbackSummary.objects.refresh([instance.student_id], create=False)
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+@receiver(post_save, sender=TeachingTask)
+@receiver(post_delete, sender=TeachingTask)
+def invalidate_dashboard_for_teacher(sender, instance, **kwargs):
+    """点评/教学任务变更后清除对应教师的主页缓存（事务提交后生效）"""
+    teacher_id = instance.teacher_id
+    transaction.on_commit(lambda: dashboard.invalidate_teachers([teacher_id]))
+
+
+@receiver(post_save, sender=Student)
+def invalidate_dashboard_for_student(sender, instance, created, update_fields=None, **kwargs):
+    """学员昵称/备注变更后清除对其有未完成任务的教师的主页缓存"""
+    if created:
+        return
+    if update_fields is not None and not ANNOUNCEMENT_STUDENT_FIELDS.intersection(update_fields):
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: dashboard.invalidate_for_students([pk]))
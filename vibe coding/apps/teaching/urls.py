@@ -1,4 +1,5 @@
 from django.urls import path
+from apps.common.aio import view_for
 from . import views
 
 app_name = 'teaching'
@@ -8,7 +9,7 @@ urlpatterns = [
     path('', views.teacher_dashboard, name='dashboard'),
     
     # 任务管理
-    path('tasks/today/', views.get_today_tasks, name='get_today_tasks'),
+    path('tasks/today/', view_for(views.get_today_tasks, views.get_today_tasks_async), name='get_today_tasks'),
     path('tasks/add/', views.add_to_today_tasks, name='add_to_today_tasks'),
     path('tasks/delete/', views.batch_delete_tasks, name='batch_delete_tasks'),
     
@@ -22,6 +23,7 @@ urlpatterns = [
     path('push/operation/', views.push_to_operation, name='push_to_operation'),
     
     # 学员相关
-    path('students/search/', views.search_students, name='search_students'),
-    path('students/<str:student_id>/', views.get_student_detail, name='get_student_detail'),
+    path('students/search/', view_for(views.search_students, views.search_students_async), name='search_students'),
+    path('students/batch/', views.get_student_details, name='get_student_details'),
+    path('students/<str:student_id>/', view_for(views.get_student_detail, views.get_student_detail_async), name='get_student_detail'),
 ]
\ No newline at end of file
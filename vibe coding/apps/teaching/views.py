@@ -1,18 +1,28 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Q
 from django.utils import timezone
 import json
-import time
 
 from apps.accounts.models import User
+from apps.students import details
 from apps.students.models import Student
+from apps.students.search_index import student_index
 from apps.teaching.models import Feedback
+from apps.teaching import dashboard
+from apps.teaching.services import submit_feedback_batch, today_task_row
+from apps.research import workload
 from apps.research.models import TeachingTask
-from apps.operations.models import OpsTask, VisitRecord
+from apps.operations.models import OpsTask
+from apps.operations.services import publish_created
+from apps.common import counting, fulltext, idgen, projection, tags
+from apps.common.aio import alist
+from apps.common.counting import count_total
+from apps.common.decorators import login_required
+from apps.common.http import JsonResponse
+from apps.common.pagination import CountedPaginator, CursorError, cursor_requested, paginate_by_cursor
+from apps.common.pinyin import pinyin_q
+from apps.common.viewcache import cached_view, conditional_view
 
 
 def has_teacher_permission(user):
@@ -26,99 +36,50 @@ def teacher_dashboard(request):
     if not has_teacher_permission(request.user):
         return render(request, 'common/permission_denied.html')
     
-    # 获取公告信息：来源于本次任务学生的教研/运营备注，以及教研分配时的任务备注
-    today_tasks_qs = TeachingTask.objects.filter(
-        teacher=request.user,
-        status__in=['pending', 'in_progress']
-    ).select_related('student').order_by('-assigned_at')
-    
-    notes_from_research = []
-    notes_from_ops = []
-    seen_research = set()
-    seen_ops = set()
-
-    for task in today_tasks_qs:
-        s = task.student
-
-        # 学员教研备注（仅用 research_note）
-        s_research = getattr(s, 'research_note', '') or ''
-        if s_research:
-            msg = f"{s.student_name}：{s_research}".strip()
-            if msg not in seen_research:
-                notes_from_research.append(msg)
-                seen_research.add(msg)
-
-        # 教研任务备注（task_note）
-        if getattr(task, 'task_note', None):
-            msg = f"【任务备注】{s.student_name}：{task.task_note}".strip()
-            if msg not in seen_research:
-                notes_from_research.append(msg)
-                seen_research.add(msg)
-
-        # 学员运营备注（仅用 ops_note）
-        s_ops = getattr(s, 'ops_note', '') or ''
-        if s_ops:
-            msg = f"{s.student_name}：{s_ops}".strip()
-            if msg not in seen_ops:
-                notes_from_ops.append(msg)
-                seen_ops.add(msg)
-
-    announcements = {
-        'notes_from_research': notes_from_research,
-        'notes_from_ops': notes_from_ops,
-    }
-    
-    # 获取今日任务统计（按 assigned_at 口径，状态包含待处理与进行中）
-    today_tasks = TeachingTask.objects.filter(
-        teacher=request.user,
-        status__in=['pending', 'in_progress']
-    ).count()
-    
-    # 获取已完成点评统计（按 reply_time 日期）
-    completed_feedbacks = Feedback.objects.filter(
-        teacher=request.user,
-        reply_time__date=timezone.now().date()
-    ).count()
-    
-    context = {
-        'announcements': announcements,
-        'today_tasks': today_tasks,
-        'completed_feedbacks': completed_feedbacks,
-    }
+    # 公告与计数整体缓存，相关学员备注/教学任务/点评变更时失效（见 apps.teaching.dashboard）
+    context = dashboard.get_dashboard(request.user.pk)
     
     return render(request, 'teaching/feedback.html', context)
 
 
+def _today_tasks(user):
+    """分配给教师的待处理任务"""
+    return TeachingTask.objects.filter(
+        teacher=user,  # 修复：assigned_teacher -> teacher
+        status__in=['pending', 'in_progress']  # 修复：task_status -> status
+    ).select_related('student').prefetch_related('student__group_memberships').order_by('-assigned_at')
+
+
+def _today_tasks_tags(request):
+    return [tags.teacher_tag(request.user.pk), Student]
+
+
 @login_required
 @require_http_methods(["GET"])
+@cached_view('teaching.today_tasks', tags=_today_tasks_tags, per_user=True)
 def get_today_tasks(request):
     """获取今日教学任务"""
     if not has_teacher_permission(request.user):
         return JsonResponse({'error': '权限不足'}, status=403)
     
-    # 获取分配给当前教师的待处理任务
-    tasks = TeachingTask.objects.filter(
-        teacher=request.user,  # 修复：assigned_teacher -> teacher
-        status__in=['pending', 'in_progress']  # 修复：task_status -> status
-    ).select_related('student').order_by('-assigned_at')
-    
-    task_list = []
-    for task in tasks:
-        student = task.student
-        task_list.append({
-            'task_id': task.task_id,
-            'student_id': student.student_id,
-            'student_name': student.student_name,  # 修复：nickname or name -> student_name
-            'student_groups': student.groups,
-            'current_progress': student.current_progress,
-            'is_difficult': student.is_difficult,  # 修复：原先是 status == 'difficult'
-            'research_note': student.research_note,
-            'ops_note': getattr(student, 'ops_note', ''),  # 统一使用 ops_note
-        })
+    # 行格式与任务分配事件推送一致（见 services.today_task_row）
+    task_list = [today_task_row(task) for task in _today_tasks(request.user)]
     # 关键修复：添加 success 字段，前端才会渲染任务列表
     return JsonResponse({'success': True, 'tasks': task_list})
 
 
+@login_required
+@require_http_methods(["GET"])
+@cached_view('teaching.today_tasks', tags=_today_tasks_tags, per_user=True)
+async def get_today_tasks_async(request):
+    """获取今日教学任务（异步实现，见 apps.common.aio）"""
+    if not has_teacher_permission(request.user):
+        return JsonResponse({'error': '权限不足'}, status=403)
+    
+    tasks = await alist(_today_tasks(request.user))
+    return JsonResponse({'success': True, 'tasks': [today_task_row(task) for task in tasks]})
+
+
 @login_required
 @require_http_methods(["POST"])
 def add_to_today_tasks(request):
@@ -146,13 +107,12 @@ def add_to_today_tasks(request):
             return JsonResponse({'success': True, 'message': '该学员已在今日任务中'})
 
         # 选择一个教研（默认取第一个具有 researcher 角色的用户）
-        researcher = User.objects.filter(roles_json__contains='"researcher"').order_by('id').first()
+        researcher = User.objects.with_role('researcher').order_by('id').first()
         if not researcher:
             return JsonResponse({'error': '缺少教研角色用户，请先创建“教研”角色账号'}, status=400)
 
         # 创建教学任务
         task = TeachingTask.objects.create(
-            task_id=f"TASK-{student.student_id}-{int(time.time()*1000)}",
             student=student,
             teacher=request.user,
             researcher=researcher,
@@ -188,61 +148,17 @@ def submit_feedback(request):
         data = json.loads(request.body)
         feedbacks = data.get('feedbacks', [])
         
-        if not feedbacks:
+        if not feedbacks or not isinstance(feedbacks, list):
             return JsonResponse({'error': '没有点评数据'}, status=400)
         
-        created_feedbacks = []
-        
-        for feedback_data in feedbacks:
-            student_id = feedback_data.get('student_id')
-            lesson_progress = feedback_data.get('lesson_progress')
-            teacher_comment = feedback_data.get('teacher_comment')
-            
-            if not all([student_id, lesson_progress, teacher_comment]):
-                continue
-            
-            # 获取学员信息
-            try:
-                student = Student.objects.get(student_id=student_id)
-            except Student.DoesNotExist:
-                continue
-            
-            # 处理学习进度（支持 "5" 或 "5,7"）
-            try:
-                if ',' in lesson_progress:
-                    progress_list = [x.strip() for x in lesson_progress.split(',') if x.strip()]
-                else:
-                    progress_list = [lesson_progress.strip()]
-            except Exception:
-                continue
-            
-            # 创建点评记录（使用 Feedback 模型字段）
-            #do we have to put teacher_name in the feedback model?
-            feedback = Feedback.objects.create(
-                user_id=student.student_id,
-                student=student,
-                student_name=student.student_name,
-                teacher_name=request.user.real_name or request.user.username,
-                teacher=request.user,
-                teacher_comment=teacher_comment
-            )
-            feedback.progress = progress_list
-            feedback.save()
-            
-            # 更新相关教学任务状态
-            TeachingTask.objects.filter(
-                student=student,
-                teacher=request.user,
-                status__in=['pending', 'in_progress']
-            ).update(
-                status='completed',
-                completed_at=timezone.now()
-            )
+        # 批量提交：学员一次解析，点评/进度/任务状态在同一事务中批量写入
+        created_feedbacks, skipped = submit_feedback_batch(request.user, feedbacks)
         
         return JsonResponse({
             'success': True,
             'message': f'成功提交{len(created_feedbacks)}条点评',
-            'created_count': len(created_feedbacks)
+            'created_count': len(created_feedbacks),
+            'skipped_count': skipped,
         })
         
     except json.JSONDecodeError:
@@ -267,10 +183,11 @@ def manual_feedback(request):
         if not all([student_name, lesson_progress, teacher_comment]):
             return JsonResponse({'error': '请填写所有必填项'}, status=400)
         
-        # 查找学员
-        student = Student.objects.filter(
-            Q(student_name__icontains=student_name) | Q(alias_name__icontains=student_name)  # 修复：name/nickname -> student_name/alias_name
-        ).first()
+        # 查找学员（走内存 n-gram 索引）
+        student = student_index.filter_queryset(
+            Student.objects.all(), student_name,
+            fields=('student_name', 'alias_name'),
+        ).order_by('pk').first()
         
         if not student:
             return JsonResponse({'error': '未找到匹配的学员'}, status=404)
@@ -310,6 +227,7 @@ def manual_feedback(request):
 
 @login_required
 @require_http_methods(["GET"])
+@conditional_view('teaching.completed_feedbacks', tags=[Feedback, Student], per_user=True)
 def get_completed_feedbacks(request):
     """获取已完成的点评记录"""
     if not has_teacher_permission(request.user):
@@ -318,11 +236,25 @@ def get_completed_feedbacks(request):
     # 获取当前教师的点评记录
     feedbacks = Feedback.objects.filter(
         teacher=request.user
-    ).order_by('-reply_time')
+    )
     
-    page = request.GET.get('page', 1)
-    paginator = Paginator(feedbacks, 20)
-    page_obj = paginator.get_page(page)
+    # 带 cursor 参数时走游标分页（按 reply_time + id，走 (teacher, reply_time, id) 索引）
+    if cursor_requested(request):
+        try:
+            page_obj = paginate_by_cursor(feedbacks, ['-reply_time'], request.GET['cursor'], 20)
+        except CursorError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        pagination = {'next_cursor': page_obj.next_cursor}
+    else:
+        page = request.GET.get('page', 1)
+        total = count_total(feedbacks, label='teaching.completed_feedbacks')
+        paginator = CountedPaginator(feedbacks.order_by('-reply_time'), 20, total)
+        page_obj = paginator.get_page(page)
+        pagination = {
+            'current_page': page_obj.number,
+            'total_pages': paginator.num_pages,
+            'total_approximate': total.approximate,
+        }
     
     feedback_list = []
     for feedback in page_obj:
@@ -342,13 +274,35 @@ def get_completed_feedbacks(request):
         'feedbacks': feedback_list,
         'has_next': page_obj.has_next(),
         'has_previous': page_obj.has_previous(),
-        'current_page': page_obj.number,
-        'total_pages': paginator.num_pages,
+        **pagination,
     })
 
 
+def _search_students(query):
+    """学员搜索查询集（走内存 n-gram 索引，避免每次按键全表 icontains 扫描；索引过期时会查库刷新）"""
+    return student_index.filter_queryset(
+        Student.objects.all(), query,
+        fields=('student_name', 'alias_name'),
+        statuses=('active', 'joined'),
+        limit=10,
+        extra=pinyin_q(query),
+    ).filter(status__in=['active', 'joined']).prefetch_related('group_memberships')[:10]
+
+
+def _search_row(student):
+    return {
+        'student_id': student.student_id,
+        'student_name': student.student_name,
+        'alias_name': student.alias_name,
+        'groups': student.groups,
+        'current_progress': student.current_progress,
+        'status': student.status,
+    }
+
+
 @login_required
 @require_http_methods(["GET"])
+@cached_view('teaching.search_students', tags=[Student])
 def search_students(request):
     """搜索学员"""
     if not has_teacher_permission(request.user):
@@ -363,24 +317,29 @@ def search_students(request):
             'students': []
         })
     
-    students = Student.objects.filter(
-        Q(student_name__icontains=query) | Q(alias_name__icontains=query)
-    ).filter(status__in=['active', 'joined'])[:10]
+    return JsonResponse({
+        'success': True,
+        'students': [_search_row(student) for student in _search_students(query)]
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+@cached_view('teaching.search_students', tags=[Student])
+async def search_students_async(request):
+    """搜索学员（异步实现，见 apps.common.aio）"""
+    if not has_teacher_permission(request.user):
+        return JsonResponse({'error': '权限不足'}, status=403)
     
-    student_list = []
-    for student in students:
-        student_list.append({
-            'student_id': student.student_id,
-            'student_name': student.student_name,
-            'alias_name': student.alias_name,
-            'groups': student.groups,
-            'current_progress': student.current_progress,
-            'status': student.status,
-        })
+    query = request.GET.get('q', '').strip()
+    if len(query) < 1:
+        return JsonResponse({'success': True, 'students': []})
     
+    # 索引检索为同步调用（可能刷新索引），放到线程中；结果查询走异步 ORM
+    students = await alist(await sync_to_async(_search_students)(query))
     return JsonResponse({
         'success': True,
-        'students': student_list
+        'students': [_search_row(student) for student in students]
     })
 
 
@@ -400,13 +359,19 @@ def push_to_research(request):
             return JsonResponse({'error': '请选择学员并填写教研备注'}, status=400)
         
         # 更新点评记录的教研备注
-        updated_count = Feedback.objects.filter(
+        rows = list(Feedback.objects.filter(
             teacher=request.user,
             student__student_id__in=student_ids,  # 修复：通过外键字段匹配业务学号
             push_research=''
-        ).update(
+        ).values_list('id', 'student_id'))
+        feedback_ids = [feedback_id for feedback_id, _ in rows]
+        updated_count = Feedback.objects.filter(id__in=feedback_ids).update(
             push_research=research_note
         )
+        # update() 不触发信号，手动同步全文检索条目并使接口缓存失效
+        fulltext.reindex('feedback', feedback_ids)
+        tags.invalidate(*(tags.student_tag(pk) for pk in {student_pk for _, student_pk in rows}))
+        counting.touch(Feedback)
         return JsonResponse({'success': True, 'message': f'成功推送{updated_count}条记录到教研部门'})
     except json.JSONDecodeError:
         return JsonResponse({'error': '数据格式错误'}, status=400)
@@ -427,27 +392,39 @@ def push_to_operation(request):
         ops_note = data.get('ops_note', '')
         if not student_ids or not ops_note:
             return JsonResponse({'error': '参数缺失'}, status=400)
-        updated_count = Feedback.objects.filter(
+        rows = list(Feedback.objects.filter(
             teacher=request.user,
             student__student_id__in=student_ids,
             push_ops=''
-        ).update(
+        ).values_list('id', 'student_id'))
+        feedback_ids = [feedback_id for feedback_id, _ in rows]
+        updated_count = Feedback.objects.filter(id__in=feedback_ids).update(
             push_ops=ops_note
         )
+        # update() 不触发信号，手动同步全文检索条目并使接口缓存失效
+        fulltext.reindex('feedback', feedback_ids)
+        tags.invalidate(*(tags.student_tag(pk) for pk in {student_pk for _, student_pk in rows}))
+        counting.touch(Feedback)
         
-        # 创建运营任务（避免冲突，生成简单唯一ID）
-        for sid in student_ids:
-            try:
-                student = Student.objects.get(student_id=sid)
-                OpsTask.objects.create(
-                    task_id=f"OPS-{sid}-{int(time.time()*1000)}",
-                    student=student,
-                    student_name=student.student_name,
-                    source='teacher',
-                    task_status='pending'
-                )
-            except Student.DoesNotExist:
-                continue
+        # 创建运营任务（任务ID由 Snowflake 生成器批量分配，无需查库）
+        students = Student.objects.filter(student_id__in=student_ids)
+        tasks = [
+            OpsTask(
+                student=student,
+                student_name=student.student_name,
+                student_name_pinyin=student.student_name_pinyin,
+                student_name_initials=student.student_name_initials,
+                source='teacher',
+                task_status='pending'
+            )
+            for student in students
+        ]
+        for task, task_id in zip(tasks, idgen.make_ids('OPS-', len(tasks))):
+            task.task_id = task_id
+        OpsTask.objects.bulk_create(tasks)
+        counting.touch(OpsTask)
+        # 推送到运营收件箱（事件流）
+        publish_created(task.pk for task in tasks)
 
         return JsonResponse({
             'success': True,
@@ -475,14 +452,19 @@ def batch_delete_tasks(request):
             return JsonResponse({'error': '请选择要删除的任务'}, status=400)
         
         # 删除教学任务（只能删除自己的任务）
-        deleted_count = TeachingTask.objects.filter(
-            teacher=request.user,
-            student__student_id__in=student_ids,
-            status__in=['pending', 'in_progress']
-        ).update(
-            status='cancelled',
+        deleted_count = workload.update_status(
+            TeachingTask.objects.filter(
+                teacher=request.user,
+                student__student_id__in=student_ids,
+                status__in=['pending', 'in_progress']
+            ),
+            'cancelled',
             updated_at=timezone.now()
         )
+        # QuerySet.update 不触发信号，手动清除主页缓存、接口缓存与列表总数缓存（工作量已在 update_status 中记录）
+        dashboard.invalidate_teachers([request.user.pk])
+        tags.invalidate(tags.teacher_tag(request.user.pk))
+        counting.touch(TeachingTask)
         return JsonResponse({'success': True, 'message': f'成功删除{deleted_count}个任务'})
     except json.JSONDecodeError:
         return JsonResponse({'error': '数据格式错误'}, status=400)
@@ -490,65 +472,83 @@ def batch_delete_tasks(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _student_detail_tags(request, student_id):
+    # URL 为业务学号，标签按主键（学员不存在时响应不会被缓存）
+    pk = Student.objects.filter(student_id=student_id).values_list('pk', flat=True).first()
+    return [tags.student_tag(pk)] if pk else []
+
+
 @login_required
 @require_http_methods(["GET"])
+@cached_view('teaching.student_detail', tags=_student_detail_tags)
 def get_student_detail(request, student_id):
-    """获取学员详细信息"""
+    """获取学员详细信息（fields= 字段投影，v=2 精简结构）"""
     if not has_teacher_permission(request.user):
         return JsonResponse({'error': '权限不足'}, status=403)
     
     try:
-        student = get_object_or_404(Student, student_id=student_id)
+        available = details.available_fields(details.TEACHING_FIELDS, details.lean_requested(request))
+        names = projection.parse_fields(request, available)
+        # 只加载所选字段依赖的列；最近点评（上5次）/回访仅在请求了对应字段时查询
+        student = get_object_or_404(projection.load(Student.objects.all(), available, names), student_id=student_id)
         
-        # 获取该学员的最近点评记录（上5次）
-        recent_feedbacks = Feedback.objects.filter(
-            student=student
-        ).order_by('-reply_time')[:5]
-        
-        feedback_list = []
-        for feedback in recent_feedbacks:
-            progress_str = ','.join(map(str, feedback.progress))
-            feedback_list.append({
-                'teacher_name': feedback.teacher_name,
-                'lesson_progress': progress_str,
-                'teacher_comment': feedback.teacher_comment,
-                'feedback_time': timezone.localtime(feedback.reply_time).strftime('%Y-%m-%d %H:%M'),
-            })
-        
-        # 只取 teacher_comment（最近5条）
-        feedback_comments = [fb.teacher_comment for fb in recent_feedbacks if fb.teacher_comment][:5]
-        
-        # 最近回访记录（取最近5条 visit_note）
-        visit_notes = list(
-            VisitRecord.objects.filter(student=student)
-            .order_by('-visit_time')
-            .values_list('visit_note', flat=True)[:5]
-        )
+        return JsonResponse({
+            'success': True,
+            'student': projection.render(student, available, names),
+        })
         
-        # 备注：仅用正式字段
-        research_note = getattr(student, 'research_note', '') or ''
-        ops_note = getattr(student, 'ops_note', '') or ''
+    except projection.FieldsError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+@cached_view('teaching.student_detail', tags=_student_detail_tags)
+async def get_student_detail_async(request, student_id):
+    """获取学员详细信息（异步实现：学员行、最近点评、最近回访并发查询）"""
+    if not has_teacher_permission(request.user):
+        return JsonResponse({'error': '权限不足'}, status=403)
+    
+    try:
+        available = details.available_fields(details.TEACHING_FIELDS, details.lean_requested(request))
+        names = projection.parse_fields(request, available)
+        return JsonResponse({
+            'success': True,
+            'student': await details.arender({'student_id': student_id}, available, names),
+        })
+    except projection.FieldsError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@login_required
+@require_http_methods(["GET"])
+@cached_view('teaching.student_details', tags=details.batch_tags('student_id'))
+def get_student_details(request):
+    """批量获取学员详情（ids=学号1,学号2，最多 50 个；fields= / v=2 同单个详情）"""
+    if not has_teacher_permission(request.user):
+        return JsonResponse({'error': '权限不足'}, status=403)
+    
+    try:
+        ids = details.parse_ids(request)
+        available = details.available_fields(details.TEACHING_FIELDS, details.lean_requested(request))
+        names = projection.parse_fields(request, available)
+        students = list(projection.load(
+            Student.objects.filter(student_id__in=ids), available, names, always=('id', 'student_id')
+        ))
+        # 最近点评/回访：全部学员各一条窗口函数查询
+        details.prefetch_recent(students, names)
+        found = {s.student_id: projection.render(s, available, names) for s in students}
         
         return JsonResponse({
             'success': True,
-            'student': {
-                'student_name': student.student_name,
-                'groups': student.groups,
-                'progress': student.progress,
-                'status': student.status,
-                'learning_hours': student.learning_hours,
-                'feedback_comments': feedback_comments,
-                'research_note': research_note,
-                'ops_note': ops_note,
-                'visit_notes': visit_notes,
-                'student_id': student.student_id,
-                'name': student.student_name,
-                'nickname': student.alias_name,
-                'current_progress': student.current_progress,
-                'total_study_time': getattr(student, 'total_study_time', 0.0),
-                'recent_feedbacks': feedback_list,
-            }
+            'students': {sid: found[sid] for sid in ids if sid in found},
+            'missing': [sid for sid in ids if sid not in found],
         })
         
+    except (details.BatchError, projection.FieldsError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
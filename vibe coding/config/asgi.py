@@ -2,5 +2,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# ASGI 下热点 JSON 接口使用异步实现（见 apps.common.aio），可设 ASYNC_VIEWS=0 关闭
+os.environ.setdefault('ASYNC_VIEWS', '1')
+# ASGI 下每个请求的同步数据库操作在各自的线程中执行，持久连接无法跨请求复用，反而会在线程退出后
+# 残留到超时才关闭，因此默认不保持连接（DB_CONN_MAX_AGE=0）；需要连接复用时经 pgbouncer 连接
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
-application = get_asgi_application()
\ No newline at end of file
+# 事件流（/common/events/，text/event-stream）为长连接，需以 ASGI 方式运行，例如：
+#   uvicorn config.asgi:application --workers 2
+# WSGI 部署下该接口返回 501，前端继续按原方式刷新列表
+application = get_asgi_application()
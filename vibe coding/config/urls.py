@@ -15,6 +15,7 @@ urlpatterns = [
     path('operations/', include('apps.operations.urls')),
     path('teaching/', include('apps.teaching.urls')),
     path('research/', include('apps.research.urls')),  # 添加这一行
+    path('common/', include('apps.common.urls')),
     path('', home_redirect, name='home'),
 ]
 
@@ -16,6 +16,60 @@ function getCookie(name) {
     return cookieValue;
 }
 
+// 带 ETag 校验的 GET：自动发送 If-None-Match，服务端返回 304 时复用上次的响应正文
+// 返回标准 Response，调用方式与 fetch 相同（.then(r => r.json())）
+const ETAG_CACHE_LIMIT = 100;
+const etagCache = new Map();
+
+async function fetchWithETag(url, options = {}) {
+    const method = (options.method || 'GET').toUpperCase();
+    if (method !== 'GET') return fetch(url, options);
+
+    const cached = etagCache.get(url);
+    const headers = new Headers(options.headers || {});
+    if (cached) headers.set('If-None-Match', cached.etag);
+    // 绕过浏览器 HTTP 缓存，由这里自行保存正文，保证 304 能交给脚本处理
+    const res = await fetch(url, { ...options, headers, cache: 'no-store' });
+
+    if (res.status === 304 && cached) {
+        // 最近使用的条目移到末尾
+        etagCache.delete(url);
+        etagCache.set(url, cached);
+        return new Response(cached.body, { status: 200, headers: { 'Content-Type': cached.contentType } });
+    }
+
+    const etag = res.headers.get('ETag');
+    if (res.ok && etag) {
+        const body = await res.clone().text();
+        etagCache.delete(url);
+        etagCache.set(url, { etag, body, contentType: res.headers.get('Content-Type') || 'application/json' });
+        if (etagCache.size > ETAG_CACHE_LIMIT) {
+            etagCache.delete(etagCache.keys().next().value);
+        }
+    } else {
+        etagCache.delete(url);
+    }
+    return res;
+}
+
+// 变更事件流：服务端推送新分配的任务等增量（见 apps.common.events）
+// handlers 形如 { "teaching_task.assigned": (items) => {...} }，items 为变更的列表行
+// 断线时浏览器自动重连并带上 Last-Event-ID；服务端不支持（WSGI 部署返回 501）时不再重连
+function subscribeEvents(handlers) {
+    if (typeof EventSource === 'undefined') return null;
+    const source = new EventSource('/common/events/');
+    Object.entries(handlers).forEach(([kind, handler]) => {
+        source.addEventListener(kind, (e) => {
+            try {
+                handler(JSON.parse(e.data).items || []);
+            } catch (err) {
+                console.warn('[events] 处理事件失败', kind, err);
+            }
+        });
+    });
+    return source;
+}
+
 // 显示成功消息
 function showSuccess(message) {
     const alertDiv = document.createElement('div');
@@ -158,7 +158,7 @@ function initStudentManagement() {
 async function fetchStudents(query) {
   const params = new URLSearchParams({ page: 1, page_size: 20 });
   if (query) params.set("search", query);
-  const res = await fetch(`/operations/students/api/?${params.toString()}`);
+  const res = await fetchWithETag(`/operations/students/api/?${params.toString()}`);
   const data = await res.json();
   if (!data.success) throw new Error(data.message || "获取学员失败");
   return Array.isArray(data.data) ? data.data : [];
@@ -231,13 +231,44 @@ function renderStudentMgrResults(students) {
   });
 }
 
+// 学员详情加载：同一轮事件循环内请求的多个学员合并为一次批量请求（最多 50 个）
+const STUDENT_BATCH_LIMIT = 50;
+let pendingStudentLoads = new Map();
+
+function loadStudentDetail(studentId) {
+  const key = String(studentId);
+  if (!pendingStudentLoads.has(key)) {
+    if (pendingStudentLoads.size === 0) setTimeout(flushStudentLoads, 0);
+    let resolve, reject;
+    const promise = new Promise((res, rej) => { resolve = res; reject = rej; });
+    pendingStudentLoads.set(key, { promise, resolve, reject });
+  }
+  return pendingStudentLoads.get(key).promise;
+}
+
+function flushStudentLoads() {
+  const batch = [...pendingStudentLoads.entries()];
+  pendingStudentLoads = new Map();
+  for (let i = 0; i < batch.length; i += STUDENT_BATCH_LIMIT) {
+    const chunk = batch.slice(i, i + STUDENT_BATCH_LIMIT);
+    const ids = chunk.map(([id]) => id).join(",");
+    fetchWithETag(`/operations/students/batch/?ids=${encodeURIComponent(ids)}`)
+      .then((r) => r.json())
+      .then((data) => {
+        if (!data.success) throw new Error(data.message || "获取学员详情失败");
+        chunk.forEach(([id, p]) => {
+          const s = (data.students || {})[id];
+          s ? p.resolve(s) : p.reject(new Error("学员不存在"));
+        });
+      })
+      .catch((e) => chunk.forEach(([, p]) => p.reject(e)));
+  }
+}
+
 // 学员详情（模态框展示）
 function viewStudentDetail(studentId) {
-  fetch(`/operations/students/${studentId}/`)
-    .then((r) => r.json())
-    .then((data) => {
-      if (!data.success) throw new Error(data.message || "获取学员详情失败");
-      const s = data.student || data.data || data.student_payload || {};
+  loadStudentDetail(studentId)
+    .then((s) => {
       // 改为使用“抽屉式侧滑”而非弹窗
       showStudentDetailDrawer(s);
     })
@@ -357,11 +388,8 @@ function openEditStudentModal(studentId) {
   if (!modal || !modalTitle || !form) return;
 
   modalTitle.textContent = "编辑学员";
-  fetch(`/operations/students/${studentId}/`)
-    .then((r) => r.json())
-    .then((data) => {
-      if (!data.success) throw new Error(data.message || "获取学员失败");
-      const s = data.student || data.data || {};
+  loadStudentDetail(studentId)
+    .then((s) => {
       document.getElementById("studentId").value = s.id || "";
       document.getElementById("studentName").value = s.student_name || "";
       document.getElementById("aliasName").value = s.alias_name || "";
@@ -451,7 +479,7 @@ async function submitBatchImport() {
   const fileInput = document.getElementById("importFile");
   const resBox = document.getElementById("batchImportResult");
   if (!fileInput || !fileInput.files || !fileInput.files.length) {
-    showError("请选择要上传的 .xlsx 文件");
+    showError("请选择要上传的 .xlsx 或 .csv 文件");
     return;
   }
   const file = fileInput.files[0];
@@ -484,70 +512,15 @@ async function submitBatchImport() {
 }
 
 // -------------------- 学员导出（与搜索、导入分离） --------------------
-async function exportStudents() {
-  try {
-    const input = document.getElementById("student-mgr-search");
-    const q = input ? input.value.trim() : "";
-    const pageSize = 200;
-    let page = 1;
-    let totalPages = 1;
-    const rows = [];
-    // 表头
-    rows.push(["ID","用户ID","昵称","备注名","分组","创建时间","状态","累计学习时长(分钟)"]); 
-
-    do {
-      const params = new URLSearchParams({
-        page: page,
-        page_size: pageSize,
-        sort: "created_at",
-        order: "desc"
-      });
-      if (q) params.set("search", q);
-
-      const resp = await fetch(`/operations/students/api/?${params.toString()}`);
-      const data = await resp.json();
-      if (!data.success) throw new Error(data.message || "获取学员列表失败");
-
-      const list = Array.isArray(data.data) ? data.data : [];
-      list.forEach(s => {
-        rows.push([
-          s.id || "",
-          s.external_user_id || "",
-          s.student_name || s.name || "",
-          s.alias_name || "",
-          Array.isArray(s.groups) ? s.groups.join("|") : (s.groups || ""),
-          s.created_at || "",
-          s.status || "",
-          (s.total_study_time || 0)
-        ]);
-      });
-
-      const p = data.pagination || {};
-      totalPages = p.total_pages || 1;
-      page = (p.current_page || page) + 1;
-    } while (page <= totalPages);
-
-    // 生成 CSV
-    const csv = rows.map(r => r.map(v => {
-      const s = String(v ?? "");
-      if (s.includes(",") || s.includes("\"") || s.includes("\n")) {
-        return `"${s.replace(/"/g, '""')}"`;
-      }
-      return s;
-    }).join(",")).join("\n");
-
-    const blob = new Blob([csv], { type: "text/csv;charset=utf-8" });
-    const url = URL.createObjectURL(blob);
-    const a = document.createElement("a");
-    const ts = new Date().toISOString().slice(0,19).replace(/[:T]/g,"-");
-    a.href = url;
-    a.download = `students_export_${ts}.csv`;
-    a.click();
-    URL.revokeObjectURL(url);
-    showSuccess("导出完成");
-  } catch (e) {
-    showError("导出失败：" + e.message);
-  }
+// 服务端逐块读取并流式输出 CSV，浏览器直接下载，无需逐页拉取拼接
+function exportStudents() {
+  const input = document.getElementById("student-mgr-search");
+  const q = input ? input.value.trim() : "";
+  const params = new URLSearchParams();
+  if (q) params.set("search", q);
+  const a = document.createElement("a");
+  a.href = `/operations/students/export/?${params.toString()}`;
+  a.click();
 }
 
 // -------------------- 运营任务管理 --------------------
@@ -555,6 +528,11 @@ function initOpsTaskTab() {
   // 仅初始化运营任务列表 + 批量操作
   loadOpsTasks(1);
 
+  // 教师推送的新待办由服务端推送，合并到当前列表
+  if (typeof subscribeEvents === "function") {
+    subscribeEvents({ "ops_task.created": mergeCreatedOpsTasks });
+  }
+
   // 批量“删除”（实际为批量关闭）
   const btnDelete = document.getElementById("ops-batch-delete");
   const btnExport = document.getElementById("ops-export");
@@ -644,20 +622,35 @@ async function addOpsTaskForStudent(studentId) {
   }
 }
 
+// 当前渲染的待办列表（事件推送合并用）
+let opsTaskView = { page: 1, search: "", status: "", tasks: [] };
+
 function loadOpsTasks(page = 1, search = "", status = "") {
   const params = new URLSearchParams({ page, page_size: 20 });
   if (search) params.set("search", search);
   if (status) params.set("status", status);
-  fetch(`/operations/tasks/api/?${params.toString()}`)
+  fetchWithETag(`/operations/tasks/api/?${params.toString()}`)
     .then((r) => r.json())
     .then((data) => {
       if (!data.success) throw new Error(data.message || "加载失败");
-      renderOpsTasks(Array.isArray(data.data) ? data.data : []);
+      const tasks = Array.isArray(data.data) ? data.data : [];
+      opsTaskView = { page, search, status, tasks };
+      renderOpsTasks(tasks);
       renderOpsTaskPagination(data.pagination || null);
     })
     .catch((e) => showError("加载运营任务失败：" + e.message));
 }
 
+// 新待办只出现在第一页（按创建时间倒序）；有搜索/状态筛选时不合并，避免显示不符合条件的行
+function mergeCreatedOpsTasks(items) {
+  if (opsTaskView.page !== 1 || opsTaskView.search || opsTaskView.status) return;
+  const known = new Set(opsTaskView.tasks.map((t) => t.id));
+  const added = items.filter((t) => !known.has(t.id));
+  if (!added.length) return;
+  opsTaskView.tasks = added.concat(opsTaskView.tasks).slice(0, 20);
+  renderOpsTasks(opsTaskView.tasks);
+}
+
 function renderOpsTasks(tasks) {
   const container = document.getElementById("ops-task-list");
   if (!container) return;
@@ -956,10 +949,7 @@ async function loadVisitStudentPanel(studentId, studentNameHint = "") {
   // 1) 学员详情
   let student;
   try {
-    const r = await fetch(`/operations/students/${studentId}/`);
-    const d = await r.json();
-    if (!d.success) throw new Error(d.message || "获取学员失败");
-    student = d.student || d.data || d.student_payload || {};
+    student = await loadStudentDetail(studentId);
   } catch (e) {
     showError("获取学员详情失败：" + e.message);
     return;
@@ -49,18 +49,42 @@
   }
 
   // ===== 质量监控：AJAX 与渲染（保留） =====
-  window.getWeeklyFeedback = function () {
-    fetch("/research/quality/feedback/?ajax=1")
+  // 点评记录按游标分页加载：首屏传空游标，“加载更多”携带上一页返回的 next_cursor
+  function loadFeedbackPage(qs, cursor) {
+    const params = new URLSearchParams(qs);
+    params.set("cursor", cursor || "");
+    return fetch(`/research/quality/feedback/?${params.toString()}`)
       .then((r) => r.json())
       .then((data) => {
-        if (!data || !data.success)
+        if (!data || data.success === false)
           throw new Error((data && data.message) || "获取失败");
-        window.renderFeedbackTable(data.feedbacks || []);
-      })
-      .catch((err) => {
+        window.renderFeedbackTable(data.feedbacks || [], Boolean(cursor));
+        renderFeedbackLoadMore(qs, data.next_cursor);
+      });
+  }
+
+  function renderFeedbackLoadMore(qs, nextCursor) {
+    const tbody = document.getElementById("feedbackTableBody");
+    if (!tbody || !nextCursor) return;
+    const tr = document.createElement("tr");
+    tr.className = "feedback-load-more";
+    tr.innerHTML =
+      '<td colspan="9" style="text-align:center;"><button class="btn btn-sm btn-secondary">加载更多</button></td>';
+    tr.querySelector("button").addEventListener("click", (e) => {
+      e.currentTarget.disabled = true;
+      loadFeedbackPage(qs, nextCursor).catch((err) => {
         console.error(err);
-        alert("获取数据失败");
+        alert("加载点评记录失败");
       });
+    });
+    tbody.appendChild(tr);
+  }
+
+  window.getWeeklyFeedback = function () {
+    loadFeedbackPage({ ajax: "1" }, "").catch((err) => {
+      console.error(err);
+      alert("获取数据失败");
+    });
   };
 
   // 统一搜索与筛选：使用学员搜索框(studentSearchInput)作为关键词来源，同时应用课程范围
@@ -84,22 +108,18 @@
     if (courseFrom) qs.set("course_from", courseFrom);
     if (courseTo) qs.set("course_to", courseTo);
 
-    const p1 = fetch(`/research/quality/feedback/?${qs.toString()}`)
-      .then((r) => r.json())
-      .then((data) => {
-        if (!data || data.success === false) {
-          throw new Error((data && data.message) || "加载点评记录失败");
-        }
-        window.renderFeedbackTable(data.feedbacks || []);
-      })
+    const p1 = loadFeedbackPage(qs.toString(), "")
       .catch((e) => {
         console.error(e);
         alert("加载点评记录失败");
       });
 
-    // 学员搜索：只用关键词（后端暂未支持课程范围筛学生）
-    const p2 = keyword
-      ? fetch(`/research/quality/students/search/?q=${encodeURIComponent(keyword)}`)
+    // 学员搜索：关键词 + 课程范围（点评涉及该课次范围的学员）
+    const studentQs = new URLSearchParams({ q: keyword });
+    if (courseFrom) studentQs.set("course_from", courseFrom);
+    if (courseTo) studentQs.set("course_to", courseTo);
+    const p2 = keyword || courseFrom || courseTo
+      ? fetch(`/research/quality/students/search/?${studentQs.toString()}`)
           .then((r) => r.json())
           .then((data) => {
             window.renderSearchResults((data && data.students) || []);
@@ -108,7 +128,7 @@
             console.error(err);
             alert("搜索学员失败");
           })
-      : Promise.resolve(); // 没有关键词则不搜索学员
+      : Promise.resolve(); // 没有关键词和课程范围则不搜索学员
 
     Promise.all([p1, p2]).catch(() => {});
   };
@@ -139,12 +159,17 @@
       });
   };
 
-  window.renderFeedbackTable = function (feedbacks) {
+  window.renderFeedbackTable = function (feedbacks, append) {
     const tbody = document.getElementById("feedbackTableBody");
     if (!tbody) return;
-    tbody.innerHTML = "";
+    if (append) {
+      // 追加下一页：先移除旧的“加载更多”行
+      tbody.querySelectorAll("tr.feedback-load-more").forEach((tr) => tr.remove());
+    } else {
+      tbody.innerHTML = "";
+    }
 
-    if (!feedbacks || feedbacks.length === 0) {
+    if (!append && (!feedbacks || feedbacks.length === 0)) {
       tbody.innerHTML =
         '<tr><td colspan="9"><div class="empty-state"><p>暂无点评记录</p></div></td></tr>';
       return;
@@ -162,7 +187,7 @@
         <td>${(fb.student && fb.student.student_name) || ""}</td>
         <td>${groups}</td>
         <td>${(fb.teacher && fb.teacher.real_name) || ""}</td>
-        <td>${fb.teacher_comment || ""}</td>
+        <td>${fb.highlight || fb.teacher_comment || ""}</td>
         <td>第${fb.progress || 0}课</td>
         <td>${date}</td>
         <td><button class="btn btn-sm btn-warning" onclick="addToAttention(${
@@ -504,7 +529,7 @@
           resultBox.innerHTML =
             '<div style="padding:12px;color:#666;">正在搜索...</div>';
         }
-        const res = await fetch(`${searchUrl}?q=${encodeURIComponent(q)}`);
+        const res = await fetchWithETag(`${searchUrl}?q=${encodeURIComponent(q)}`);
         const data = await res.json();
         return (data && data.students) || [];
       },
@@ -733,7 +758,7 @@
     listBox.innerHTML =
       '<div style="padding: 20px; text-align: center; color: #999;">正在加载历史记录...</div>';
 
-    fetch(api)
+    fetchWithETag(api)
       .then((r) => r.json())
       .then((data) => {
         const tasks = (data && data.tasks) || [];
@@ -986,7 +1011,7 @@ window.saveAssignment = async function () {
       if (!sid) return "";
 
       // 用用户ID作为精确查询关键字
-      const resp = await fetch(`${searchUrl}?q=${encodeURIComponent(sid)}`);
+      const resp = await fetchWithETag(`${searchUrl}?q=${encodeURIComponent(sid)}`);
       const data = await resp.json();
       const list = (data && data.students) || [];
       const found = list.find((s) => String(s.student_id) === String(sid));
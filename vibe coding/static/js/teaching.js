@@ -87,7 +87,7 @@ async function addStudentToToday(studentId) {
 
 // 刷新今日任务列表
 function refreshTasks() {
-  fetch("/teaching/tasks/today/")
+  fetchWithETag("/teaching/tasks/today/")
     .then((response) => response.json())
     .then((data) => {
       if (data.success) {
@@ -103,6 +103,16 @@ function refreshTasks() {
     });
 }
 
+// 事件流推送的新分配任务合并到今日任务列表（按 task_id 去重，新任务在前）
+function mergeAssignedTasks(items) {
+  const known = new Set(allTasks.map((t) => t.task_id));
+  const added = items.filter((t) => !known.has(t.task_id));
+  if (!added.length) return;
+  allTasks = added.concat(allTasks);
+  Teaching.state.allTasks = allTasks;
+  renderTaskList(allTasks);
+}
+
 // 渲染今日任务为表格（不显示分组）
 function renderTaskList(tasks) {
   const tbody = document.querySelector("#today-task-table tbody");
@@ -420,7 +430,7 @@ function confirmPush() {
 
 // 学员详情（使用模态框，按字段要求渲染）
 function showStudentDetail(studentId) {
-  fetch(`/teaching/students/${studentId}/`)
+  fetchWithETag(`/teaching/students/${studentId}/`)
     .then((response) => response.json())
     .then((data) => {
       if (!data.success) {
@@ -594,6 +604,11 @@ function initTeachingModule() {
     });
   })();
 
+  // 新分配的任务由服务端推送，无需整表刷新
+  if (typeof subscribeEvents === "function" && document.querySelector("#today-task-table")) {
+    subscribeEvents({ "teaching_task.assigned": mergeAssignedTasks });
+  }
+
   // 全选
   const selectAll = document.getElementById("today-select-all");
   if (selectAll) selectAll.addEventListener("change", onSelectAllChange);
@@ -614,7 +629,7 @@ function initTeachingModule() {
 
   // 已完成点评 - 数据加载
   function loadCompletedFeedbacks(page = 1) {
-    fetch(`/teaching/feedback/completed/?page=${page}`)
+    fetchWithETag(`/teaching/feedback/completed/?page=${page}`)
       .then((res) => res.json())
       .then((data) => {
         if (!data.success) {